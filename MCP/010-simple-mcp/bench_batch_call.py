@@ -0,0 +1,141 @@
+"""Benchmark of individual tool calls against one batch_call.
+
+Runs N add_numbers calls one request at a time, then the same N calls in a
+single batch_call, over stdio and streamable-http. Starts its own servers.
+
+    python bench_batch_call.py --calls 1000
+"""
+import asyncio
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+import click
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+from mcp.client.streamable_http import streamablehttp_client
+
+from simple_client import SimpleMCPClient
+
+SERVER = str(Path(__file__).resolve().parent / "simple_server.py")
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _wait_for_port(port: int, timeout: float = 15.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.1)
+    raise TimeoutError(f"Server did not start on port {port}")
+
+
+@asynccontextmanager
+async def connect(transport: str):
+    """Start a server on the transport and yield a client connected to it."""
+    client = SimpleMCPClient()
+    if transport == "stdio":
+        params = StdioServerParameters(command=sys.executable, args=[SERVER])
+        async with stdio_client(params) as (read_stream, write_stream):
+            async with ClientSession(read_stream, write_stream,
+                                     logging_callback=client.handle_log_message) as session:
+                await session.initialize()
+                client.session = session
+                yield client
+        return
+
+    port = _free_port()
+    process = subprocess.Popen(
+        [sys.executable, SERVER, "--transport", "streamable-http", "--host", "127.0.0.1", "--port", str(port)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        await _wait_for_port(port)
+        async with streamablehttp_client(f"http://127.0.0.1:{port}/mcp") as (read_stream, write_stream, _):
+            async with ClientSession(read_stream, write_stream,
+                                     logging_callback=client.handle_log_message) as session:
+                await session.initialize()
+                client.session = session
+                yield client
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+async def bench_transport(transport: str, calls: int) -> dict:
+    requests = [{"tool": "add_numbers", "arguments": {"a": i, "b": i}} for i in range(calls)]
+    async with connect(transport) as client:
+        # Warm up both paths.
+        await client.session.call_tool("add_numbers", arguments={"a": 1, "b": 2})
+        await client.batch_call(requests[:10])
+
+        latencies = []
+        start = time.perf_counter()
+        for request in requests:
+            call_start = time.perf_counter()
+            await client.session.call_tool(request["tool"], arguments=request["arguments"])
+            latencies.append(time.perf_counter() - call_start)
+        individual = time.perf_counter() - start
+
+        first_result = None
+        streamed = 0
+
+        def on_result(item):
+            nonlocal first_result, streamed
+            streamed += 1
+            if first_result is None:
+                first_result = time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = await client.batch_call(requests, on_result=on_result)
+        batched = time.perf_counter() - start
+        assert len(results) == calls and not any("error" in item for item in results)
+
+        start = time.perf_counter()
+        await client.batch_call(requests)
+        batched_no_stream = time.perf_counter() - start
+
+    return {
+        "transport": transport,
+        "individual": individual,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "batched": batched,
+        "first_result_ms": (first_result or 0) * 1000,
+        "streamed": streamed,
+        "batched_no_stream": batched_no_stream,
+    }
+
+
+@click.command()
+@click.option("--calls", default=1000, help="Number of tool calls.")
+@click.option("--transport", "transports", multiple=True, default=["stdio", "streamable-http"],
+              type=click.Choice(["stdio", "streamable-http"]), help="Transports to benchmark.")
+def main(calls: int, transports: tuple[str, ...]):
+    """Compare individual tool calls with one batch_call"""
+    for transport in transports:
+        r = asyncio.run(bench_transport(transport, calls))
+        print(f"{transport}:")
+        print(f"  {calls} individual calls:  {r['individual']:.3f}s "
+              f"({calls / r['individual']:.0f} calls/s, p50 {r['p50_ms']:.2f} ms)")
+        print(f"  1 batch, streamed:        {r['batched']:.3f}s "
+              f"({r['streamed']} results streamed, first after {r['first_result_ms']:.1f} ms)")
+        print(f"  1 batch, not streamed:    {r['batched_no_stream']:.3f}s")
+        print(f"  speedup:                  {r['individual'] / r['batched']:.1f}x streamed, "
+              f"{r['individual'] / r['batched_no_stream']:.1f}x not streamed")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,17 @@
+import inspect
+import json
 import logging
+import uuid
+from typing import Any, Awaitable, Callable
+
 import click
 import asyncio
 
 from mcp import StdioServerParameters, ClientSession
 from mcp.client.stdio import stdio_client
+from mcp.types import CallToolResult, LoggingMessageNotificationParams
+
+from mcp_tool_cache import list_tools_cached
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -15,6 +23,9 @@ class SimpleMCPClient:
 
     def __init__(self):
         self.session = None
+        self.server_key = None
+        # Result callbacks of the batches in flight, by batch id.
+        self._batches: dict[str, Callable[[dict[str, Any]], Awaitable[None] | None]] = {}
 
     async def connect(self, server_command: str):
         """Connect to MCP Server using stdio transport.
@@ -23,6 +34,7 @@ class SimpleMCPClient:
             server_command: Command to start the Simple MCP server.
         """
         logger.info(f"Connecting to MCP Server using stdio transport: {server_command}")
+        self.server_key = f"stdio:{server_command}"
 
         # Connect using stdio transport
         # Create server parameters for stdio connection.
@@ -33,7 +45,8 @@ class SimpleMCPClient:
         )
 
         async with stdio_client(server_params) as (read_stream, write_stream):
-            async with ClientSession(read_stream, write_stream) as session:
+            async with ClientSession(read_stream, write_stream,
+                                     logging_callback=self.handle_log_message) as session:
                 self.session = session
 
                 # Initialize the session
@@ -51,6 +64,7 @@ class SimpleMCPClient:
         logger.info("Commands:")
         logger.info("  list - List available tools")
         logger.info("  call <tool_name> [args] - Call a tool")
+        logger.info('  batch <json> - Call several tools, e.g. batch [{"tool": "add_numbers", "arguments": {"a": 1, "b": 2}}]')
         logger.info("  quit - Exit the session")
 
         while True:
@@ -69,6 +83,8 @@ class SimpleMCPClient:
                 elif command.startswith("call "):
                     await self.call_tool(command[5:])    # Remove call prefix
                     pass
+                elif command.startswith("batch "):
+                    await self.run_batch(command[6:])    # Remove batch prefix
                 else:
                     logger.warning(f"Unknown command: {command}")
             except KeyboardInterrupt:
@@ -80,8 +96,8 @@ class SimpleMCPClient:
     async def list_tools(self):
         """List all available tools from the server"""
         try:
-            response = await self.session.list_tools()
-            tools = response.tools
+            # Served from the tool cache unless the server's tools://fingerprint changed.
+            tools = await list_tools_cached(self.session, self.server_key)
 
             if not tools:
                 logger.info("No tools available.")
@@ -148,6 +164,89 @@ class SimpleMCPClient:
             logger.error(f"Error calling tool: {e}")
 
 
+    async def handle_log_message(self, params: LoggingMessageNotificationParams):
+        """Handle a log message from the server.
+
+        Results streamed by batch_call go to the callback of their batch.
+        """
+        if params.logger == "batch_call":
+            try:
+                item = json.loads(params.data)
+            except (TypeError, ValueError):
+                logger.warning(f"Malformed batch result: {params.data}")
+                return
+            on_result = self._batches.get(item.get("batch_id"))
+            if on_result is not None:
+                result = on_result(item)
+                if inspect.isawaitable(result):
+                    await result
+            return
+        logger.info(f"Server log ({params.level}): {params.data}")
+
+    async def batch_call(
+        self,
+        calls: list[dict[str, Any]],
+        on_result: Callable[[dict[str, Any]], Awaitable[None] | None] | None = None
+    ) -> list[dict[str, Any]]:
+        """Call several tools in one request with the server's batch_call tool.
+
+        Args:
+            calls: The calls, each {"tool": name, "arguments": {...}} with an optional "id".
+            on_result: Called with each result as soon as the server completes it. The
+                results are only streamed when this is set.
+
+        Returns:
+            The results in the order of the calls, each with either "result" or "error".
+        """
+        batch_id = uuid.uuid4().hex
+        if on_result is not None:
+            self._batches[batch_id] = on_result
+        try:
+            response = await self.session.call_tool(
+                "batch_call",
+                arguments={"calls": calls, "batch_id": batch_id, "stream": on_result is not None}
+            )
+        finally:
+            self._batches.pop(batch_id, None)
+        return self._batch_results(response)
+
+    @staticmethod
+    def _batch_results(response: CallToolResult) -> list[dict[str, Any]]:
+        text = "".join(content.text for content in response.content if hasattr(content, "text"))
+        if response.isError:
+            raise RuntimeError(f"batch_call failed: {text}")
+        payload = getattr(response, "structuredContent", None)
+        if not payload:
+            payload = json.loads(text)
+        return payload["results"]
+
+    async def run_batch(self, command: str):
+        """Call several tools and log each result as it arrives
+
+        Args:
+            command: JSON list of calls (e.g. '[{"tool": "add_numbers", "arguments": {"a": 5, "b": 3}}]')
+        """
+        try:
+            calls = json.loads(command)
+            if not isinstance(calls, list):
+                raise ValueError("expected a JSON list of calls")
+
+            def log_result(item: dict[str, Any]):
+                if "error" in item:
+                    logger.info(f"[{item['id']}] {item['tool']} failed: {item['error']}")
+                else:
+                    logger.info(f"[{item['id']}] {item['tool']}: {item['result']}")
+
+            logger.info(f"Calling {len(calls)} tools in one batch")
+            results = await self.batch_call(calls, on_result=log_result)
+            errors = sum(1 for item in results if "error" in item)
+            logger.info(f"Batch complete: {len(results)} results, {errors} errors")
+            logger.info("")
+
+        except ValueError as e:
+            logger.error(f"Invalid batch: {e}")
+        except Exception as e:
+            logger.error(f"Error calling batch: {e}")
 
 
 @click.command()
@@ -1,9 +1,15 @@
+import asyncio
+import inspect
+import json
 import logging
-from mcp.server.fastmcp.server import FastMCP
+from mcp.server.fastmcp.server import Context, FastMCP
+from pydantic import validate_call
 import click
-from typing import Any
+from typing import Any, Callable
 import datetime
 
+from mcp_tool_cache import tools_fingerprint as compute_tools_fingerprint
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -12,7 +18,25 @@ logger = logging.getLogger(__name__)
 # Create MCP Server
 server = FastMCP("simple-mcp-server")
 
+# Tools that can be called through batch_call, by name, with their arguments validated.
+BATCHABLE_TOOLS: dict[str, Callable[..., Any]] = {}
+# Largest batch accepted, and how many of its calls run at once.
+MAX_BATCH_CALLS = 1000
+MAX_CONCURRENT_CALLS = 16
+
+
+def batchable(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Make a tool callable through batch_call.
+
+    Batched calls are validated against the tool's signature with pydantic, like the
+    calls FastMCP dispatches itself.
+    """
+    BATCHABLE_TOOLS[fn.__name__] = validate_call(fn)
+    return fn
+
+
 @server.tool()
+@batchable
 def get_time() -> dict[str, Any]:
     """Get the current server time
 
@@ -30,6 +54,7 @@ def get_time() -> dict[str, Any]:
     }
 
 @server.tool()
+@batchable
 def add_numbers(a: int, b: int) -> dict[str, Any]:
     """Add two numbers.
 
@@ -50,6 +75,7 @@ def add_numbers(a: int, b: int) -> dict[str, Any]:
     }
 
 @server.tool()
+@batchable
 def greet_user(name: str) -> dict[str, Any]:
     """Greet a user by name.
 
@@ -65,13 +91,101 @@ def greet_user(name: str) -> dict[str, Any]:
         "timestamp": datetime.datetime.now().isoformat()
     }
 
+async def _run_batched_call(index: int, call: Any, limit: asyncio.Semaphore) -> dict[str, Any]:
+    """Run one call of a batch and return its result, or its error.
+
+    The tool (with its argument validation) runs in a worker thread, so sync tools run
+    concurrently and never block the event loop.
+    """
+    item: dict[str, Any] = {"index": index, "id": index, "tool": None}
+    try:
+        if not isinstance(call, dict):
+            raise TypeError(f"A call must be an object, got {type(call).__name__}")
+        tool = call.get("tool")
+        item.update(id=call.get("id", index), tool=tool)
+        if not isinstance(tool, str) or tool not in BATCHABLE_TOOLS:
+            raise ValueError(f"Unknown tool: {tool!r}")
+        arguments = call.get("arguments") or {}
+        if not isinstance(arguments, dict):
+            raise TypeError(f"The arguments must be an object, got {type(arguments).__name__}")
+        async with limit:
+            # An async tool only returns its coroutine here, which is awaited on the loop.
+            result = await asyncio.to_thread(BATCHABLE_TOOLS[tool], **arguments)
+            if inspect.isawaitable(result):
+                result = await result
+        item["result"] = result
+    except Exception as e:
+        item["error"] = f"{type(e).__name__}: {e}"
+    return item
+
+@server.tool()
+async def batch_call(
+    calls: list[dict[str, Any]],
+    ctx: Context,
+    batch_id: str | None = None,
+    stream: bool = True
+) -> dict[str, Any]:
+    """Call several tools in one request.
+
+    Up to MAX_CONCURRENT_CALLS of the calls run at once. With stream set, each result
+    is sent as a log message (logger "batch_call") as soon as it completes.
+
+    Args:
+        calls: The calls, each {"tool": name, "arguments": {...}} with an optional "id".
+        batch_id: Echoed in every streamed result, so the client can match them to the batch.
+        stream: Stream the results as they complete. Otherwise only return them at the end.
+
+    Returns:
+        The results in the order of the calls, each with either "result" or "error".
+
+    Raises:
+        ValueError: If the batch has more than MAX_BATCH_CALLS calls.
+    """
+    if len(calls) > MAX_BATCH_CALLS:
+        raise ValueError(f"A batch can have at most {MAX_BATCH_CALLS} calls, got {len(calls)}")
+    limit = asyncio.Semaphore(MAX_CONCURRENT_CALLS)
+    results: list[dict[str, Any] | None] = [None] * len(calls)
+    tasks = [asyncio.ensure_future(_run_batched_call(i, call, limit)) for i, call in enumerate(calls)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            item = await next_done
+            results[item["index"]] = item
+            if stream:
+                await ctx.info(json.dumps({"batch_id": batch_id, **item}, default=str), logger_name="batch_call")
+    finally:
+        # If the request is cancelled (or streaming fails), don't leave the rest of the batch running.
+        for task in tasks:
+            task.cancel()
+
+    return {
+        "batch_id": batch_id,
+        "count": len(results),
+        "errors": sum(1 for item in results if "error" in item),
+        "results": results,
+    }
+
+@server.resource("tools://fingerprint")
+async def tools_fingerprint() -> str:
+    """Fingerprint of the tool schemas.
+
+    Clients cache the tool listing and only list the tools again when this changes.
+    """
+    return compute_tools_fingerprint(await server.list_tools())
+
 @click.command()
 @click.option("--host", default="localhost", help="Host to bind the server to.")
 @click.option("--port", default=8000, help="Port to bind the server to.")
-def main(port: int, host: str):
+@click.option("--transport", default="stdio", type=click.Choice(["stdio", "streamable-http"]),
+              help="Transport protocol to use.")
+def main(port: int, host: str, transport: str):
     """Run the simple MCP server"""
-    logger.info(f"Starting simple MCP server on {host}:{port}")
-    server.run(transport="stdio")
+    if transport == "stdio":
+        logger.info("Starting simple MCP server on stdio")
+    else:
+        logger.info(f"Starting simple MCP server on {host}:{port}")
+        server.settings.host = host
+        server.settings.port = port
+    server.run(transport=transport)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,31 @@
+import asyncio
+import sys
+from pathlib import Path
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+from mcp_tool_cache import read_fingerprint, tools_fingerprint
+
+SERVER = Path(__file__).with_name("simple_server.py")
+
+
+async def check_fingerprint():
+    # Start simple_server.py over stdio and read tools://fingerprint through a real session.
+    server_params = StdioServerParameters(command=sys.executable, args=[str(SERVER)])
+    async with stdio_client(server_params) as (read_stream, write_stream):
+        async with ClientSession(read_stream, write_stream) as session:
+            await session.initialize()
+            fingerprint = await read_fingerprint(session)
+            tools = (await session.list_tools()).tools
+    print(f"<<< Fingerprint: {fingerprint}")
+    assert fingerprint == tools_fingerprint(tools), "tools://fingerprint does not match the listed tools"
+
+
+def test_fingerprint_resource():
+    asyncio.run(check_fingerprint())
+
+
+if __name__ == "__main__":
+    test_fingerprint_resource()
+    print("<<< ✅ tools://fingerprint matches the tool listing")
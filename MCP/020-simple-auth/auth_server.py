@@ -10,8 +10,11 @@ This is not a production-ready implementation.
 """
 
 import asyncio
+import contextlib
 import logging
 import time
+from collections.abc import AsyncIterator
+from typing import Any
 
 import click
 from pydantic import AnyHttpUrl, BaseModel
@@ -22,10 +25,14 @@ from starlette.responses import JSONResponse, Response
 from starlette.routing import Route
 from uvicorn import Config, Server
 
+from mcp.server.auth.provider import AccessToken
 from mcp.server.auth.routes import cors_middleware, create_auth_routes
 from mcp.server.auth.settings import AuthSettings, ClientRegistrationOptions
 
+from expiring_store import sweep_periodically
+from jwt_tokens import JWKS_PATH, JWTSigner
 from simple_auth_provider import SimpleAuthSettings, SimpleOAuthProvider
+from token_store import maintain_token_store
 
 logger = logging.getLogger(__name__)
 
@@ -39,6 +46,10 @@ class AuthServerSettings(BaseModel):
     server_url: AnyHttpUrl = AnyHttpUrl("http://localhost:9000")
     auth_callback_path: str = "http://localhost:9000/login/callback"
 
+    # Batch token introspection endpoint (/introspect/batch)
+    batch_introspection: bool = False
+    max_batch_size: int = 1000
+
 
 class SimpleAuthProvider(SimpleOAuthProvider):
     """
@@ -49,14 +60,24 @@ class SimpleAuthProvider(SimpleOAuthProvider):
     2. Stores token state for introspection by Resource Servers
     """
 
-    def __init__(self, auth_settings: SimpleAuthSettings, auth_callback_path: str, server_url: str):
-        super().__init__(auth_settings, auth_callback_path, server_url)
+    def __init__(
+        self,
+        auth_settings: SimpleAuthSettings,
+        auth_callback_path: str,
+        server_url: str,
+        token_signer: JWTSigner | None = None,
+    ):
+        super().__init__(auth_settings, auth_callback_path, server_url, token_signer)
 
 
 def create_authorization_server(server_settings: AuthServerSettings, auth_settings: SimpleAuthSettings) -> Starlette:
     """Create the Authorization Server application."""
+    token_signer = None
+    if auth_settings.token_mode == "jwt":
+        token_signer = JWTSigner(str(server_settings.server_url), auth_settings.jwt_private_key_file)
+
     oauth_provider = SimpleAuthProvider(
-        auth_settings, server_settings.auth_callback_path, str(server_settings.server_url)
+        auth_settings, server_settings.auth_callback_path, str(server_settings.server_url), token_signer
     )
 
     mcp_auth_settings = AuthSettings(
@@ -96,6 +117,21 @@ def create_authorization_server(server_settings: AuthServerSettings, auth_settin
 
     routes.append(Route("/login/callback", endpoint=login_callback_handler, methods=["POST"]))
 
+    def introspection_response(access_token: AccessToken | None) -> dict[str, Any]:
+        """RFC 7662 introspection response for a token."""
+        if not access_token:
+            return {"active": False}
+
+        return {
+            "active": True,
+            "client_id": access_token.client_id,
+            "scope": " ".join(access_token.scopes),
+            "exp": access_token.expires_at,
+            "iat": int(time.time()),
+            "token_type": "Bearer",
+            "aud": access_token.resource,  # RFC 8707 audience claim
+        }
+
     # Add token introspection endpoint (RFC 7662) for Resource Servers
     async def introspect_handler(request: Request) -> Response:
         """
@@ -111,20 +147,7 @@ def create_authorization_server(server_settings: AuthServerSettings, auth_settin
 
         # Look up token in provider
         access_token = await oauth_provider.load_access_token(token)
-        if not access_token:
-            return JSONResponse({"active": False})
-
-        return JSONResponse(
-            {
-                "active": True,
-                "client_id": access_token.client_id,
-                "scope": " ".join(access_token.scopes),
-                "exp": access_token.expires_at,
-                "iat": int(time.time()),
-                "token_type": "Bearer",
-                "aud": access_token.resource,  # RFC 8707 audience claim
-            }
-        )
+        return JSONResponse(introspection_response(access_token))
 
     routes.append(
         Route(
@@ -134,7 +157,83 @@ def create_authorization_server(server_settings: AuthServerSettings, auth_settin
         )
     )
 
-    return Starlette(routes=routes)
+    if server_settings.batch_introspection:
+        # Batch variant for Resource Servers that coalesce verifications (not part of RFC 7662)
+        async def batch_introspect_handler(request: Request) -> Response:
+            """
+            Introspect several tokens in one request.
+
+            Accepts {"tokens": [...]} and returns {"results": [...]}, one introspection
+            response per token, in the same order.
+            """
+            try:
+                body = await request.json()
+            except ValueError:
+                return JSONResponse({"error": "invalid_request"}, status_code=400)
+            tokens = body.get("tokens") if isinstance(body, dict) else None
+            if not isinstance(tokens, list) or not all(isinstance(token, str) for token in tokens):
+                return JSONResponse({"error": "invalid_request"}, status_code=400)
+            if len(tokens) > server_settings.max_batch_size:
+                description = f"At most {server_settings.max_batch_size} tokens per request"
+                return JSONResponse({"error": "invalid_request", "error_description": description}, status_code=413)
+
+            results = [introspection_response(await oauth_provider.load_access_token(token)) for token in tokens]
+            return JSONResponse({"results": results})
+
+        routes.append(
+            Route(
+                "/introspect/batch",
+                endpoint=cors_middleware(batch_introspect_handler, ["POST", "OPTIONS"]),
+                methods=["POST", "OPTIONS"],
+            )
+        )
+
+    if token_signer:
+        # Publish the signing key so Resource Servers can verify JWT access tokens locally
+        async def jwks_handler(request: Request) -> Response:
+            """JSON Web Key Set of the token signing keys."""
+            return JSONResponse(token_signer.jwks(), headers={"Cache-Control": "public, max-age=300"})
+
+        routes.append(
+            Route(
+                JWKS_PATH,
+                endpoint=cors_middleware(jwks_handler, ["GET", "OPTIONS"]),
+                methods=["GET", "OPTIONS"],
+            )
+        )
+
+    # Live entry counts of the provider's stores
+    async def store_stats_handler(request: Request) -> Response:
+        """Sizes and eviction counters of the token, code and login stores."""
+        return JSONResponse(oauth_provider.store_stats())
+
+    routes.append(Route("/stats", endpoint=store_stats_handler, methods=["GET"]))
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app: Starlette) -> AsyncIterator[None]:
+        """
+        While the server runs, sweep expired logins and flush and sweep the token store in the
+        background. On shutdown, write the buffered token store changes.
+        """
+        tasks = [
+            asyncio.create_task(sweep_periodically(oauth_provider.stores, auth_settings.sweep_interval)),
+            asyncio.create_task(
+                maintain_token_store(
+                    oauth_provider.store, auth_settings.token_store_flush_interval, auth_settings.sweep_interval
+                )
+            ),
+        ]
+        try:
+            yield
+        finally:
+            for task in tasks:
+                task.cancel()
+            for task in tasks:
+                with contextlib.suppress(asyncio.CancelledError):
+                    await task
+            oauth_provider.store.close()
+
+    return Starlette(routes=routes, lifespan=lifespan)
 
 
 async def run_server(server_settings: AuthServerSettings, auth_settings: SimpleAuthSettings):
@@ -150,13 +249,30 @@ async def run_server(server_settings: AuthServerSettings, auth_settings: SimpleA
     server = Server(config)
 
     logger.info(f"🚀 MCP Authorization Server running on {server_settings.server_url}")
+    logger.info(f"🔑 Issuing {auth_settings.token_mode} access tokens")
+    if auth_settings.token_store == "sqlite":
+        logger.info(f"💾 Storing clients and tokens in {auth_settings.token_store_path}")
 
     await server.serve()
 
 
 @click.command()
 @click.option("--port", default=9000, help="Port to listen on")
-def main(port: int) -> int:
+@click.option(
+    "--token-mode",
+    default="opaque",
+    type=click.Choice(["opaque", "jwt"]),
+    help="Issue opaque tokens (introspection) or signed JWTs (verified locally via the JWKS)",
+)
+@click.option(
+    "--token-store",
+    default="memory",
+    type=click.Choice(["memory", "sqlite"]),
+    help="Keep clients and tokens in memory, or in SQLite so they survive restarts",
+)
+@click.option("--token-store-path", default="auth_store", help="Directory of the SQLite token store")
+@click.option("--batch-introspection", is_flag=True, help="Enable the /introspect/batch endpoint")
+def main(port: int, token_mode: str, token_store: str, token_store_path: str, batch_introspection: bool) -> int:
     """
     Run the MCP Authorization Server.
 
@@ -167,7 +283,9 @@ def main(port: int) -> int:
     logging.basicConfig(level=logging.INFO)
 
     # Load simple auth settings
-    auth_settings = SimpleAuthSettings()
+    auth_settings = SimpleAuthSettings(
+        token_mode=token_mode, token_store=token_store, token_store_path=token_store_path
+    )
 
     # Create server settings
     host = "localhost"
@@ -177,6 +295,7 @@ def main(port: int) -> int:
         port=port,
         server_url=AnyHttpUrl(server_url),
         auth_callback_path=f"{server_url}/login",
+        batch_introspection=batch_introspection,
     )
 
     asyncio.run(run_server(server_settings, auth_settings))
@@ -0,0 +1,230 @@
+"""
+Load test of token verification against a local Authorization Server.
+
+Starts auth_server.py, obtains access tokens through the OAuth flow (dynamic client
+registration, authorization with PKCE, demo login, code exchange) without a browser,
+then verifies them through IntrospectionTokenVerifier with caching disabled. Reports p50/p99
+latency and throughput for:
+
+- per-call: a new httpx.AsyncClient per verification (the previous behaviour)
+- pooled: the verifier's shared keep-alive client, one request per token
+- batched: the pooled client, coalescing concurrent verifications into /introspect/batch
+
+Every per-call verification is an introspection round trip. The verifier still shares one
+in-flight introspection between concurrent verifications of the same token, so for the
+pooled and batched modes the report also gives the introspections actually sent and the
+verifications that were coalesced. With --tokens at least --concurrency, few are coalesced.
+
+    python bench_introspection.py --requests 2000 --concurrency 20
+    python bench_introspection.py --requests 20000 --concurrency 200 --tokens 500
+"""
+
+import asyncio
+import base64
+import hashlib
+import secrets
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import click
+import httpx
+
+from token_verifier import IntrospectionTokenVerifier
+
+AUTH_SERVER = str(Path(__file__).resolve().parent / "auth_server.py")
+REDIRECT_URI = "http://localhost:3030/callback"
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _wait_for_server(url: str, timeout: float = 15.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get(f"{url}/.well-known/oauth-authorization-server")
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+    raise TimeoutError(f"Authorization Server did not start at {url}")
+
+
+async def obtain_access_token(client: httpx.AsyncClient, auth_server_url: str, resource: str) -> str:
+    """Run the authorization-code flow with the demo credentials and return an access token."""
+    registration = await client.post(
+        f"{auth_server_url}/register",
+        json={
+            "client_name": "Introspection Load Test",
+            "redirect_uris": [REDIRECT_URI],
+            "grant_types": ["authorization_code", "refresh_token"],
+            "response_types": ["code"],
+            "token_endpoint_auth_method": "client_secret_post",
+        },
+    )
+    registration.raise_for_status()
+    client_info = registration.json()
+
+    code_verifier = secrets.token_urlsafe(48)
+    code_challenge = (
+        base64.urlsafe_b64encode(hashlib.sha256(code_verifier.encode()).digest()).decode().rstrip("=")
+    )
+    state = secrets.token_hex(16)
+
+    # The authorization endpoint redirects to the login page, which posts to the login callback.
+    authorize = await client.get(
+        f"{auth_server_url}/authorize",
+        params={
+            "response_type": "code",
+            "client_id": client_info["client_id"],
+            "redirect_uri": REDIRECT_URI,
+            "code_challenge": code_challenge,
+            "code_challenge_method": "S256",
+            "state": state,
+            "resource": resource,
+        },
+    )
+    if authorize.status_code != 302:
+        raise RuntimeError(f"Authorization failed: {authorize.status_code} {authorize.text}")
+
+    login = await client.post(
+        f"{auth_server_url}/login/callback",
+        data={"username": "demo_user", "password": "demo_password", "state": state},
+    )
+    if login.status_code != 302:
+        raise RuntimeError(f"Login failed: {login.status_code} {login.text}")
+    code = parse_qs(urlparse(login.headers["location"]).query)["code"][0]
+
+    token = await client.post(
+        f"{auth_server_url}/token",
+        data={
+            "grant_type": "authorization_code",
+            "code": code,
+            "redirect_uri": REDIRECT_URI,
+            "client_id": client_info["client_id"],
+            "client_secret": client_info.get("client_secret", ""),
+            "code_verifier": code_verifier,
+            "resource": resource,
+        },
+    )
+    token.raise_for_status()
+    return token.json()["access_token"]
+
+
+async def verify_per_call(introspection_endpoint: str, token: str) -> bool:
+    """Introspect a token with a new client per call, as the verifier used to."""
+    async with httpx.AsyncClient(
+        timeout=httpx.Timeout(10.0, connect=5.0),
+        limits=httpx.Limits(max_connections=10, max_keepalive_connections=5),
+    ) as client:
+        response = await client.post(introspection_endpoint, data={"token": token})
+        return response.status_code == 200 and response.json().get("active", False)
+
+
+async def run_load(verify, tokens: list[str], requests: int, concurrency: int) -> tuple[list[float], float, int]:
+    latencies: list[float] = []
+    failures = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        nonlocal failures
+        async with semaphore:
+            start = time.perf_counter()
+            ok = await verify(tokens[i % len(tokens)])
+            latencies.append(time.perf_counter() - start)
+            if not ok:
+                failures += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return latencies, time.perf_counter() - start, failures
+
+
+def report(name: str, latencies: list[float], elapsed: float, failures: int) -> None:
+    latencies = sorted(latencies)
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    print(
+        f"{name:>9}: p50 {p50:7.2f} ms  p99 {p99:7.2f} ms  "
+        f"{len(latencies) / elapsed:8.0f} verifications/s  failures {failures}"
+    )
+
+
+async def bench(requests: int, concurrency: int, tokens: int, http2: bool) -> None:
+    port = _free_port()
+    auth_server_url = f"http://localhost:{port}"
+    introspection_endpoint = f"{auth_server_url}/introspect"
+    resource_server_url = "http://localhost:8001"
+
+    process = subprocess.Popen(
+        [sys.executable, AUTH_SERVER, "--port", str(port), "--batch-introspection"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        await _wait_for_server(auth_server_url)
+        async with httpx.AsyncClient() as client:
+            access_tokens = [
+                await obtain_access_token(client, auth_server_url, resource_server_url) for _ in range(tokens)
+            ]
+        print(f"Obtained {len(access_tokens)} access tokens from {auth_server_url}")
+        print(f"{requests} verifications, concurrency {concurrency}")
+
+        # Warm up the server.
+        await run_load(lambda t: verify_per_call(introspection_endpoint, t), access_tokens, 50, concurrency)
+
+        report(
+            "per-call",
+            *await run_load(
+                lambda t: verify_per_call(introspection_endpoint, t), access_tokens, requests, concurrency
+            ),
+        )
+
+        for name, batch_endpoint in (("pooled", None), ("batched", f"{auth_server_url}/introspect/batch")):
+            verifier = IntrospectionTokenVerifier(
+                introspection_endpoint=introspection_endpoint,
+                server_url=resource_server_url,
+                cache_ttl=0,
+                negative_cache_ttl=0,
+                http2=http2,
+                batch_introspection_endpoint=batch_endpoint,
+            )
+
+            async def verify(token: str) -> bool:
+                return await verifier.verify_token(token) is not None
+
+            try:
+                report(name, *await run_load(verify, access_tokens, requests, concurrency))
+            finally:
+                await verifier.aclose()
+            stats = verifier.cache_stats
+            print(f"{'':>11}{stats.misses} introspections, {stats.coalesced} verifications coalesced "
+                  f"into an in-flight introspection")
+            if batch_endpoint:
+                per_request = stats.misses / max(verifier.batches_sent, 1)
+                print(f"{'':>11}{verifier.batches_sent} batch requests, {per_request:.1f} introspections per request")
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+@click.command()
+@click.option("--requests", default=2000, help="Number of verifications per client mode")
+@click.option("--concurrency", default=20, help="Concurrent verifications")
+@click.option("--tokens", default=20, help="Number of distinct access tokens")
+@click.option("--http2", is_flag=True, help="Use HTTP/2 for the pooled client (requires the h2 package)")
+def main(requests: int, concurrency: int, tokens: int, http2: bool) -> None:
+    """Compare per-call and pooled introspection latency against a local auth_server.py."""
+    asyncio.run(bench(requests, concurrency, tokens, http2))
+
+
+if __name__ == "__main__":
+    main()  # type: ignore[call-arg]
@@ -0,0 +1,97 @@
+"""
+Benchmark of the token stores at a million live tokens.
+
+Inserts --tokens access tokens (buffered, flushed in batches), then measures lookup
+latency of random stored tokens and of unknown tokens, as the introspection endpoint
+does. The SQLite store is also reopened to show the tokens survive a restart.
+
+    python bench_token_store.py --tokens 1000000
+"""
+
+import random
+import secrets
+import shutil
+import tempfile
+import time
+
+import click
+
+from mcp.server.auth.provider import AccessToken
+
+from token_store import MemoryTokenStore, SQLiteTokenStore, TokenStore
+
+
+def percentiles_us(latencies: list[float]) -> str:
+    latencies = sorted(latencies)
+    p50 = latencies[len(latencies) // 2] * 1e6
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1e6
+    return f"p50 {p50:6.1f} µs  p99 {p99:6.1f} µs"
+
+
+def bench_lookups(store: TokenStore, tokens: list[str], lookups: int) -> None:
+    hits = []
+    for token in random.sample(tokens, min(lookups, len(tokens))):
+        start = time.perf_counter()
+        found = store.get_token(token)
+        hits.append(time.perf_counter() - start)
+        assert found is not None
+    misses = []
+    for _ in range(lookups):
+        token = f"mcp_{secrets.token_hex(32)}"
+        start = time.perf_counter()
+        found = store.get_token(token)
+        misses.append(time.perf_counter() - start)
+        assert found is None
+    print(f"  lookup (stored):  {percentiles_us(hits)}")
+    print(f"  lookup (unknown): {percentiles_us(misses)}")
+
+
+def fill(store: TokenStore, tokens: list[str]) -> None:
+    expires_at = int(time.time()) + 3600
+    start = time.perf_counter()
+    for token in tokens:
+        store.put_token(
+            AccessToken(
+                token=token, client_id="bench", scopes=["user"], expires_at=expires_at, resource="http://localhost:8001"
+            )
+        )
+    store.flush()
+    elapsed = time.perf_counter() - start
+    print(f"  inserted {len(tokens)} tokens in {elapsed:.1f}s ({len(tokens) / elapsed:.0f}/s)")
+
+
+@click.command()
+@click.option("--tokens", "count", default=1_000_000, help="Number of live tokens")
+@click.option("--lookups", default=100_000, help="Number of lookups of each kind")
+@click.option("--shards", default=16, help="Shards of the SQLite store")
+@click.option("--path", default=None, help="Directory of the SQLite store (default: a temporary directory)")
+def main(count: int, lookups: int, shards: int, path: str | None) -> None:
+    """Measure token store inserts and lookups at COUNT live tokens."""
+    tokens = [f"mcp_{secrets.token_hex(32)}" for _ in range(count)]
+
+    print("memory:")
+    memory = MemoryTokenStore()
+    fill(memory, tokens)
+    bench_lookups(memory, tokens, lookups)
+    del memory
+
+    directory = path or tempfile.mkdtemp(prefix="token-store-")
+    try:
+        print(f"sqlite ({shards} shards, {directory}):")
+        store = SQLiteTokenStore(directory, shards=shards)
+        fill(store, tokens)
+        bench_lookups(store, tokens, lookups)
+        store.close()
+
+        start = time.perf_counter()
+        store = SQLiteTokenStore(directory, shards=shards)
+        print(f"  reopened in {(time.perf_counter() - start) * 1000:.1f} ms: {store.stats()['tokens']}")
+        bench_lookups(store, tokens, lookups)
+        store.close()
+    finally:
+        if path is None:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()  # type: ignore[call-arg]
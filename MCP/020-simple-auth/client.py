@@ -16,12 +16,17 @@ from http.server import BaseHTTPRequestHandler, HTTPServer
 from typing import Any
 from urllib.parse import parse_qs, urlparse
 
+import httpx
+
 from mcp.client.auth import OAuthClientProvider, TokenStorage
 from mcp.client.session import ClientSession
 from mcp.client.sse import sse_client
 from mcp.client.streamable_http import streamablehttp_client
 from mcp.shared.auth import OAuthClientInformationFull, OAuthClientMetadata, OAuthToken
 
+from file_token_storage import DEFAULT_PATH, FileTokenStorage
+from mcp_tool_cache import list_tools_cached
+
 
 class InMemoryTokenStorage(TokenStorage):
     """Simple in-memory token storage implementation."""
@@ -150,10 +155,100 @@ class CallbackServer:
 class SimpleAuthClient:
     """Simple MCP client with auth support."""
 
-    def __init__(self, server_url: str, transport_type: str = "streamable_http"):
+    def __init__(
+        self,
+        server_url: str,
+        transport_type: str = "streamable_http",
+        refresh_margin: float = 60.0,
+        refresh_check_interval: float = 30.0,
+        storage: TokenStorage | None = None,
+    ):
         self.server_url = server_url
         self.transport_type = transport_type
         self.session: ClientSession | None = None
+        # Where tokens and the client registration are kept (in memory by default)
+        self.storage = storage or InMemoryTokenStorage()
+        # Refresh the access token this many seconds before it expires (at most half its lifetime)
+        self.refresh_margin = refresh_margin
+        # How often to check for tokens while there are none to refresh
+        self.refresh_check_interval = refresh_check_interval
+
+    @staticmethod
+    def _use_tokens(context: Any, tokens: OAuthToken) -> None:
+        """Make tokens the provider's current tokens, expiring after their expires_in."""
+        context.current_tokens = tokens
+        context.token_expiry_time = time.time() + tokens.expires_in if tokens.expires_in is not None else None
+
+    async def _restore_stored_tokens(self, oauth: OAuthClientProvider) -> None:
+        """Load stored tokens into the provider with their remaining lifetime.
+
+        The provider loads stored tokens on its own, but without their expiry, so it would
+        send an expired access token and fall back to the full authorization flow on the
+        401. Knowing the expiry, it refreshes them first instead. Relies on the same
+        OAuthClientProvider internals as the background refresh.
+        """
+        context = getattr(oauth, "context", None)
+        if context is None or not hasattr(oauth, "_initialize") or not hasattr(context, "token_expiry_time"):
+            return
+        async with context.lock:
+            if not oauth._initialized:
+                await oauth._initialize()
+            if context.current_tokens is not None:
+                self._use_tokens(context, context.current_tokens)
+                print("🔑 Using stored tokens")
+
+    async def _keep_tokens_fresh(self, oauth: OAuthClientProvider) -> None:
+        """Refresh the access token in the background before it expires.
+
+        Without this, the OAuth provider refreshes only when a request finds the token
+        expired, and that request waits for the round trip. This relies on internals of
+        OAuthClientProvider (mcp >= 1.12, < 2, as pinned in requirements.txt); with other
+        versions it does nothing and the provider's own refresh on expiry still applies.
+        A failed refresh is retried after a back-off and never ends the session.
+        """
+        context = getattr(oauth, "context", None)
+        if context is None or not hasattr(oauth, "_refresh_token") or not hasattr(context, "token_expiry_time"):
+            print("⚠️  Background token refresh is not supported by this mcp version")
+            return
+
+        async with httpx.AsyncClient(timeout=httpx.Timeout(30.0)) as http_client:
+            while True:
+                expiry = context.token_expiry_time
+                tokens = context.current_tokens
+                if expiry is None or tokens is None or not context.can_refresh_token():
+                    await asyncio.sleep(self.refresh_check_interval)
+                    continue
+
+                margin = min(self.refresh_margin, (tokens.expires_in or 0) / 2)
+                delay = expiry - margin - time.time()
+                if delay > 0:
+                    # Wake up early anyway, in case the tokens are replaced meanwhile
+                    await asyncio.sleep(min(delay, self.refresh_check_interval))
+                    continue
+
+                try:
+                    async with context.lock:
+                        if context.token_expiry_time != expiry:
+                            continue  # Refreshed (or re-authorized) meanwhile
+                        # Another process sharing the storage may have refreshed already;
+                        # refreshing the same token again would count as reuse.
+                        stored = await self.storage.get_tokens()
+                        if stored is not None and stored.access_token != tokens.access_token:
+                            self._use_tokens(context, stored)
+                            continue
+                        request = await oauth._refresh_token()
+                        response = await http_client.send(request)
+                        refreshed = await oauth._handle_refresh_response(response)
+                except Exception as e:
+                    # Network errors, but also storage errors or changed provider internals
+                    print(f"⚠️  Token refresh failed, retrying: {e!r}")
+                    await asyncio.sleep(min(self.refresh_check_interval, max(margin / 4, 1.0)))
+                    continue
+                if refreshed:
+                    print("🔄 Access token refreshed")
+                else:
+                    # The provider dropped the tokens; the next request re-authorizes
+                    print("⚠️  Token refresh was rejected")
 
     async def connect(self):
         """Connect to the MCP server."""
@@ -189,28 +284,24 @@ class SimpleAuthClient:
             oauth_auth = OAuthClientProvider(
                 server_url=self.server_url.replace("/mcp", ""),
                 client_metadata=OAuthClientMetadata.model_validate(client_metadata_dict),
-                storage=InMemoryTokenStorage(),
+                storage=self.storage,
                 redirect_handler=_default_redirect_handler,
                 callback_handler=callback_handler,
             )
 
-            # Create transport with auth handler based on transport type
-            if self.transport_type == "sse":
-                print("📡 Opening SSE transport connection with auth...")
-                async with sse_client(
-                    url=self.server_url,
-                    auth=oauth_auth,
-                    timeout=60,
-                ) as (read_stream, write_stream):
-                    await self._run_session(read_stream, write_stream, None)
-            else:
-                print("📡 Opening StreamableHTTP transport connection with auth...")
-                async with streamablehttp_client(
-                    url=self.server_url,
-                    auth=oauth_auth,
-                    timeout=timedelta(seconds=60),
-                ) as (read_stream, write_stream, get_session_id):
-                    await self._run_session(read_stream, write_stream, get_session_id)
+            await self._restore_stored_tokens(oauth_auth)
+            refresher = asyncio.create_task(self._keep_tokens_fresh(oauth_auth))
+            try:
+                await self._connect_transport(oauth_auth)
+            finally:
+                refresher.cancel()
+                try:
+                    await refresher
+                except asyncio.CancelledError:
+                    pass
+                except Exception as e:
+                    # The session itself was fine; only the background refresh stopped.
+                    print(f"⚠️  Background token refresh stopped: {e!r}")
 
         except Exception as e:
             print(f"❌ Failed to connect: {e}")
@@ -218,6 +309,26 @@ class SimpleAuthClient:
 
             traceback.print_exc()
 
+    async def _connect_transport(self, oauth_auth: OAuthClientProvider):
+        """Open the transport with the auth handler and run the session."""
+        # Create transport with auth handler based on transport type
+        if self.transport_type == "sse":
+            print("📡 Opening SSE transport connection with auth...")
+            async with sse_client(
+                url=self.server_url,
+                auth=oauth_auth,
+                timeout=60,
+            ) as (read_stream, write_stream):
+                await self._run_session(read_stream, write_stream, None)
+        else:
+            print("📡 Opening StreamableHTTP transport connection with auth...")
+            async with streamablehttp_client(
+                url=self.server_url,
+                auth=oauth_auth,
+                timeout=timedelta(seconds=60),
+            ) as (read_stream, write_stream, get_session_id):
+                await self._run_session(read_stream, write_stream, get_session_id)
+
     async def _run_session(self, read_stream, write_stream, get_session_id):
         """Run the MCP session with the given streams."""
         print("🤝 Initializing MCP session...")
@@ -243,10 +354,11 @@ class SimpleAuthClient:
             return
 
         try:
-            result = await self.session.list_tools()
-            if hasattr(result, "tools") and result.tools:
+            # Served from the tool cache unless the server's tools://fingerprint changed.
+            tools = await list_tools_cached(self.session, self.server_url)
+            if tools:
                 print("\n📋 Available tools:")
-                for i, tool in enumerate(result.tools, 1):
+                for i, tool in enumerate(tools, 1):
                     print(f"{i}. {tool.name}")
                     if tool.description:
                         print(f"   Description: {tool.description}")
@@ -287,7 +399,8 @@ class SimpleAuthClient:
 
         while True:
             try:
-                command = input("mcp> ").strip()
+                # Read input in a thread so that background token refresh keeps running
+                command = (await asyncio.to_thread(input, "mcp> ")).strip()
 
                 if not command:
                     continue
@@ -341,12 +454,28 @@ async def main():
         else f"http://localhost:{server_url}/sse"
     )
 
+    # Tokens are kept across runs unless MCP_TOKEN_STORAGE=memory. The file is encrypted with
+    # the Fernet key in MCP_TOKEN_STORAGE_KEY (see file_token_storage.generate_key) or, without
+    # one, with a key generated into <token file>.key
+    storage: TokenStorage | None = None
+    user = os.getenv("MCP_CLIENT_USER", "default")
+    if os.getenv("MCP_TOKEN_STORAGE", "file") == "file":
+        storage = FileTokenStorage(
+            server_url,
+            user=user,
+            path=os.getenv("MCP_TOKEN_STORAGE_PATH", str(DEFAULT_PATH)),
+            key=os.getenv("MCP_TOKEN_STORAGE_KEY"),
+        )
+
     print("🚀 Simple MCP Auth Client")
     print(f"Connecting to: {server_url}")
     print(f"Transport type: {transport_type}")
+    if isinstance(storage, FileTokenStorage):
+        key_source = f"key in {storage.key_path}" if storage.key_path else "key from MCP_TOKEN_STORAGE_KEY"
+        print(f"Token storage: {storage.path} (encrypted, {key_source}, user {user})")
 
     # Start connection flow - OAuth will be handled automatically
-    client = SimpleAuthClient(server_url, transport_type)
+    client = SimpleAuthClient(server_url, transport_type, storage=storage)
     await client.connect()
 
 
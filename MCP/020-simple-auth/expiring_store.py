@@ -0,0 +1,177 @@
+"""
+Bounded, expiring key-value store for the Authorization Server's in-memory state.
+
+Entries carry an expiry time and are indexed in a min-heap by it, so a sweep evicts the
+expired entries in O(log n) each without scanning the live ones. Lookups of expired entries
+miss even before the sweep gets to them. Each store has a size cap; when it is full, the
+oldest entries are evicted first.
+
+NOTE: this is a simplified example for demonstration purposes.
+This is not a production-ready implementation.
+"""
+
+import asyncio
+import heapq
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from typing import Generic, TypeVar
+
+logger = logging.getLogger(__name__)
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+_MISSING = object()
+
+
+@dataclass
+class StoreStats:
+    """Counters of an ExpiringStore."""
+
+    live: int = 0
+    expired: int = 0
+    evicted: int = 0
+    max_entries: int | None = None
+
+
+class ExpiringStore(Generic[K, V]):
+    """Dict-like store whose entries expire.
+
+    ``store[key] = value`` uses the default TTL; ``set`` takes a TTL or an absolute expiry
+    (wall-clock seconds, like the ``expires_at`` of tokens and codes). Entries without an
+    expiry only leave the store when deleted or evicted by the size cap.
+    """
+
+    def __init__(self, name: str, default_ttl: float | None = None, max_entries: int | None = None):
+        self.name = name
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.expired = 0
+        self.evicted = 0
+        self._entries: OrderedDict[K, tuple[V, float | None]] = OrderedDict()
+        # (expires_at, sequence, key); entries that were replaced or deleted are skipped when popped
+        self._heap: list[tuple[float, int, K]] = []
+        self._sequence = 0
+
+    def set(self, key: K, value: V, ttl: float | None = None, expires_at: float | None = None) -> None:
+        """Store a value until expires_at, or for ttl seconds (default: the store's default TTL)."""
+        if expires_at is None:
+            ttl = self.default_ttl if ttl is None else ttl
+            expires_at = time.time() + ttl if ttl is not None else None
+
+        self._entries.pop(key, None)
+        self._entries[key] = (value, expires_at)
+        if expires_at is not None:
+            self._sequence += 1
+            heapq.heappush(self._heap, (expires_at, self._sequence, key))
+
+        if self.max_entries is not None:
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evicted += 1
+        # Replaced and deleted entries leave stale heap items behind; rebuild when they dominate.
+        if len(self._heap) > 2 * len(self._entries) + 1024:
+            self._compact()
+
+    def get(self, key: K, default: V | None = None) -> V | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.time():
+            del self._entries[key]
+            self.expired += 1
+            return default
+        return value
+
+    def pop(self, key: K, default: V | None = None) -> V | None:
+        value = self.get(key, _MISSING)  # type: ignore[arg-type]
+        if value is _MISSING:
+            return default
+        del self._entries[key]
+        return value
+
+    def __getitem__(self, key: K) -> V:
+        value = self.get(key, _MISSING)  # type: ignore[arg-type]
+        if value is _MISSING:
+            raise KeyError(key)
+        return value  # type: ignore[return-value]
+
+    def __setitem__(self, key: K, value: V) -> None:
+        self.set(key, value)
+
+    def __delitem__(self, key: K) -> None:
+        if self.pop(key, _MISSING) is _MISSING:  # type: ignore[arg-type]
+            raise KeyError(key)
+
+    def __contains__(self, key: object) -> bool:
+        return self.get(key, _MISSING) is not _MISSING  # type: ignore[arg-type]
+
+    def __len__(self) -> int:
+        """Number of stored entries, including expired ones the sweep has not evicted yet."""
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[K]:
+        now = time.time()
+        return iter([key for key, (_, expires_at) in self._entries.items() if expires_at is None or expires_at > now])
+
+    def sweep(self, now: float | None = None, limit: int | None = None) -> int:
+        """Evict expired entries, oldest expiry first.
+
+        Args:
+            now: Evict entries that expired at or before this time (default: now).
+            limit: Maximum number of heap items to process, to bound the time spent.
+
+        Returns:
+            The number of entries evicted.
+        """
+        now = time.time() if now is None else now
+        evicted = 0
+        processed = 0
+        heap = self._heap
+        while heap and heap[0][0] <= now and (limit is None or processed < limit):
+            expires_at, _, key = heapq.heappop(heap)
+            processed += 1
+            entry = self._entries.get(key)
+            # Skip heap items of entries that were since replaced or deleted.
+            if entry is not None and entry[1] == expires_at:
+                del self._entries[key]
+                evicted += 1
+        self.expired += evicted
+        return evicted
+
+    def next_expiry(self) -> float | None:
+        """Earliest expiry in the index (possibly of an entry replaced or deleted since)."""
+        return self._heap[0][0] if self._heap else None
+
+    def _compact(self) -> None:
+        self._heap = [
+            (expires_at, sequence, key)
+            for expires_at, sequence, key in self._heap
+            if (entry := self._entries.get(key)) is not None and entry[1] == expires_at
+        ]
+        heapq.heapify(self._heap)
+
+    def stats(self) -> StoreStats:
+        return StoreStats(live=len(self._entries), expired=self.expired, evicted=self.evicted, max_entries=self.max_entries)
+
+
+async def sweep_periodically(stores: Iterable[ExpiringStore], interval: float = 30.0, batch: int = 10_000) -> None:
+    """Sweep the stores every interval seconds until cancelled.
+
+    Sweeps run in batches and yield to the event loop in between, so a large backlog of
+    expired entries does not stall request handling.
+    """
+    stores = list(stores)
+    while True:
+        await asyncio.sleep(interval)
+        for store in stores:
+            evicted = 0
+            while (next_expiry := store.next_expiry()) is not None and next_expiry <= time.time():
+                evicted += store.sweep(limit=batch)
+                await asyncio.sleep(0)
+            if evicted:
+                logger.debug(f"Evicted {evicted} expired entries from {store.name} ({len(store)} live)")
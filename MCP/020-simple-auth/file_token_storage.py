@@ -0,0 +1,199 @@
+"""
+Persistent TokenStorage for the MCP auth client.
+
+Tokens and the dynamic client registration are kept in one file, under an entry per
+(MCP server URL, user), so that later runs reuse them instead of registering again and
+repeating the OAuth flow. The file is encrypted with Fernet (AES-128-CBC with
+HMAC-SHA256), is only readable by its owner, and is replaced atomically on every write.
+The key is passed in (e.g. from MCP_TOKEN_STORAGE_KEY) or, by default, generated on first
+use into a sidecar .key file that is only readable by its owner. A key file next to the
+token file only protects the tokens from copies of the token file alone; pass the key from
+a secret store to do better.
+An advisory lock (fcntl, where available) on a sidecar .lock file serializes writers across
+processes; each write re-reads the file under the lock, so concurrent clients of other
+servers or users do not overwrite each other's entries.
+
+Requires the cryptography package: pip install cryptography
+
+NOTE: this is a simplified example for demonstration purposes.
+This is not a production-ready implementation.
+"""
+
+import asyncio
+import contextlib
+import json
+import os
+import tempfile
+import time
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+from mcp.client.auth import TokenStorage
+from mcp.shared.auth import OAuthClientInformationFull, OAuthToken
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking
+    fcntl = None  # type: ignore[assignment]
+
+DEFAULT_PATH = Path.home() / ".mcp" / "simple-auth-tokens"
+FORMAT_VERSION = 1
+
+
+def _require_fernet():
+    try:
+        from cryptography.fernet import Fernet
+    except ImportError as e:
+        raise ImportError("Encrypted token storage requires cryptography: pip install cryptography") from e
+    return Fernet
+
+
+def generate_key() -> str:
+    """Generate a key for encrypting the token file."""
+    return _require_fernet().generate_key().decode()
+
+
+def load_or_create_key(path: str | os.PathLike[str]) -> str:
+    """Read the key in a key file, or generate one into a new file only its owner can read."""
+    path = Path(path).expanduser()
+    path.parent.mkdir(parents=True, exist_ok=True, mode=0o700)
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        # Created earlier, or just now by another process (which then writes it at once)
+        for _ in range(50):
+            key = path.read_text().strip()
+            if key:
+                return key
+            time.sleep(0.01)
+        raise ValueError(f"The token storage key file {path} is empty")
+    key = generate_key()
+    with os.fdopen(fd, "w") as f:
+        f.write(key)
+    return key
+
+
+class FileTokenStorage(TokenStorage):
+    """
+    TokenStorage persisted in an encrypted file shared by servers and users.
+
+    Args:
+        server_url: The MCP server the tokens are for.
+        user: Local name for the account, to keep several logins to one server apart.
+        path: The token file.
+        key: Fernet key to encrypt the file with; without one, the key in ``<path>.key``
+            is used, generated on first use.
+
+    Raises:
+        ValueError: When reading a token file that the key cannot decrypt.
+    """
+
+    def __init__(
+        self,
+        server_url: str,
+        user: str = "default",
+        path: str | os.PathLike[str] = DEFAULT_PATH,
+        key: str | bytes | None = None,
+    ):
+        self.path = Path(path).expanduser()
+        self.entry_key = f"{server_url}#{user}"
+        self.key_path: Path | None = None
+        if not key:
+            self.key_path = self.path.with_name(self.path.name + ".key")
+            key = load_or_create_key(self.key_path)
+        self._fernet = _require_fernet()(key)
+
+    # TokenStorage
+
+    async def get_tokens(self) -> OAuthToken | None:
+        entry = await asyncio.to_thread(self._read_entry)
+        data = entry.get("tokens")
+        if data is None:
+            return None
+        tokens = OAuthToken.model_validate(data)
+        if tokens.expires_in is not None:
+            # Report the remaining lifetime, not the one at issue
+            elapsed = int(time.time() - entry.get("tokens_saved_at", time.time()))
+            tokens = tokens.model_copy(update={"expires_in": max(tokens.expires_in - elapsed, 0)})
+        return tokens
+
+    async def set_tokens(self, tokens: OAuthToken) -> None:
+        await asyncio.to_thread(
+            self._update_entry, tokens=tokens.model_dump(mode="json"), tokens_saved_at=time.time()
+        )
+
+    async def get_client_info(self) -> OAuthClientInformationFull | None:
+        data = (await asyncio.to_thread(self._read_entry)).get("client_info")
+        return OAuthClientInformationFull.model_validate(data) if data is not None else None
+
+    async def set_client_info(self, client_info: OAuthClientInformationFull) -> None:
+        await asyncio.to_thread(self._update_entry, client_info=client_info.model_dump(mode="json"))
+
+    async def clear(self) -> None:
+        """Forget the tokens and client registration of this server and user."""
+        await asyncio.to_thread(self._update_entry, remove=True)
+
+    # File access (blocking; run in a thread)
+
+    @contextlib.contextmanager
+    def _locked(self, exclusive: bool) -> Iterator[None]:
+        self.path.parent.mkdir(parents=True, exist_ok=True, mode=0o700)
+        if fcntl is None:
+            yield
+            return
+        fd = os.open(f"{self.path}.lock", os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            yield
+        finally:
+            os.close(fd)  # Releases the lock
+
+    def _load(self) -> dict[str, Any]:
+        try:
+            raw = self.path.read_bytes()
+        except FileNotFoundError:
+            return {"version": FORMAT_VERSION, "entries": {}}
+        from cryptography.fernet import InvalidToken
+
+        try:
+            raw = self._fernet.decrypt(raw)
+        except InvalidToken:
+            raise ValueError(
+                f"Cannot decrypt the token file {self.path}: it was written with another key, or "
+                f"without encryption. Use the key it was written with, or delete it to log in again."
+            ) from None
+        document = json.loads(raw)
+        if document.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported token file version in {self.path}: {document.get('version')}")
+        return document
+
+    def _save(self, document: dict[str, Any]) -> None:
+        raw = self._fernet.encrypt(json.dumps(document).encode())
+        # Write a temporary file next to the target and rename it over, so readers never
+        # see a partial file and a crash leaves the previous version intact.
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix=f".{self.path.name}.")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(raw)
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(tmp_path, 0o600)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(tmp_path)
+            raise
+
+    def _read_entry(self) -> dict[str, Any]:
+        with self._locked(exclusive=False):
+            return self._load()["entries"].get(self.entry_key, {})
+
+    def _update_entry(self, remove: bool = False, **fields: Any) -> None:
+        with self._locked(exclusive=True):
+            document = self._load()
+            if remove:
+                document["entries"].pop(self.entry_key, None)
+            else:
+                document["entries"].setdefault(self.entry_key, {}).update(fields)
+            self._save(document)
@@ -0,0 +1,244 @@
+"""
+Signed JWT access tokens (RS256) for the MCP Split Demo.
+
+The Authorization Server signs access tokens with an RSA key and publishes the public key
+at /.well-known/jwks.json. Resource Servers fetch and cache the key set, then verify the
+signature, issuer, expiry, scopes and RFC 8707 audience in-process, without calling
+/introspect for every request.
+
+Requires PyJWT with the crypto extra: pip install "pyjwt[crypto]"
+
+NOTE: this is a simplified example for demonstration purposes.
+This is not a production-ready implementation.
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import secrets
+import time
+from typing import TYPE_CHECKING, Any
+
+from mcp.server.auth.provider import AccessToken, TokenVerifier
+from mcp.shared.auth_utils import check_resource_allowed, resource_url_from_server_url
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+JWKS_PATH = "/.well-known/jwks.json"
+ALGORITHM = "RS256"
+
+
+def _require_jwt():
+    try:
+        import jwt
+    except ImportError as e:
+        raise ImportError('JWT access tokens require PyJWT: pip install "pyjwt[crypto]"') from e
+    return jwt
+
+
+def _b64url_uint(value: int) -> str:
+    data = value.to_bytes((value.bit_length() + 7) // 8, "big")
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+class JWTSigner:
+    """
+    Issues RS256-signed access tokens and publishes the public key as a JWKS.
+
+    The signing key is loaded from a PEM file if one is given, otherwise a new key is
+    generated at startup (tokens then do not survive a restart of the Authorization Server).
+    """
+
+    def __init__(self, issuer: str, private_key_file: str | None = None):
+        from cryptography.hazmat.primitives import serialization
+        from cryptography.hazmat.primitives.asymmetric import rsa
+
+        _require_jwt()
+        self.issuer = issuer.rstrip("/")
+        if private_key_file:
+            with open(private_key_file, "rb") as f:
+                self._private_key = serialization.load_pem_private_key(f.read(), password=None)
+        else:
+            self._private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+        numbers = self._private_key.public_key().public_numbers()
+        self._public_jwk = {"kty": "RSA", "n": _b64url_uint(numbers.n), "e": _b64url_uint(numbers.e)}
+        # RFC 7638 thumbprint as the key id
+        canonical = json.dumps(
+            {"e": self._public_jwk["e"], "kty": "RSA", "n": self._public_jwk["n"]}, separators=(",", ":")
+        )
+        self.kid = base64.urlsafe_b64encode(hashlib.sha256(canonical.encode()).digest()).decode().rstrip("=")
+
+    def issue(
+        self,
+        client_id: str,
+        scopes: list[str],
+        expires_in: int,
+        audience: str | list[str] | None = None,
+        subject: str | None = None,
+    ) -> str:
+        """Sign an access token for the client."""
+        jwt = _require_jwt()
+        now = int(time.time())
+        claims: dict[str, Any] = {
+            "iss": self.issuer,
+            "sub": subject or client_id,
+            "client_id": client_id,
+            "scope": " ".join(scopes),
+            "iat": now,
+            "exp": now + expires_in,
+            "jti": secrets.token_hex(16),
+        }
+        if audience:
+            claims["aud"] = audience
+        return jwt.encode(claims, self._private_key, algorithm=ALGORITHM, headers={"kid": self.kid})
+
+    def jwks(self) -> dict[str, Any]:
+        """The public key set, as served at /.well-known/jwks.json."""
+        return {"keys": [{**self._public_jwk, "kid": self.kid, "use": "sig", "alg": ALGORITHM}]}
+
+
+class JWTTokenVerifier(TokenVerifier):
+    """Token verifier that validates RS256 access tokens locally (RFC 9068 style).
+
+    The Authorization Server's JWKS is fetched on first use and cached for jwks_cache_ttl
+    seconds. A token signed with an unknown key id triggers a refetch, at most once every
+    jwks_min_refresh_interval seconds. Tokens are checked for signature, issuer, exp/nbf,
+    required scopes and, with validate_resource, the RFC 8707 audience.
+
+    Unlike introspection, a revoked token stays valid here until it expires.
+    """
+
+    def __init__(
+        self,
+        jwks_url: str,
+        issuer: str,
+        server_url: str,
+        validate_resource: bool = False,
+        required_scopes: list[str] | None = None,
+        jwks_cache_ttl: float = 300.0,
+        jwks_min_refresh_interval: float = 10.0,
+        leeway: float = 30.0,
+    ):
+        _require_jwt()
+        self.jwks_url = jwks_url
+        self.issuer = issuer.rstrip("/")
+        self.server_url = server_url
+        self.validate_resource = validate_resource
+        self.resource_url = resource_url_from_server_url(server_url)
+        self.required_scopes = required_scopes or []
+        self.jwks_cache_ttl = jwks_cache_ttl
+        self.jwks_min_refresh_interval = jwks_min_refresh_interval
+        self.leeway = leeway
+        self._keys: dict[str, Any] = {}
+        self._keys_fetched_at = float("-inf")
+        self._refresh_lock = asyncio.Lock()
+        self._client: "httpx.AsyncClient | None" = None
+
+    async def _refresh_keys(self, force: bool = False) -> None:
+        """Fetch the JWKS if the cached one is stale (or force, subject to the minimum interval)."""
+        import httpx
+
+        async with self._refresh_lock:
+            age = time.monotonic() - self._keys_fetched_at
+            if age < self.jwks_min_refresh_interval or (not force and age < self.jwks_cache_ttl):
+                return  # Another request refreshed the keys meanwhile, or too soon to refetch
+
+            # Validate URL to prevent SSRF attacks
+            if not self.jwks_url.startswith(("https://", "http://localhost", "http://127.0.0.1")):
+                logger.warning(f"Rejecting JWKS endpoint with unsafe scheme: {self.jwks_url}")
+                return
+
+            if self._client is None:
+                self._client = httpx.AsyncClient(timeout=httpx.Timeout(10.0, connect=5.0), verify=True)
+
+            jwt = _require_jwt()
+            try:
+                response = await self._client.get(self.jwks_url)
+                response.raise_for_status()
+                keys = {}
+                for jwk in response.json().get("keys", []):
+                    if jwk.get("kty") == "RSA" and jwk.get("use", "sig") == "sig" and "kid" in jwk:
+                        keys[jwk["kid"]] = jwt.PyJWK(jwk, algorithm=ALGORITHM).key
+            except Exception as e:
+                logger.warning(f"Fetching JWKS from {self.jwks_url} failed: {e}")
+                return
+            finally:
+                # Also on failure, so that an unreachable server is not hammered.
+                self._keys_fetched_at = time.monotonic()
+            self._keys = keys
+
+    async def _signing_key(self, kid: str) -> Any | None:
+        await self._refresh_keys()
+        if kid not in self._keys:
+            await self._refresh_keys(force=True)
+        return self._keys.get(kid)
+
+    async def verify_token(self, token: str) -> AccessToken | None:
+        """Verify a JWT access token locally."""
+        jwt = _require_jwt()
+        try:
+            header = jwt.get_unverified_header(token)
+        except jwt.InvalidTokenError:
+            return None  # Not a JWT
+        if header.get("alg") != ALGORITHM or not header.get("kid"):
+            return None
+
+        key = await self._signing_key(header["kid"])
+        if key is None:
+            logger.debug(f"No signing key with kid {header['kid']}")
+            return None
+
+        try:
+            claims = jwt.decode(
+                token,
+                key,
+                algorithms=[ALGORITHM],
+                leeway=self.leeway,
+                options={"require": ["exp", "iss"], "verify_aud": False},  # aud is matched hierarchically below
+            )
+        except jwt.InvalidTokenError as e:
+            logger.debug(f"JWT validation failed: {e}")
+            return None
+
+        if str(claims["iss"]).rstrip("/") != self.issuer:
+            logger.debug(f"JWT issuer mismatch: {claims['iss']}")
+            return None
+
+        scopes = claims.get("scope", "").split()
+        if any(scope not in scopes for scope in self.required_scopes):
+            return None
+
+        # RFC 8707 resource validation (only when --oauth-strict is set)
+        if self.validate_resource and not self._validate_audience(claims.get("aud")):
+            logger.warning(f"Token audience validation failed. Expected: {self.resource_url}")
+            return None
+
+        return AccessToken(
+            token=token,
+            client_id=claims.get("client_id", claims.get("sub", "unknown")),
+            scopes=scopes,
+            expires_at=claims["exp"],
+            resource=claims.get("aud"),
+        )
+
+    def _validate_audience(self, aud: list[str] | str | None) -> bool:
+        """Validate token was issued for this resource server."""
+        if not self.resource_url or not aud:
+            return False
+        audiences = aud if isinstance(aud, list) else [aud]
+        return any(
+            check_resource_allowed(requested_resource=self.resource_url, configured_resource=audience)
+            for audience in audiences
+        )
+
+    async def aclose(self) -> None:
+        """Close the HTTP client used to fetch the JWKS."""
+        if self._client is not None:
+            client, self._client = self._client, None
+            await client.aclose()
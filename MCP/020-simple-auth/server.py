@@ -12,6 +12,7 @@ import datetime
 import logging
 from typing import Any, Literal
 
+import anyio
 import click
 from pydantic import AnyHttpUrl
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -19,6 +20,8 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 from mcp.server.auth.settings import AuthSettings
 from mcp.server.fastmcp.server import FastMCP
 
+from jwt_tokens import JWKS_PATH, JWTTokenVerifier
+from mcp_tool_cache import tools_fingerprint as compute_tools_fingerprint
 from token_verifier import IntrospectionTokenVerifier
 
 logger = logging.getLogger(__name__)
@@ -39,6 +42,26 @@ class ResourceServerSettings(BaseSettings):
     auth_server_introspection_endpoint: str = "http://localhost:9000/introspect"
     # No user endpoint needed - we get user data from token introspection
 
+    # How tokens are verified: "introspection" (opaque tokens) or "jwt" (local
+    # signature check against the Authorization Server's JWKS)
+    token_mode: Literal["introspection", "jwt"] = "introspection"
+    auth_server_jwks_endpoint: str = "http://localhost:9000/.well-known/jwks.json"
+
+    # Introspection result cache (seconds; a TTL of 0 disables caching)
+    introspection_cache_ttl: float = 60.0
+    introspection_negative_cache_ttl: float = 10.0
+    introspection_cache_max_entries: int = 10_000
+
+    # Pooled HTTP client for introspection requests
+    introspection_http2: bool = False
+    introspection_max_connections: int = 100
+    introspection_max_keepalive_connections: int = 20
+
+    # Coalesce concurrent introspections into batches (auth server needs --batch-introspection)
+    introspection_batch: bool = False
+    auth_server_batch_introspection_endpoint: str = "http://localhost:9000/introspect/batch"
+    introspection_batch_window: float = 0.005
+
     # MCP settings
     mcp_scope: str = "user"
 
@@ -51,21 +74,49 @@ class ResourceServerSettings(BaseSettings):
         super().__init__(**data)
 
 
-def create_resource_server(settings: ResourceServerSettings) -> FastMCP:
+def create_token_verifier(settings: ResourceServerSettings) -> IntrospectionTokenVerifier | JWTTokenVerifier:
+    """Create the token verifier for the token mode, with RFC 8707 resource validation."""
+    if settings.token_mode == "jwt":
+        return JWTTokenVerifier(
+            jwks_url=settings.auth_server_jwks_endpoint,
+            issuer=str(settings.auth_server_url),
+            server_url=str(settings.server_url),
+            validate_resource=settings.oauth_strict,  # Only validate when --oauth-strict is set
+            required_scopes=[settings.mcp_scope],
+        )
+
+    return IntrospectionTokenVerifier(
+        introspection_endpoint=settings.auth_server_introspection_endpoint,
+        server_url=str(settings.server_url),
+        validate_resource=settings.oauth_strict,  # Only validate when --oauth-strict is set
+        cache_ttl=settings.introspection_cache_ttl,
+        negative_cache_ttl=settings.introspection_negative_cache_ttl,
+        cache_max_entries=settings.introspection_cache_max_entries,
+        http2=settings.introspection_http2,
+        max_connections=settings.introspection_max_connections,
+        max_keepalive_connections=settings.introspection_max_keepalive_connections,
+        batch_introspection_endpoint=(
+            settings.auth_server_batch_introspection_endpoint if settings.introspection_batch else None
+        ),
+        batch_window=settings.introspection_batch_window,
+    )
+
+
+def create_resource_server(
+    settings: ResourceServerSettings, token_verifier: IntrospectionTokenVerifier | JWTTokenVerifier | None = None
+) -> FastMCP:
     """
     Create MCP Resource Server with token introspection.
 
     This server:
     1. Provides protected resource metadata (RFC 9728)
-    2. Validates tokens via Authorization Server introspection
+    2. Validates tokens via Authorization Server introspection (or locally, in JWT mode)
     3. Serves MCP tools and resources
+
+    The token verifier owns a pooled HTTP client; close it with aclose() after the server stops.
     """
-    # Create token verifier for introspection with RFC 8707 resource validation
-    token_verifier = IntrospectionTokenVerifier(
-        introspection_endpoint=settings.auth_server_introspection_endpoint,
-        server_url=str(settings.server_url),
-        validate_resource=settings.oauth_strict,  # Only validate when --oauth-strict is set
-    )
+    if token_verifier is None:
+        token_verifier = create_token_verifier(settings)
 
     # Create FastMCP server as a Resource Server
     app = FastMCP(
@@ -101,9 +152,33 @@ def create_resource_server(settings: ResourceServerSettings) -> FastMCP:
             "formatted": now.strftime("%Y-%m-%d %H:%M:%S"),
         }
 
+    @app.resource("tools://fingerprint")
+    async def tools_fingerprint() -> str:
+        """
+        Fingerprint of the tool schemas.
+
+        Clients cache the tool listing and only list the tools again when this changes.
+        """
+        return compute_tools_fingerprint(await app.list_tools())
+
     return app
 
 
+async def serve(
+    mcp_server: FastMCP,
+    transport: Literal["sse", "streamable-http"],
+    token_verifier: IntrospectionTokenVerifier | JWTTokenVerifier,
+) -> None:
+    """Run the server, then close the token verifier's pooled connections."""
+    try:
+        if transport == "sse":
+            await mcp_server.run_sse_async()
+        else:
+            await mcp_server.run_streamable_http_async()
+    finally:
+        await token_verifier.aclose()
+
+
 @click.command()
 @click.option("--port", default=8001, help="Port to listen on")
 @click.option("--auth-server", default="http://localhost:9000", help="Authorization Server URL")
@@ -118,7 +193,31 @@ def create_resource_server(settings: ResourceServerSettings) -> FastMCP:
     is_flag=True,
     help="Enable RFC 8707 resource validation",
 )
-def main(port: int, auth_server: str, transport: Literal["sse", "streamable-http"], oauth_strict: bool) -> int:
+@click.option(
+    "--http2",
+    is_flag=True,
+    help="Use HTTP/2 for token introspection (requires the h2 package)",
+)
+@click.option(
+    "--batch-introspection",
+    is_flag=True,
+    help="Coalesce concurrent token introspections into batch requests (auth server needs --batch-introspection)",
+)
+@click.option(
+    "--token-mode",
+    default="introspection",
+    type=click.Choice(["introspection", "jwt"]),
+    help="Verify tokens via introspection, or locally as JWTs (auth server must run with --token-mode jwt)",
+)
+def main(
+    port: int,
+    auth_server: str,
+    transport: Literal["sse", "streamable-http"],
+    oauth_strict: bool,
+    http2: bool,
+    batch_introspection: bool,
+    token_mode: Literal["introspection", "jwt"],
+) -> int:
     """
     Run the MCP Resource Server.
 
@@ -145,6 +244,11 @@ def main(port: int, auth_server: str, transport: Literal["sse", "streamable-http
             auth_server_url=auth_server_url,
             auth_server_introspection_endpoint=f"{auth_server}/introspect",
             oauth_strict=oauth_strict,
+            introspection_http2=http2,
+            introspection_batch=batch_introspection,
+            auth_server_batch_introspection_endpoint=f"{auth_server}/introspect/batch",
+            token_mode=token_mode,
+            auth_server_jwks_endpoint=f"{auth_server}{JWKS_PATH}",
         )
     except ValueError as e:
         logger.error(f"Configuration error: {e}")
@@ -152,13 +256,14 @@ def main(port: int, auth_server: str, transport: Literal["sse", "streamable-http
         return 1
 
     try:
-        mcp_server = create_resource_server(settings)
+        token_verifier = create_token_verifier(settings)
+        mcp_server = create_resource_server(settings, token_verifier)
 
         logger.info(f"🚀 MCP Resource Server running on {settings.server_url}")
-        logger.info(f"🔑 Using Authorization Server: {settings.auth_server_url}")
+        logger.info(f"🔑 Using Authorization Server: {settings.auth_server_url} ({settings.token_mode})")
 
         # Run the server - this should block and keep running
-        mcp_server.run(transport=transport)
+        anyio.run(serve, mcp_server, transport, token_verifier)
         logger.info("Server stopped")
         return 0
     except Exception:
@@ -12,6 +12,7 @@ This is not a production-ready implementation.
 import logging
 import secrets
 import time
+from dataclasses import asdict
 from typing import Any
 
 from pydantic import AnyHttpUrl
@@ -26,10 +27,15 @@ from mcp.server.auth.provider import (
     AuthorizationParams,
     OAuthAuthorizationServerProvider,
     RefreshToken,
+    TokenError,
     construct_redirect_uri,
 )
 from mcp.shared.auth import OAuthClientInformationFull, OAuthToken
 
+from expiring_store import ExpiringStore
+from jwt_tokens import JWTSigner
+from token_store import RefreshTokenRecord, TokenStore, call_store, create_token_store, token_hash
+
 logger = logging.getLogger(__name__)
 
 
@@ -45,6 +51,34 @@ class SimpleAuthSettings(BaseSettings):
     # MCP OAuth scope
     mcp_scope: str = "user"
 
+    # Access token format: opaque "mcp_<hex>" tokens (introspection only) or signed JWTs
+    token_mode: str = "opaque"
+    # PEM private key for signing JWTs; a new key is generated at startup if unset
+    jwt_private_key_file: str | None = None
+
+    # Lifetimes (seconds) of access tokens, authorization codes and pending logins
+    access_token_ttl: int = 3600
+    auth_code_ttl: int = 300
+    login_state_ttl: int = 600
+    # Lifetime (seconds) of refresh tokens; each refresh rotates the token and restarts it
+    refresh_token_ttl: int = 30 * 24 * 3600
+
+    # Where clients, codes and tokens are kept: "memory", or "sqlite" databases under token_store_path
+    token_store: str = "memory"
+    token_store_path: str = "auth_store"
+    token_store_shards: int = 16
+    # How often buffered token store writes are flushed
+    token_store_flush_interval: float = 0.05
+
+    # Memory caps of the in-memory stores; the oldest entries are evicted first
+    max_clients: int = 100_000
+    max_auth_codes: int = 100_000
+    max_tokens: int = 1_000_000
+    max_pending_logins: int = 100_000
+
+    # How often expired entries are swept from the stores
+    sweep_interval: float = 30.0
+
 
 class SimpleOAuthProvider(OAuthAuthorizationServerProvider[AuthorizationCode, RefreshToken, AccessToken]):
     """
@@ -54,26 +88,68 @@ class SimpleOAuthProvider(OAuthAuthorizationServerProvider[AuthorizationCode, Re
     1. Providing a simple login form for demo credentials
     2. Issuing MCP tokens after successful authentication
     3. Maintaining token state for introspection
+
+    With a token signer, access tokens are signed JWTs that Resource Servers can verify
+    without introspection. They are still stored, so introspection and revocation work too.
+
+    Refresh tokens are rotated on every use. All refresh tokens rotated from one authorization
+    form a family; presenting a token that was already rotated means it leaked (or the client
+    replayed it), so the whole family and its access tokens are revoked.
+
+    Clients, codes and tokens live in a TokenStore (in memory, or persistent in SQLite).
+    Pending logins and user data live in ExpiringStores: they expire with their lifetime,
+    are evicted by sweep_expired() and are capped in size.
     """
 
-    def __init__(self, settings: SimpleAuthSettings, auth_callback_url: str, server_url: str):
+    def __init__(
+        self,
+        settings: SimpleAuthSettings,
+        auth_callback_url: str,
+        server_url: str,
+        token_signer: JWTSigner | None = None,
+        store: TokenStore | None = None,
+    ):
         self.settings = settings
+        self.token_signer = token_signer
         self.auth_callback_url = auth_callback_url
         self.server_url = server_url
-        self.clients: dict[str, OAuthClientInformationFull] = {}
-        self.auth_codes: dict[str, AuthorizationCode] = {}
-        self.tokens: dict[str, AccessToken] = {}
-        self.state_mapping: dict[str, dict[str, str | None]] = {}
-        # Store authenticated user information
-        self.user_data: dict[str, dict[str, Any]] = {}
+        self.store = store or create_token_store(
+            settings.token_store,
+            settings.token_store_path,
+            shards=settings.token_store_shards,
+            max_clients=settings.max_clients,
+            max_auth_codes=settings.max_auth_codes,
+            max_tokens=settings.max_tokens,
+        )
+        # Abandoned logins expire instead of accumulating
+        self.state_mapping: ExpiringStore[str, dict[str, str | None]] = ExpiringStore(
+            "state_mapping", default_ttl=settings.login_state_ttl, max_entries=settings.max_pending_logins
+        )
+        # Store authenticated user information, for as long as the tokens live
+        self.user_data: ExpiringStore[str, dict[str, Any]] = ExpiringStore(
+            "user_data", default_ttl=settings.access_token_ttl, max_entries=settings.max_tokens
+        )
+
+    @property
+    def stores(self) -> list[ExpiringStore]:
+        """The in-memory stores besides the token store."""
+        return [self.state_mapping, self.user_data]
+
+    def sweep_expired(self) -> int:
+        """Evict the expired entries of all stores."""
+        return self.store.sweep_expired() + sum(store.sweep() for store in self.stores)
+
+    def store_stats(self) -> dict[str, dict[str, Any]]:
+        """Entry counts per store."""
+        return {**self.store.stats(), **{store.name: asdict(store.stats()) for store in self.stores}}
 
     async def get_client(self, client_id: str) -> OAuthClientInformationFull | None:
         """Get OAuth client information."""
-        return self.clients.get(client_id)
+        return self.store.get_client(client_id)
 
     async def register_client(self, client_info: OAuthClientInformationFull):
         """Register a new OAuth client."""
-        self.clients[client_info.client_id] = client_info
+        self.store.put_client(client_info)
 
     async def authorize(self, client: OAuthClientInformationFull, params: AuthorizationParams) -> str:
         """Generate an authorization URL for simple login flow."""
@@ -180,12 +256,12 @@ class SimpleOAuthProvider(OAuthAuthorizationServerProvider[AuthorizationCode, Re
             client_id=client_id,
             redirect_uri=AnyHttpUrl(redirect_uri),
             redirect_uri_provided_explicitly=redirect_uri_provided_explicitly,
-            expires_at=time.time() + 300,
+            expires_at=time.time() + self.settings.auth_code_ttl,
             scopes=[self.settings.mcp_scope],
             code_challenge=code_challenge,
             resource=resource,  # RFC 8707
         )
-        self.auth_codes[new_code] = auth_code
+        self.store.put_code(auth_code)
 
         # Store user data
         self.user_data[username] = {
@@ -201,59 +277,101 @@ class SimpleOAuthProvider(OAuthAuthorizationServerProvider[AuthorizationCode, Re
         self, client: OAuthClientInformationFull, authorization_code: str
     ) -> AuthorizationCode | None:
         """Load an authorization code."""
-        return self.auth_codes.get(authorization_code)
+        return self.store.get_code(authorization_code)
 
     async def exchange_authorization_code(
         self, client: OAuthClientInformationFull, authorization_code: AuthorizationCode
     ) -> OAuthToken:
         """Exchange authorization code for tokens."""
-        if authorization_code.code not in self.auth_codes:
+        if self.store.get_code(authorization_code.code) is None:
             raise ValueError("Invalid authorization code")
 
+        self.store.delete_code(authorization_code.code)
+        return self._issue_tokens(
+            client.client_id,
+            authorization_code.scopes,
+            authorization_code.resource,  # RFC 8707
+            family_id=secrets.token_hex(16),
+        )
+
+    def _issue_tokens(
+        self, client_id: str, scopes: list[str], resource: str | list[str] | None, family_id: str
+    ) -> OAuthToken:
+        """Issue an access token and a refresh token of the given family."""
+        expires_in = self.settings.access_token_ttl
+        expires_at = int(time.time()) + expires_in
+
         # Generate MCP access token
-        mcp_token = f"mcp_{secrets.token_hex(32)}"
+        if self.token_signer:
+            mcp_token = self.token_signer.issue(
+                client_id=client_id,
+                scopes=scopes,
+                expires_in=expires_in,
+                audience=resource,  # RFC 8707
+                subject=self.settings.demo_username,
+            )
+        else:
+            mcp_token = f"mcp_{secrets.token_hex(32)}"
 
         # Store MCP token
-        self.tokens[mcp_token] = AccessToken(
-            token=mcp_token,
-            client_id=client.client_id,
-            scopes=authorization_code.scopes,
-            expires_at=int(time.time()) + 3600,
-            resource=authorization_code.resource,  # RFC 8707
+        self.store.put_token(
+            AccessToken(
+                token=mcp_token,
+                client_id=client_id,
+                scopes=scopes,
+                expires_at=expires_at,
+                resource=resource,  # RFC 8707
+            )
         )
 
         # Store user data mapping for this token
-        self.user_data[mcp_token] = {
-            "username": self.settings.demo_username,
-            "user_id": f"user_{secrets.token_hex(8)}",
-            "authenticated_at": time.time(),
-        }
+        self.user_data.set(
+            mcp_token,
+            {
+                "username": self.settings.demo_username,
+                "user_id": f"user_{secrets.token_hex(8)}",
+                "authenticated_at": time.time(),
+            },
+            expires_at=expires_at,
+        )
 
-        del self.auth_codes[authorization_code.code]
+        refresh_token = f"mcp_rt_{secrets.token_hex(32)}"
+        self.store.put_refresh_token(
+            RefreshTokenRecord(
+                refresh_token=RefreshToken(
+                    token=refresh_token,
+                    client_id=client_id,
+                    scopes=scopes,
+                    expires_at=int(time.time()) + self.settings.refresh_token_ttl,
+                ),
+                family_id=family_id,
+                access_token_hash=token_hash(mcp_token),
+                resource=resource,
+            )
+        )
 
         return OAuthToken(
             access_token=mcp_token,
             token_type="Bearer",
-            expires_in=3600,
-            scope=" ".join(authorization_code.scopes),
+            expires_in=expires_in,
+            scope=" ".join(scopes),
+            refresh_token=refresh_token,
         )
 
     async def load_access_token(self, token: str) -> AccessToken | None:
         """Load and validate an access token."""
-        access_token = self.tokens.get(token)
-        if not access_token:
-            return None
-
-        # Check if expired
-        if access_token.expires_at and access_token.expires_at < time.time():
-            del self.tokens[token]
-            return None
-
-        return access_token
+        # Expired tokens are not returned by the store
+        return self.store.get_token(token)
 
     async def load_refresh_token(self, client: OAuthClientInformationFull, refresh_token: str) -> RefreshToken | None:
-        """Load a refresh token - not supported in this example."""
-        return None
+        """Load a refresh token, revoking its family if it was already rotated."""
+        record = self.store.get_refresh_token(refresh_token)
+        if record is None or record.refresh_token.client_id != client.client_id:
+            return None
+        if record.rotated_at is not None:
+            await self._revoke_reused(record)
+            return None
+        return record.refresh_token
 
     async def exchange_refresh_token(
         self,
@@ -261,11 +379,35 @@ class SimpleOAuthProvider(OAuthAuthorizationServerProvider[AuthorizationCode, Re
         refresh_token: RefreshToken,
         scopes: list[str],
     ) -> OAuthToken:
-        """Exchange refresh token - not supported in this example."""
-        raise NotImplementedError("Refresh tokens not supported")
+        """Rotate a refresh token: mark it used and issue a new token pair in its family."""
+        record = self.store.get_refresh_token(refresh_token.token)
+        if record is None:
+            raise TokenError("invalid_grant", "refresh token does not exist")
+        if record.rotated_at is not None:
+            # Another request rotated it since it was loaded
+            await self._revoke_reused(record)
+            raise TokenError("invalid_grant", "refresh token was already used")
+
+        record.rotated_at = time.time()
+        self.store.put_refresh_token(record)
+        # The token endpoint has checked that requested scopes are a subset of the token's
+        return self._issue_tokens(
+            client.client_id, scopes or refresh_token.scopes, record.resource, family_id=record.family_id
+        )
+
+    async def _revoke_reused(self, record: RefreshTokenRecord) -> None:
+        revoked = await call_store(self.store, self.store.revoke_refresh_family, record.family_id)
+        logger.warning(
+            f"Reuse of a rotated refresh token of client {record.refresh_token.client_id}; "
+            f"revoked its family ({revoked} refresh tokens and their access tokens)"
+        )
 
     # TODO(Marcelo): The type hint is wrong. We need to fix, and test to check if it works.
     async def revoke_token(self, token: str, token_type_hint: str | None = None) -> None:  # type: ignore
-        """Revoke a token."""
-        if token in self.tokens:
-            del self.tokens[token]
\ No newline at end of file
+        """Revoke a token; revoking a refresh token revokes its whole family."""
+        record = self.store.get_refresh_token(token)
+        if record is not None:
+            await call_store(self.store, self.store.revoke_refresh_family, record.family_id)
+            return
+        self.store.delete_token(token)
+        self.user_data.pop(token)
\ No newline at end of file
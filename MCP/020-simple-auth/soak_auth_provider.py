@@ -0,0 +1,136 @@
+"""
+Soak test of SimpleOAuthProvider's memory use over many login flows.
+
+Drives the provider directly (no HTTP): each flow authorizes, logs in, exchanges the code
+for a token and loads the token once. Every --abandon-every'th flow stops after authorize,
+like a user closing the login page. Lifetimes are short so that entries expire during the
+run, and the background sweeper from the Authorization Server evicts them. RSS and store
+sizes are printed periodically and should level off once the first tokens expire.
+
+    python soak_auth_provider.py --flows 2000000
+    python soak_auth_provider.py --flows 500000 --no-sweep   # for comparison
+"""
+
+import asyncio
+import contextlib
+import resource
+import secrets
+import time
+from urllib.parse import parse_qs, urlparse
+
+import click
+from pydantic import AnyUrl
+
+from mcp.server.auth.provider import AuthorizationParams
+from mcp.shared.auth import OAuthClientInformationFull
+
+from expiring_store import sweep_periodically
+from simple_auth_provider import SimpleAuthSettings, SimpleOAuthProvider
+from token_store import MemoryTokenStore
+
+REDIRECT_URI = "http://localhost:3030/callback"
+
+
+def rss_mb() -> float:
+    """Current resident set size in MB (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def login_flow(provider: SimpleOAuthProvider, client: OAuthClientInformationFull, abandon: bool) -> None:
+    state = secrets.token_hex(16)
+    await provider.authorize(
+        client,
+        AuthorizationParams(
+            state=state,
+            scopes=["user"],
+            code_challenge=secrets.token_urlsafe(32),
+            redirect_uri=AnyUrl(REDIRECT_URI),
+            redirect_uri_provided_explicitly=True,
+            resource="http://localhost:8001",
+        ),
+    )
+    if abandon:
+        return
+
+    redirect = await provider.handle_simple_callback("demo_user", "demo_password", state)
+    code = parse_qs(urlparse(redirect).query)["code"][0]
+    authorization_code = await provider.load_authorization_code(client, code)
+    assert authorization_code is not None
+    token = await provider.exchange_authorization_code(client, authorization_code)
+    assert await provider.load_access_token(token.access_token) is not None
+
+
+async def soak(flows: int, ttl: int, abandon_every: int, report_every: int, sweep: bool) -> None:
+    settings = SimpleAuthSettings(
+        access_token_ttl=ttl,
+        auth_code_ttl=ttl,
+        login_state_ttl=ttl,
+        refresh_token_ttl=ttl,
+        sweep_interval=1.0,
+    )
+    store = MemoryTokenStore()
+    provider = SimpleOAuthProvider(settings, "http://localhost:9000/login", "http://localhost:9000", store=store)
+    client = OAuthClientInformationFull(
+        client_id="soak-test",
+        client_secret=secrets.token_hex(16),
+        redirect_uris=[AnyUrl(REDIRECT_URI)],
+        grant_types=["authorization_code", "refresh_token"],
+        response_types=["code"],
+        token_endpoint_auth_method="client_secret_post",
+        scope="user",
+    )
+    await provider.register_client(client)
+
+    sweeper = None
+    if sweep:
+        sweeper = asyncio.create_task(
+            sweep_periodically(
+                [*provider.stores, store.auth_codes, store.tokens, store.refresh_tokens, store.refresh_families],
+                settings.sweep_interval,
+            )
+        )
+    print(f"{'flows':>10} {'flows/s':>8} {'rss MB':>8} {'tokens':>9} {'states':>8} {'codes':>7} {'user_data':>9}")
+    start = last = time.perf_counter()
+    try:
+        for i in range(1, flows + 1):
+            await login_flow(provider, client, abandon=abandon_every > 0 and i % abandon_every == 0)
+            if i % 1000 == 0:
+                await asyncio.sleep(0)  # Let the sweeper run
+            if i % report_every == 0:
+                now = time.perf_counter()
+                print(
+                    f"{i:>10} {report_every / (now - last):>8.0f} {rss_mb():>8.1f} {len(store.tokens):>9} "
+                    f"{len(provider.state_mapping):>8} {len(store.auth_codes):>7} {len(provider.user_data):>9}"
+                )
+                last = now
+    finally:
+        if sweeper:
+            sweeper.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await sweeper
+
+    print(f"{flows} flows in {time.perf_counter() - start:.1f}s")
+    for name, stats in provider.store_stats().items():
+        print(f"  {name}: {stats}")
+
+
+@click.command()
+@click.option("--flows", default=2_000_000, help="Number of login flows")
+@click.option("--ttl", default=5, help="Lifetime (seconds) of tokens, refresh tokens, codes and pending logins")
+@click.option("--abandon-every", default=10, help="Abandon every n-th login after authorize (0: never)")
+@click.option("--report-every", default=100_000, help="Print memory and store sizes every n flows")
+@click.option("--no-sweep", is_flag=True, help="Do not run the background sweeper")
+def main(flows: int, ttl: int, abandon_every: int, report_every: int, no_sweep: bool) -> None:
+    """Run many login flows against SimpleOAuthProvider and watch memory."""
+    asyncio.run(soak(flows, ttl, abandon_every, report_every, sweep=not no_sweep))
+
+
+if __name__ == "__main__":
+    main()  # type: ignore[call-arg]
@@ -0,0 +1,579 @@
+"""
+Storage of OAuth clients, authorization codes, access tokens and refresh tokens for the
+Authorization Server.
+
+Two implementations behind the TokenStore interface:
+
+- MemoryTokenStore: ExpiringStores in process memory (lost on restart).
+- SQLiteTokenStore: SQLite databases in WAL mode, so issued tokens survive a restart.
+  Tokens are sharded over several database files by the prefix of the token's SHA-256
+  hash, and looked up by primary key. Writes are buffered and inserted in batches (one
+  transaction per shard) by flush(); lookups see buffered writes immediately.
+
+Tokens are stored under their hashes. Refresh tokens are indexed by family (all tokens
+rotated from one authorization), so that a whole family and the access tokens issued with
+it can be revoked at once when reuse of a rotated refresh token is detected.
+
+NOTE: this is a simplified example for demonstration purposes.
+This is not a production-ready implementation.
+"""
+
+import asyncio
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, TypeVar
+
+from mcp.server.auth.provider import AccessToken, AuthorizationCode, RefreshToken
+from mcp.shared.auth import OAuthClientInformationFull
+
+from expiring_store import ExpiringStore
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def token_hash(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+@dataclass
+class RefreshTokenRecord:
+    """A refresh token with its family and rotation state."""
+
+    refresh_token: RefreshToken
+    # Shared by all refresh tokens rotated from the same authorization
+    family_id: str
+    # Hash of the access token issued together with this refresh token
+    access_token_hash: str
+    resource: str | list[str] | None = None  # RFC 8707
+    # Set once the token has been exchanged; presenting it again is reuse
+    rotated_at: float | None = None
+
+
+class TokenStore(ABC):
+    """Clients, authorization codes and access tokens of the Authorization Server.
+
+    Methods are synchronous: lookups are in-process and take microseconds.
+    Expired codes and tokens are never returned.
+    """
+
+    # Whether flush(), sweep_expired() and revoke_refresh_family() do disk I/O, and should
+    # run in a worker thread (see call_store)
+    blocking_io = False
+    # Called, from any thread, when enough writes are buffered that they should be flushed
+    # now. Set by maintain_token_store; without it, the store flushes them itself.
+    on_flush_needed: Callable[[], None] | None = None
+
+    @abstractmethod
+    def get_client(self, client_id: str) -> OAuthClientInformationFull | None: ...
+
+    @abstractmethod
+    def put_client(self, client: OAuthClientInformationFull) -> None: ...
+
+    @abstractmethod
+    def get_code(self, code: str) -> AuthorizationCode | None: ...
+
+    @abstractmethod
+    def put_code(self, code: AuthorizationCode) -> None: ...
+
+    @abstractmethod
+    def delete_code(self, code: str) -> None: ...
+
+    @abstractmethod
+    def get_token(self, token: str) -> AccessToken | None: ...
+
+    @abstractmethod
+    def put_token(self, access_token: AccessToken) -> None: ...
+
+    @abstractmethod
+    def delete_token(self, token: str) -> None: ...
+
+    @abstractmethod
+    def get_refresh_token(self, token: str) -> RefreshTokenRecord | None: ...
+
+    @abstractmethod
+    def put_refresh_token(self, record: RefreshTokenRecord) -> None:
+        """Store a new refresh token, or update one (e.g. to mark it rotated)."""
+
+    @abstractmethod
+    def revoke_refresh_family(self, family_id: str) -> int:
+        """Delete the refresh tokens of a family and the access tokens issued with them.
+
+        Returns:
+            The number of refresh tokens deleted.
+        """
+
+    def flush(self) -> None:
+        """Write buffered changes."""
+
+    @abstractmethod
+    def sweep_expired(self) -> int:
+        """Delete expired codes and tokens; returns how many were deleted."""
+
+    @abstractmethod
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """Entry counts per kind of entry."""
+
+    def close(self) -> None:
+        self.flush()
+
+
+class MemoryTokenStore(TokenStore):
+    """Token store in process memory, with expiring and size-capped stores."""
+
+    def __init__(self, max_clients: int | None = None, max_auth_codes: int | None = None, max_tokens: int | None = None):
+        self.clients: ExpiringStore[str, OAuthClientInformationFull] = ExpiringStore("clients", max_entries=max_clients)
+        self.auth_codes: ExpiringStore[str, AuthorizationCode] = ExpiringStore("auth_codes", max_entries=max_auth_codes)
+        # Keyed by token hash, like the refresh token records refer to them
+        self.tokens: ExpiringStore[str, AccessToken] = ExpiringStore("tokens", max_entries=max_tokens)
+        self.refresh_tokens: ExpiringStore[str, RefreshTokenRecord] = ExpiringStore(
+            "refresh_tokens", max_entries=max_tokens
+        )
+        # Family id -> hashes of its refresh tokens, expiring with the family's newest token
+        self.refresh_families: ExpiringStore[str, set[str]] = ExpiringStore("refresh_families", max_entries=max_tokens)
+
+    def get_client(self, client_id: str) -> OAuthClientInformationFull | None:
+        return self.clients.get(client_id)
+
+    def put_client(self, client: OAuthClientInformationFull) -> None:
+        self.clients[client.client_id] = client
+
+    def get_code(self, code: str) -> AuthorizationCode | None:
+        return self.auth_codes.get(code)
+
+    def put_code(self, code: AuthorizationCode) -> None:
+        self.auth_codes.set(code.code, code, expires_at=code.expires_at)
+
+    def delete_code(self, code: str) -> None:
+        self.auth_codes.pop(code)
+
+    def get_token(self, token: str) -> AccessToken | None:
+        return self.tokens.get(token_hash(token))
+
+    def put_token(self, access_token: AccessToken) -> None:
+        self.tokens.set(token_hash(access_token.token), access_token, expires_at=access_token.expires_at)
+
+    def delete_token(self, token: str) -> None:
+        self.tokens.pop(token_hash(token))
+
+    def get_refresh_token(self, token: str) -> RefreshTokenRecord | None:
+        return self.refresh_tokens.get(token_hash(token))
+
+    def put_refresh_token(self, record: RefreshTokenRecord) -> None:
+        key = token_hash(record.refresh_token.token)
+        expires_at = record.refresh_token.expires_at
+        self.refresh_tokens.set(key, record, expires_at=expires_at)
+        family = self.refresh_families.get(record.family_id)
+        if family is None:
+            family = set()
+        family.add(key)
+        if record.rotated_at is None:
+            # A new token is the family's newest
+            self.refresh_families.set(record.family_id, family, expires_at=expires_at)
+
+    def revoke_refresh_family(self, family_id: str) -> int:
+        revoked = 0
+        for key in self.refresh_families.pop(family_id) or ():
+            record = self.refresh_tokens.pop(key)
+            if record is not None:
+                self.tokens.pop(record.access_token_hash)
+                revoked += 1
+        return revoked
+
+    def sweep_expired(self) -> int:
+        return sum(
+            store.sweep() for store in (self.auth_codes, self.tokens, self.refresh_tokens, self.refresh_families)
+        )
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        stores = (self.clients, self.auth_codes, self.tokens, self.refresh_tokens, self.refresh_families)
+        return {store.name: asdict(store.stats()) for store in stores}
+
+
+# Pending write of a row: (data, expires_at), or None for a delete
+_PendingRow = tuple[str, float | None] | None
+
+
+@dataclass
+class _WriteBuffer:
+    """Writes buffered for the next flush."""
+
+    clients: dict[str, str]
+    codes: dict[str, _PendingRow]
+    # token hash -> (family id, data, expires_at), or None for a delete
+    refresh: dict[str, tuple[str, str, float | None] | None]
+    # One dict per token shard
+    tokens: list[dict[str, _PendingRow]]
+
+    @classmethod
+    def empty(cls, shards: int) -> "_WriteBuffer":
+        return cls({}, {}, {}, [{} for _ in range(shards)])
+
+    def __len__(self) -> int:
+        return len(self.clients) + len(self.codes) + len(self.refresh) + sum(map(len, self.tokens))
+
+    def restore(self, failed: "_WriteBuffer") -> None:
+        """Buffer the writes of a failed flush again, unless they were overwritten since."""
+        for mine, theirs in (
+            (self.clients, failed.clients),
+            (self.codes, failed.codes),
+            (self.refresh, failed.refresh),
+            *zip(self.tokens, failed.tokens),
+        ):
+            for key, row in theirs.items():
+                mine.setdefault(key, row)
+
+
+class SQLiteTokenStore(TokenStore):
+    """Token store in SQLite databases (WAL mode) under a directory.
+
+    auth.db holds clients and authorization codes; tokens-NN.db are the token shards.
+    Writes are buffered until flush(), which runs every flush interval in the Authorization
+    Server, and as soon as batch_size writes are pending (the write that fills the batch
+    calls on_flush_needed). Writes buffered when the process dies are lost (their clients
+    have to log in again).
+
+    flush(), sweep_expired() and revoke_refresh_family() write through connections of their
+    own, so the Authorization Server runs them in a worker thread. Writes being flushed stay visible to lookups until
+    they are committed, and are buffered again if their transaction fails.
+    """
+
+    blocking_io = True
+
+    def __init__(self, path: str, shards: int = 16, batch_size: int = 1000):
+        if not 1 <= shards <= 256:
+            raise ValueError("shards must be between 1 and 256")
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.batch_size = batch_size
+        self._main = self._connect(os.path.join(path, "auth.db"))
+        self._main.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS clients (client_id TEXT PRIMARY KEY, data TEXT NOT NULL) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS codes (
+                code_hash TEXT PRIMARY KEY, data TEXT NOT NULL, expires_at REAL
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS codes_expires_at ON codes (expires_at);
+            CREATE TABLE IF NOT EXISTS refresh_tokens (
+                token_hash TEXT PRIMARY KEY, family_id TEXT NOT NULL, data TEXT NOT NULL, expires_at REAL
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS refresh_tokens_family_id ON refresh_tokens (family_id);
+            CREATE INDEX IF NOT EXISTS refresh_tokens_expires_at ON refresh_tokens (expires_at);
+            """
+        )
+        self._shards = [self._connect(os.path.join(path, f"tokens-{i:02x}.db")) for i in range(shards)]
+        for db in self._shards:
+            db.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS tokens (
+                    token_hash TEXT PRIMARY KEY, data TEXT NOT NULL, expires_at REAL
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS tokens_expires_at ON tokens (expires_at);
+                """
+            )
+        # Lookups use the connections above; flush() and sweep_expired() use these.
+        self._main_writer = self._connect(os.path.join(path, "auth.db"))
+        self._shard_writers = [self._connect(os.path.join(path, f"tokens-{i:02x}.db")) for i in range(shards)]
+        # Guards the buffers; held only to read or swap them, never during I/O
+        self._lock = threading.Lock()
+        # One flush or sweep at a time
+        self._write_lock = threading.Lock()
+        self._pending = _WriteBuffer.empty(shards)
+        # The writes of the flush in progress, until they are committed
+        self._flushing: _WriteBuffer | None = None
+        self._pending_count = 0
+
+    @staticmethod
+    def _connect(path: str) -> sqlite3.Connection:
+        db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    def _shard(self, key_hash: str) -> int:
+        return int(key_hash[:2], 16) % len(self._shards)
+
+    def _buffer(self, write: Callable[[_WriteBuffer], None], count: int = 1) -> None:
+        with self._lock:
+            write(self._pending)
+            self._pending_count += count
+            full = self._pending_count >= self.batch_size
+        if full:
+            if self.on_flush_needed is not None:
+                self.on_flush_needed()
+            else:
+                self.flush()
+
+    def _buffered(self, rows: Callable[[_WriteBuffer], dict], key: str) -> tuple[bool, Any]:
+        """Look a key up in the pending writes, then in the writes being flushed."""
+        with self._lock:
+            for buffer in (self._pending, self._flushing):
+                if buffer is not None and key in rows(buffer):
+                    return True, rows(buffer)[key]
+        return False, None
+
+    @staticmethod
+    def _live(row: _PendingRow | tuple[str, float | None] | None) -> str | None:
+        if row is None:
+            return None
+        data, expires_at = row
+        if expires_at is not None and expires_at <= time.time():
+            return None
+        return data
+
+    # Clients
+
+    def get_client(self, client_id: str) -> OAuthClientInformationFull | None:
+        _, data = self._buffered(lambda b: b.clients, client_id)
+        if data is None:
+            row = self._main.execute("SELECT data FROM clients WHERE client_id = ?", (client_id,)).fetchone()
+            data = row[0] if row else None
+        return OAuthClientInformationFull.model_validate_json(data) if data else None
+
+    def put_client(self, client: OAuthClientInformationFull) -> None:
+        data = client.model_dump_json()
+        self._buffer(lambda b: b.clients.__setitem__(client.client_id, data))
+
+    # Authorization codes
+
+    def get_code(self, code: str) -> AuthorizationCode | None:
+        key = token_hash(code)
+        found, row = self._buffered(lambda b: b.codes, key)
+        if found:
+            data = self._live(row)
+        else:
+            data = self._live(
+                self._main.execute("SELECT data, expires_at FROM codes WHERE code_hash = ?", (key,)).fetchone()
+            )
+        return AuthorizationCode(code=code, **json.loads(data)) if data else None
+
+    def put_code(self, code: AuthorizationCode) -> None:
+        row = (code.model_dump_json(exclude={"code"}), code.expires_at)
+        self._buffer(lambda b: b.codes.__setitem__(token_hash(code.code), row))
+
+    def delete_code(self, code: str) -> None:
+        self._buffer(lambda b: b.codes.__setitem__(token_hash(code), None))
+
+    # Access tokens
+
+    def get_token(self, token: str) -> AccessToken | None:
+        key = token_hash(token)
+        shard = self._shard(key)
+        found, row = self._buffered(lambda b: b.tokens[shard], key)
+        if found:
+            data = self._live(row)
+        else:
+            data = self._live(
+                self._shards[shard]
+                .execute("SELECT data, expires_at FROM tokens WHERE token_hash = ?", (key,))
+                .fetchone()
+            )
+        return AccessToken(token=token, **json.loads(data)) if data else None
+
+    def put_token(self, access_token: AccessToken) -> None:
+        key = token_hash(access_token.token)
+        row = (access_token.model_dump_json(exclude={"token"}), access_token.expires_at)
+        self._buffer(lambda b: b.tokens[self._shard(key)].__setitem__(key, row))
+
+    def delete_token(self, token: str) -> None:
+        key = token_hash(token)
+        self._buffer(lambda b: b.tokens[self._shard(key)].__setitem__(key, None))
+
+    # Refresh tokens
+
+    def get_refresh_token(self, token: str) -> RefreshTokenRecord | None:
+        key = token_hash(token)
+        found, pending = self._buffered(lambda b: b.refresh, key)
+        if found:
+            data = self._live(pending[1:] if pending else None)
+        else:
+            row = self._main.execute("SELECT data, expires_at FROM refresh_tokens WHERE token_hash = ?", (key,))
+            data = self._live(row.fetchone())
+        if not data:
+            return None
+        fields = json.loads(data)
+        return RefreshTokenRecord(
+            refresh_token=RefreshToken(token=token, **fields.pop("refresh_token")),
+            **fields,
+        )
+
+    def put_refresh_token(self, record: RefreshTokenRecord) -> None:
+        data = json.dumps(
+            {
+                "refresh_token": record.refresh_token.model_dump(mode="json", exclude={"token"}),
+                "family_id": record.family_id,
+                "access_token_hash": record.access_token_hash,
+                "resource": record.resource,
+                "rotated_at": record.rotated_at,
+            }
+        )
+        key = token_hash(record.refresh_token.token)
+        row = (record.family_id, data, record.refresh_token.expires_at)
+        self._buffer(lambda b: b.refresh.__setitem__(key, row))
+
+    def revoke_refresh_family(self, family_id: str) -> int:
+        self.flush()
+        rows = self._main.execute(
+            "SELECT token_hash, data FROM refresh_tokens WHERE family_id = ?", (family_id,)
+        ).fetchall()
+
+        def revoke(buffer: _WriteBuffer) -> None:
+            for key, data in rows:
+                buffer.refresh[key] = None
+                access_token_hash = json.loads(data)["access_token_hash"]
+                buffer.tokens[self._shard(access_token_hash)][access_token_hash] = None
+
+        self._buffer(revoke, count=2 * len(rows))
+        self.flush()
+        return len(rows)
+
+    # Maintenance
+
+    @staticmethod
+    def _write(db: sqlite3.Connection, table: str, key_column: str, rows: dict[str, _PendingRow]) -> None:
+        upserts = [(key, row[0], row[1]) for key, row in rows.items() if row is not None]
+        deletes = [(key,) for key, row in rows.items() if row is None]
+        db.execute("BEGIN")
+        try:
+            if upserts:
+                db.executemany(f"INSERT OR REPLACE INTO {table} VALUES (?, ?, ?)", upserts)
+            if deletes:
+                db.executemany(f"DELETE FROM {table} WHERE {key_column} = ?", deletes)
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+    def _write_main(self, buffer: _WriteBuffer) -> None:
+        db = self._main_writer
+        db.execute("BEGIN")
+        try:
+            db.executemany("INSERT OR REPLACE INTO clients VALUES (?, ?)", list(buffer.clients.items()))
+            db.executemany(
+                "INSERT OR REPLACE INTO refresh_tokens VALUES (?, ?, ?, ?)",
+                [(key, *row) for key, row in buffer.refresh.items() if row is not None],
+            )
+            db.executemany(
+                "DELETE FROM refresh_tokens WHERE token_hash = ?",
+                [(key,) for key, row in buffer.refresh.items() if row is None],
+            )
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        self._write(db, "codes", "code_hash", buffer.codes)
+
+    def flush(self) -> None:
+        """Write the buffered changes, in one transaction per database.
+
+        Writes to a database whose transaction fails are buffered again, and the first error
+        is raised once the other databases have been written.
+        """
+        with self._write_lock:
+            with self._lock:
+                if not self._pending_count:
+                    return
+                buffer, self._flushing = self._pending, self._pending
+                self._pending = _WriteBuffer.empty(len(self._shards))
+                self._pending_count = 0
+            failed = _WriteBuffer.empty(len(self._shards))
+            error: BaseException | None = None
+            if buffer.clients or buffer.codes or buffer.refresh:
+                try:
+                    self._write_main(buffer)
+                except BaseException as e:
+                    error = e
+                    failed.clients, failed.codes, failed.refresh = buffer.clients, buffer.codes, buffer.refresh
+            for shard, rows in enumerate(buffer.tokens):
+                if not rows:
+                    continue
+                try:
+                    self._write(self._shard_writers[shard], "tokens", "token_hash", rows)
+                except BaseException as e:
+                    error = error or e
+                    failed.tokens[shard] = rows
+            with self._lock:
+                self._flushing = None
+                if error is not None:
+                    self._pending.restore(failed)
+                    self._pending_count = len(self._pending)
+            if error is not None:
+                raise error
+
+    def sweep_expired(self) -> int:
+        now = time.time()
+        with self._write_lock:
+            deleted = self._main_writer.execute("DELETE FROM codes WHERE expires_at <= ?", (now,)).rowcount
+            deleted += self._main_writer.execute("DELETE FROM refresh_tokens WHERE expires_at <= ?", (now,)).rowcount
+            for db in self._shard_writers:
+                deleted += db.execute("DELETE FROM tokens WHERE expires_at <= ?", (now,)).rowcount
+        return deleted
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        tokens = [db.execute("SELECT COUNT(*) FROM tokens").fetchone()[0] for db in self._shards]
+        return {
+            "clients": {"stored": self._main.execute("SELECT COUNT(*) FROM clients").fetchone()[0]},
+            "auth_codes": {"stored": self._main.execute("SELECT COUNT(*) FROM codes").fetchone()[0]},
+            "refresh_tokens": {"stored": self._main.execute("SELECT COUNT(*) FROM refresh_tokens").fetchone()[0]},
+            "tokens": {"stored": sum(tokens), "shards": len(tokens), "largest_shard": max(tokens)},
+            "pending_writes": {"count": self._pending_count},
+        }
+
+    def close(self) -> None:
+        self.flush()
+        with self._write_lock:
+            for db in (self._main, *self._shards, self._main_writer, *self._shard_writers):
+                db.close()
+
+
+def create_token_store(kind: str, path: str | None = None, shards: int = 16, **memory_caps: int | None) -> TokenStore:
+    """Create a token store: "memory" or "sqlite" (under path)."""
+    if kind == "sqlite":
+        if not path:
+            raise ValueError("The SQLite token store needs a path")
+        return SQLiteTokenStore(path, shards=shards)
+    if kind == "memory":
+        return MemoryTokenStore(**memory_caps)
+    raise ValueError(f"Unknown token store: {kind}")
+
+
+async def call_store(store: TokenStore, fn: Callable[..., T], *args: Any) -> T:
+    """Call a method of the store in a worker thread if the store does disk I/O, otherwise directly."""
+    return await asyncio.to_thread(fn, *args) if store.blocking_io else fn(*args)
+
+
+async def maintain_token_store(store: TokenStore, flush_interval: float = 0.05, sweep_interval: float = 30.0) -> None:
+    """Flush buffered writes every flush_interval and sweep expired entries every sweep_interval, until cancelled.
+
+    A store that has a full batch of writes pending is flushed right away. Stores that do disk
+    I/O are flushed and swept in a worker thread, off the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    flush_needed = asyncio.Event()
+    store.on_flush_needed = lambda: loop.call_soon_threadsafe(flush_needed.set)
+    last_sweep = time.monotonic()
+    try:
+        while True:
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(flush_needed.wait(), flush_interval)
+            flush_needed.clear()
+            try:
+                await call_store(store, store.flush)
+                if time.monotonic() - last_sweep >= sweep_interval:
+                    last_sweep = time.monotonic()
+                    deleted = await call_store(store, store.sweep_expired)
+                    if deleted:
+                        logger.debug(f"Deleted {deleted} expired codes and tokens")
+            except sqlite3.Error as e:
+                logger.warning(f"Token store maintenance failed: {e}")
+    finally:
+        store.on_flush_needed = None
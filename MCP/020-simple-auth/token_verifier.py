@@ -1,20 +1,64 @@
 """Example token verifier implementation using OAuth 2.0 Token Introspection (RFC 7662)."""
 
+import asyncio
+import hashlib
 import logging
-from typing import Any
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Any
 
 from mcp.server.auth.provider import AccessToken, TokenVerifier
 from mcp.shared.auth_utils import check_resource_allowed, resource_url_from_server_url
 
+if TYPE_CHECKING:
+    import httpx
+
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class IntrospectionCacheStats:
+    """Counters of the introspection result cache."""
+
+    hits: int = 0
+    negative_hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    expired: int = 0
+    evictions: int = 0
+    errors: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.negative_hits + self.misses + self.coalesced
+        return (self.hits + self.negative_hits + self.coalesced) / lookups if lookups else 0.0
+
+
+@dataclass
+class _CacheEntry:
+    access_token: AccessToken | None
+    expires_at: float  # time.monotonic()
+
+
 class IntrospectionTokenVerifier(TokenVerifier):
     """Example token verifier that uses OAuth 2.0 Token Introspection (RFC 7662).
 
+    Introspection results are kept in a bounded LRU cache keyed by the token's hash:
+    valid tokens until min(cache_ttl, token exp), rejected tokens for negative_cache_ttl.
+    Concurrent verifications of the same token share one introspection call. A revoked
+    token can therefore stay accepted for up to cache_ttl seconds.
+
+    Introspection requests share one pooled HTTP client with keep-alive (and optionally
+    HTTP/2), created on first use. Call aclose() when the server shuts down.
+
+    With a batch_introspection_endpoint, introspections that start within batch_window
+    seconds of each other are sent as one request (up to max_batch_size tokens), so a cold
+    cache does not send one request per token. If the Authorization Server does not offer
+    the endpoint, the verifier falls back to single introspection.
+
     This is a simple example implementation for demonstration purposes.
     Production implementations should consider:
-    - Connection pooling and reuse
     - More sophisticated error handling
     - Rate limiting and retry logic
     - Comprehensive configuration options
@@ -25,60 +69,243 @@ class IntrospectionTokenVerifier(TokenVerifier):
         introspection_endpoint: str,
         server_url: str,
         validate_resource: bool = False,
+        cache_ttl: float = 60.0,
+        negative_cache_ttl: float = 10.0,
+        cache_max_entries: int = 10_000,
+        http2: bool = False,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        timeout: float = 10.0,
+        connect_timeout: float = 5.0,
+        batch_introspection_endpoint: str | None = None,
+        batch_window: float = 0.005,
+        max_batch_size: int = 100,
     ):
         self.introspection_endpoint = introspection_endpoint
         self.server_url = server_url
         self.validate_resource = validate_resource
         self.resource_url = resource_url_from_server_url(server_url)
+        self.cache_ttl = cache_ttl
+        self.negative_cache_ttl = negative_cache_ttl
+        self.cache_max_entries = cache_max_entries
+        self.cache_stats = IntrospectionCacheStats()
+        self._cache: OrderedDict[str, _CacheEntry] = OrderedDict()
+        self._inflight: dict[str, asyncio.Task[tuple[AccessToken | None, bool]]] = {}
+        self.http2 = http2
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self._client: "httpx.AsyncClient | None" = None
+        self.batch_introspection_endpoint = batch_introspection_endpoint
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self.batches_sent = 0
+        self._batch: list[tuple[str, asyncio.Future[tuple[AccessToken | None, bool]]]] = []
+        self._batch_timer: asyncio.TimerHandle | None = None
+        self._batch_tasks: set[asyncio.Task[None]] = set()
 
-    async def verify_token(self, token: str) -> AccessToken | None:
-        """Verify token via introspection endpoint."""
+    def _get_client(self) -> "httpx.AsyncClient":
+        """Return the pooled HTTP client, creating it on first use."""
         import httpx
 
+        if self._client is None or self._client.is_closed:
+            # Configure secure HTTP client
+            timeout = httpx.Timeout(self.timeout, connect=self.connect_timeout)
+            limits = httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+                keepalive_expiry=self.keepalive_expiry,
+            )
+            http2 = self.http2
+            if http2:
+                try:
+                    import h2  # noqa: F401
+                except ImportError:
+                    logger.warning("HTTP/2 requested but the h2 package is not installed, using HTTP/1.1")
+                    http2 = False
+            self._client = httpx.AsyncClient(
+                timeout=timeout,
+                limits=limits,
+                http2=http2,
+                verify=True,  # Enforce SSL verification
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        """Close the pooled HTTP client and its connections."""
+        # Send the pending batch and let the batches in flight finish first.
+        self._send_batch()
+        if self._batch_tasks:
+            await asyncio.gather(*self._batch_tasks, return_exceptions=True)
+        if self._client is not None:
+            client, self._client = self._client, None
+            await client.aclose()
+
+    async def verify_token(self, token: str) -> AccessToken | None:
+        """Verify token, from the cache or via the introspection endpoint."""
+        key = hashlib.sha256(token.encode()).hexdigest()
+
+        entry = self._cache.get(key)
+        if entry is not None:
+            if entry.expires_at > time.monotonic():
+                self._cache.move_to_end(key)
+                if entry.access_token is None:
+                    self.cache_stats.negative_hits += 1
+                else:
+                    self.cache_stats.hits += 1
+                return entry.access_token
+            del self._cache[key]
+            self.cache_stats.expired += 1
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.cache_stats.coalesced += 1
+        else:
+            self.cache_stats.misses += 1
+            task = asyncio.create_task(self._introspect_and_cache(key, token))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+        # Shielded so that a cancelled request does not cancel the introspection other requests wait for.
+        access_token, _ = await asyncio.shield(task)
+        return access_token
+
+    async def _introspect_and_cache(self, key: str, token: str) -> tuple[AccessToken | None, bool]:
+        access_token, cacheable = await self._introspect(token)
+        if not cacheable:
+            self.cache_stats.errors += 1
+            return access_token, cacheable
+
+        if access_token is None:
+            ttl = self.negative_cache_ttl
+        else:
+            ttl = self.cache_ttl
+            if access_token.expires_at is not None:
+                ttl = min(ttl, access_token.expires_at - time.time())
+        if ttl > 0:
+            self._cache[key] = _CacheEntry(access_token, time.monotonic() + ttl)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_max_entries:
+                self._cache.popitem(last=False)
+                self.cache_stats.evictions += 1
+        return access_token, cacheable
+
+    def invalidate(self, token: str) -> None:
+        """Drop a token's cached introspection result."""
+        self._cache.pop(hashlib.sha256(token.encode()).hexdigest(), None)
+
+    def cache_snapshot(self) -> dict[str, Any]:
+        """Cache size and counters, e.g. for logging or a metrics endpoint."""
+        return {"entries": len(self._cache), "hit_rate": self.cache_stats.hit_rate, **asdict(self.cache_stats)}
+
+    @staticmethod
+    def _is_safe_endpoint(endpoint: str) -> bool:
         # Validate URL to prevent SSRF attacks
-        if not self.introspection_endpoint.startswith(("https://", "http://localhost", "http://127.0.0.1")):
-            logger.warning(f"Rejecting introspection endpoint with unsafe scheme: {self.introspection_endpoint}")
-            return None
-
-        # Configure secure HTTP client
-        timeout = httpx.Timeout(10.0, connect=5.0)
-        limits = httpx.Limits(max_connections=10, max_keepalive_connections=5)
-
-        async with httpx.AsyncClient(
-            timeout=timeout,
-            limits=limits,
-            verify=True,  # Enforce SSL verification
-        ) as client:
+        if not endpoint.startswith(("https://", "http://localhost", "http://127.0.0.1")):
+            logger.warning(f"Rejecting introspection endpoint with unsafe scheme: {endpoint}")
+            return False
+        return True
+
+    async def _introspect(self, token: str) -> tuple[AccessToken | None, bool]:
+        """Introspect a token, in a batch when a batch endpoint is configured.
+
+        Returns:
+            The access token (None if rejected), and whether the answer may be cached.
+            Transport errors and server errors are not cached.
+        """
+        if self.batch_introspection_endpoint:
+            return await self._introspect_batched(token)
+        return await self._introspect_single(token)
+
+    async def _introspect_batched(self, token: str) -> tuple[AccessToken | None, bool]:
+        future: asyncio.Future[tuple[AccessToken | None, bool]] = asyncio.get_running_loop().create_future()
+        self._batch.append((token, future))
+        if len(self._batch) >= self.max_batch_size:
+            self._send_batch()
+        elif self._batch_timer is None:
+            self._batch_timer = asyncio.get_running_loop().call_later(self.batch_window, self._send_batch)
+        return await future
+
+    def _send_batch(self) -> None:
+        if self._batch_timer is not None:
+            self._batch_timer.cancel()
+            self._batch_timer = None
+        batch, self._batch = self._batch, []
+        if batch:
+            task = asyncio.create_task(self._introspect_batch(batch))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    async def _introspect_batch(self, batch: list[tuple[str, asyncio.Future[tuple[AccessToken | None, bool]]]]):
+        """Introspect the tokens of a batch in one request and resolve their futures."""
+        tokens = [token for token, _ in batch]
+        results: list[tuple[AccessToken | None, bool]] | None = None
+        endpoint = self.batch_introspection_endpoint
+        if endpoint and self._is_safe_endpoint(endpoint):
             try:
-                response = await client.post(
-                    self.introspection_endpoint,
-                    data={"token": token},
-                    headers={"Content-Type": "application/x-www-form-urlencoded"},
-                )
-
-                if response.status_code != 200:
-                    logger.debug(f"Token introspection returned status {response.status_code}")
-                    return None
-
-                data = response.json()
-                if not data.get("active", False):
-                    return None
-
-                # RFC 8707 resource validation (only when --oauth-strict is set)
-                if self.validate_resource and not self._validate_resource(data):
-                    logger.warning(f"Token resource validation failed. Expected: {self.resource_url}")
-                    return None
-
-                return AccessToken(
-                    token=token,
-                    client_id=data.get("client_id", "unknown"),
-                    scopes=data.get("scope", "").split() if data.get("scope") else [],
-                    expires_at=data.get("exp"),
-                    resource=data.get("aud"),  # Include resource in token
-                )
+                response = await self._get_client().post(endpoint, json={"tokens": tokens})
+                if response.status_code in (404, 405):
+                    logger.warning(f"{endpoint} is not available, falling back to single introspection")
+                    self.batch_introspection_endpoint = None
+                elif response.status_code != 200:
+                    logger.debug(f"Batch token introspection returned status {response.status_code}")
+                    results = [(None, False)] * len(batch)
+                else:
+                    self.batches_sent += 1
+                    data = response.json()["results"]
+                    if len(data) != len(tokens):
+                        raise ValueError(f"expected {len(tokens)} results, got {len(data)}")
+                    results = [self._access_token_from(token, item) for token, item in zip(tokens, data)]
             except Exception as e:
-                logger.warning(f"Token introspection failed: {e}")
-                return None
+                logger.warning(f"Batch token introspection failed: {e}")
+                results = [(None, False)] * len(batch)
+
+        if results is None:
+            results = await asyncio.gather(*(self._introspect_single(token) for token in tokens))
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def _introspect_single(self, token: str) -> tuple[AccessToken | None, bool]:
+        if not self._is_safe_endpoint(self.introspection_endpoint):
+            return None, False
+
+        try:
+            response = await self._get_client().post(
+                self.introspection_endpoint,
+                data={"token": token},
+                headers={"Content-Type": "application/x-www-form-urlencoded"},
+            )
+
+            if response.status_code != 200:
+                logger.debug(f"Token introspection returned status {response.status_code}")
+                return None, False
+
+            return self._access_token_from(token, response.json())
+        except Exception as e:
+            logger.warning(f"Token introspection failed: {e}")
+            return None, False
+
+    def _access_token_from(self, token: str, data: dict[str, Any]) -> tuple[AccessToken | None, bool]:
+        """Access token from an introspection response, and whether the answer may be cached."""
+        if not data.get("active", False):
+            return None, True
+
+        # RFC 8707 resource validation (only when --oauth-strict is set)
+        if self.validate_resource and not self._validate_resource(data):
+            logger.warning(f"Token resource validation failed. Expected: {self.resource_url}")
+            return None, True
+
+        return AccessToken(
+            token=token,
+            client_id=data.get("client_id", "unknown"),
+            scopes=data.get("scope", "").split() if data.get("scope") else [],
+            expires_at=data.get("exp"),
+            resource=data.get("aud"),  # Include resource in token
+        ), True
 
     def _validate_resource(self, token_data: dict[str, Any]) -> bool:
         """Validate token was issued for this resource server."""
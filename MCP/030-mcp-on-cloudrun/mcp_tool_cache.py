@@ -0,0 +1,322 @@
+"""
+Persistent cache of MCP tool listings.
+
+Tool listings are stored on disk per server, keyed by the server URL (or stdio command),
+together with the schema fingerprint the server publishes as the ``tools://fingerprint``
+resource. Revalidating costs one small resource read. The listing is fetched again only
+when the fingerprint changed. For servers without the resource, a cached listing is used
+until it is older than the TTL.
+
+Listings are served stale-while-revalidate: a cached listing is returned at once and
+checked in the background, so the first user message never waits for a discovery round
+trip. ``prewarm`` loads the cached listings from disk at process start.
+
+The servers compute the fingerprint with ``tools_fingerprint`` (a SHA-256 over the tool
+names, descriptions and input schemas); to clients it is an opaque string.
+
+The cache may be shared by threads running their own event loops, so its state is only
+touched under a lock, and background revalidation needs a running loop.
+
+This is the only maintained copy. calcagent, MCP/010-simple-mcp and MCP/020-simple-auth
+import it through symlinks (adk deploy copies the file the link points to). The Docker
+build context of MCP/030-mcp-on-cloudrun is that directory, which a symlink cannot leave,
+so it keeps a verbatim copy; refresh it after changing this file:
+
+    cp mcp_tool_cache.py MCP/030-mcp-on-cloudrun/
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass
+from threading import Lock
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+from mcp import ClientSession
+from mcp.shared.exceptions import McpError
+from mcp.types import Tool
+from pydantic import AnyUrl
+
+logger = logging.getLogger(__name__)
+
+FINGERPRINT_URI = "tools://fingerprint"
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "mcp-tool-cache")
+DEFAULT_TTL_SECS = 3600.0
+# Minimum time between two background revalidations of the same server.
+DEFAULT_REVALIDATE_INTERVAL_SECS = 30.0
+
+ListTools = Callable[[], Awaitable[List[Tool]]]
+ReadFingerprint = Callable[[], Awaitable[Optional[str]]]
+
+
+@dataclass
+class CacheEntry:
+    server: str
+    fingerprint: Optional[str]
+    fetched_at: float
+    tools: List[dict]
+
+    def to_tools(self) -> List[Tool]:
+        return [Tool.model_validate(tool) for tool in self.tools]
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    revalidations: int = 0
+    refetches: int = 0
+    revalidation_errors: int = 0
+
+
+class ToolListingCache:
+    """
+    On-disk cache of tool listings with in-memory entries for the servers already seen.
+    """
+
+    def __init__(
+            self,
+            cache_dir: Optional[str] = None,
+            ttl_secs: float = DEFAULT_TTL_SECS,
+            revalidate_interval_secs: float = DEFAULT_REVALIDATE_INTERVAL_SECS
+    ):
+        """
+        :param cache_dir: Directory of the cache files (defaults to ``MCP_TOOL_CACHE_DIR`` or ~/.cache/mcp-tool-cache).
+        :param ttl_secs: How long a listing is trusted for servers that publish no fingerprint.
+        :param revalidate_interval_secs: Minimum time between two background revalidations of a server.
+        """
+        self.cache_dir = cache_dir or os.environ.get("MCP_TOOL_CACHE_DIR", DEFAULT_CACHE_DIR)
+        self.ttl_secs = ttl_secs
+        self.revalidate_interval_secs = revalidate_interval_secs
+        self.stats = CacheStats()
+        self._entries: Dict[str, CacheEntry] = {}
+        self._tools: Dict[str, List[Tool]] = {}
+        self._validated_at: Dict[str, float] = {}
+        self._revalidating: Dict[str, asyncio.Task] = {}
+        self._lock = Lock()
+
+    def _path(self, server: str) -> str:
+        return os.path.join(self.cache_dir, hashlib.sha256(server.encode()).hexdigest()[:32] + ".json")
+
+    def _load(self, server: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(server)
+            if entry is not None:
+                return entry
+        try:
+            with open(self._path(server)) as f:
+                entry = CacheEntry(**json.load(f))
+        except (OSError, ValueError, TypeError):
+            return None
+        if entry.server != server:
+            return None
+        with self._lock:
+            self._entries[server] = entry
+        return entry
+
+    def _tools_of(self, entry: CacheEntry) -> List[Tool]:
+        with self._lock:
+            tools = self._tools.get(entry.server)
+            if tools is not None and self._entries.get(entry.server) is entry:
+                return tools
+        # Parsed outside the lock; another thread may parse the same entry, which is harmless.
+        tools = entry.to_tools()
+        with self._lock:
+            if self._entries.get(entry.server) is entry:
+                self._tools[entry.server] = tools
+        return tools
+
+    def _store(self, entry: CacheEntry) -> None:
+        with self._lock:
+            self._entries[entry.server] = entry
+            self._tools.pop(entry.server, None)
+            self._validated_at[entry.server] = time.monotonic()
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._path(entry.server)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(asdict(entry), f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write the tool cache for {entry.server}: {e}")
+
+    def prewarm(self, servers: Iterable[str]) -> Dict[str, bool]:
+        """
+        Loads the cached listings of the servers from disk into memory.
+
+        :return: Whether a listing was found, per server.
+        """
+        return {server: self._load(server) is not None for server in servers}
+
+    def invalidate(self, server: str) -> None:
+        with self._lock:
+            self._entries.pop(server, None)
+            self._tools.pop(server, None)
+        try:
+            os.remove(self._path(server))
+        except FileNotFoundError:
+            pass
+
+    async def _fetch(self, server: str, list_tools: ListTools, fingerprint: Optional[str]) -> List[Tool]:
+        tools = await list_tools()
+        self.stats.refetches += 1
+        self._store(CacheEntry(server, fingerprint, time.time(), [t.model_dump(mode="json") for t in tools]))
+        return tools
+
+    async def _revalidate(
+            self,
+            server: str,
+            entry: CacheEntry,
+            list_tools: ListTools,
+            read_fingerprint: Optional[ReadFingerprint]
+    ) -> List[Tool]:
+        self.stats.revalidations += 1
+        fingerprint = await read_fingerprint() if read_fingerprint else None
+        if fingerprint is not None:
+            if fingerprint == entry.fingerprint:
+                # Refresh fetched_at so TTL-based fallbacks stay valid.
+                refreshed = CacheEntry(server, fingerprint, time.time(), entry.tools)
+                self._store(refreshed)
+                return self._tools_of(refreshed)
+        elif time.time() - entry.fetched_at < self.ttl_secs:
+            with self._lock:
+                self._validated_at[server] = time.monotonic()
+            return self._tools_of(entry)
+        return await self._fetch(server, list_tools, fingerprint)
+
+    def _revalidate_in_background(
+            self,
+            server: str,
+            entry: CacheEntry,
+            list_tools: ListTools,
+            read_fingerprint: Optional[ReadFingerprint]
+    ) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No loop to run the revalidation on; the next call from a coroutine revalidates.
+            return
+
+        async def revalidate():
+            try:
+                await self._revalidate(server, entry, list_tools, read_fingerprint)
+            except Exception as e:
+                self.stats.revalidation_errors += 1
+                logger.warning(f"Could not revalidate the tools of {server}: {e!r}")
+            finally:
+                with self._lock:
+                    if self._revalidating.get(server) is task:
+                        del self._revalidating[server]
+
+        with self._lock:
+            running = self._revalidating.get(server)
+            # A task of a loop that was closed meanwhile never finishes; replace it.
+            if running is not None and not running.done() and not running.get_loop().is_closed():
+                return
+            validated_at = self._validated_at.get(server)
+            if validated_at is not None and time.monotonic() - validated_at < self.revalidate_interval_secs:
+                return
+            task = self._revalidating[server] = loop.create_task(revalidate())
+
+    async def get(
+            self,
+            server: str,
+            list_tools: ListTools,
+            read_fingerprint: Optional[ReadFingerprint] = None,
+            stale_while_revalidate: bool = True
+    ) -> List[Tool]:
+        """
+        Returns the tools of a server, from the cache when possible.
+
+        :param server: The server URL (or another stable key, such as the stdio command).
+        :param list_tools: Fetches the tool listing from the server.
+        :param read_fingerprint: Reads the server's schema fingerprint, or returns None if
+            the server publishes none.
+        :param stale_while_revalidate: Return a cached listing at once and revalidate it in
+            the background. Otherwise wait for the revalidation.
+        """
+        entry = self._load(server)
+        if entry is None:
+            self.stats.misses += 1
+            fingerprint = await read_fingerprint() if read_fingerprint else None
+            return await self._fetch(server, list_tools, fingerprint)
+
+        self.stats.hits += 1
+        if stale_while_revalidate:
+            self._revalidate_in_background(server, entry, list_tools, read_fingerprint)
+            return self._tools_of(entry)
+        return await self._revalidate(server, entry, list_tools, read_fingerprint)
+
+
+def tools_fingerprint(tools: Iterable[Tool]) -> str:
+    """
+    Computes the ``tools://fingerprint`` of a server from its tools: a SHA-256 over the tool
+    names, descriptions and input schemas, independent of the tool order.
+    """
+    canonical = json.dumps(
+        [
+            {"name": t.name, "description": t.description, "inputSchema": t.inputSchema}
+            for t in sorted(tools, key=lambda t: t.name)
+        ],
+        sort_keys=True,
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+async def read_fingerprint(session) -> Optional[str]:
+    """
+    Reads the ``tools://fingerprint`` resource of a server, or returns None if it has none.
+
+    :param session: A ClientSession, or anything with the same ``read_resource`` (e.g. a session pool).
+    """
+    try:
+        result = await session.read_resource(AnyUrl(FINGERPRINT_URI))
+    except McpError:
+        return None
+    for content in result.contents:
+        text = getattr(content, "text", None)
+        if text:
+            return text.strip()
+    return None
+
+
+_default_cache: Optional[ToolListingCache] = None
+_default_cache_lock = Lock()
+
+
+def get_tool_cache() -> ToolListingCache:
+    """
+    Returns the process-wide tool listing cache (``MCP_TOOL_CACHE_DIR`` or ~/.cache/mcp-tool-cache).
+    """
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = ToolListingCache()
+    return _default_cache
+
+
+async def list_tools_cached(
+        session: ClientSession,
+        server: str,
+        cache: Optional[ToolListingCache] = None,
+        stale_while_revalidate: bool = False
+) -> List[Tool]:
+    """
+    ``session.list_tools()`` through the cache.
+
+    :param session: An initialized client session.
+    :param server: The server URL or stdio command the session is connected to.
+    :param cache: The cache to use (defaults to the process-wide cache).
+    :param stale_while_revalidate: See ToolListingCache.get.
+    """
+    async def list_tools() -> List[Tool]:
+        return (await session.list_tools()).tools
+
+    return await (cache or get_tool_cache()).get(
+        server, list_tools, lambda: read_fingerprint(session), stale_while_revalidate
+    )
@@ -1,8 +1,13 @@
+import json
 import logging
-from fastmcp import FastMCP
+from typing import Any, Callable
+from fastmcp import Context, FastMCP
+from pydantic import validate_call
 import os
 import asyncio
 
+from mcp_tool_cache import tools_fingerprint as compute_tools_fingerprint
+
 # Setup logging
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
@@ -10,7 +15,24 @@ logging.basicConfig(level=logging.INFO)
 # MCP Server
 mcp = FastMCP("MCP Server on Cloud Run")
 
+# Tools that can be called through batch_call, by name, with their arguments validated.
+BATCHABLE_TOOLS: dict[str, Callable[..., Any]] = {}
+# Largest batch accepted, and how many of its calls run at once.
+MAX_BATCH_CALLS = 1000
+MAX_CONCURRENT_CALLS = 16
+
+
+def batchable(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Makes a sync tool callable through batch_call, with its arguments validated by pydantic.
+    """
+
+    BATCHABLE_TOOLS[fn.__name__] = validate_call(fn)
+    return fn
+
+
 @mcp.tool()
+@batchable
 def add(a: int, b: int) -> int:
     """
     USe this to add two numbers together.
@@ -25,6 +47,7 @@ def add(a: int, b: int) -> int:
 
 
 @mcp.tool()
+@batchable
 def subtract(a: int, b: int) -> int:
     """
     USe this to subtract two numbers.
@@ -37,6 +60,79 @@ def subtract(a: int, b: int) -> int:
     logger.info(f" Subtract:  {a} - {b}")
     return a - b
 
+async def _run_batched_call(index: int, call: Any, limit: asyncio.Semaphore) -> dict[str, Any]:
+    """
+    Runs one call of a batch in a worker thread and returns its result, or its error.
+    """
+
+    item: dict[str, Any] = {"index": index, "id": index, "tool": None}
+    try:
+        if not isinstance(call, dict):
+            raise TypeError(f"A call must be an object, got {type(call).__name__}")
+        tool = call.get("tool")
+        item.update(id=call.get("id", index), tool=tool)
+        if not isinstance(tool, str) or tool not in BATCHABLE_TOOLS:
+            raise ValueError(f"Unknown tool: {tool!r}")
+        arguments = call.get("arguments") or {}
+        if not isinstance(arguments, dict):
+            raise TypeError(f"The arguments must be an object, got {type(arguments).__name__}")
+        async with limit:
+            item["result"] = await asyncio.to_thread(BATCHABLE_TOOLS[tool], **arguments)
+    except Exception as e:
+        item["error"] = f"{type(e).__name__}: {e}"
+    return item
+
+
+@mcp.tool()
+async def batch_call(
+        calls: list[dict[str, Any]],
+        ctx: Context,
+        batch_id: str | None = None,
+        stream: bool = True
+) -> dict[str, Any]:
+    """
+    Use this to call several tools in one request. With stream set, each result is also sent
+    as a log message (logger "batch_call") as soon as it completes.
+
+    :param calls: The calls, each {"tool": name, "arguments": {...}} with an optional "id"
+    :param batch_id: Echoed in every streamed result, so the client can match them to the batch
+    :param stream: Stream the results as they complete. Otherwise only return them at the end
+    :return: The results in the order of the calls, each with either "result" or "error"
+    :raises ValueError: If the batch has more than MAX_BATCH_CALLS calls
+    """
+
+    logger.info(f" Batch {batch_id} of {len(calls)} calls")
+    if len(calls) > MAX_BATCH_CALLS:
+        raise ValueError(f"A batch can have at most {MAX_BATCH_CALLS} calls, got {len(calls)}")
+    limit = asyncio.Semaphore(MAX_CONCURRENT_CALLS)
+    results: list[dict[str, Any] | None] = [None] * len(calls)
+    tasks = [asyncio.ensure_future(_run_batched_call(i, call, limit)) for i, call in enumerate(calls)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            item = await next_done
+            results[item["index"]] = item
+            if stream:
+                await ctx.info(json.dumps({"batch_id": batch_id, **item}, default=str), logger_name="batch_call")
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    return {
+        "batch_id": batch_id,
+        "count": len(results),
+        "errors": sum(1 for item in results if "error" in item),
+        "results": results,
+    }
+
+@mcp.resource("tools://fingerprint")
+async def tools_fingerprint() -> str:
+    """
+    Fingerprint of the tool schemas. Clients cache the tool listing and only list
+    the tools again when this changes.
+    """
+
+    return compute_tools_fingerprint(t.to_mcp_tool() for t in (await mcp.get_tools()).values())
+
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 8080))
     logger.info(f"MCP server started on port {port}")
@@ -2,6 +2,8 @@ import asyncio
 
 from fastmcp import Client
 
+from mcp_tool_cache import tools_fingerprint
+
 async def test_server():
     # Test the MCP server using streamable-http transport.
     # Use "/sse" endpoint if using sse transport.
@@ -18,6 +20,12 @@ async def test_server():
         print(">>> 🪛  Calling subtract tool for 10 - 3")
         result = await client.call_tool("subtract", {"a": 10, "b": 3})
         print(f"<<< ✅ Result: {result.content[0].text}")
+        # Read the tool schema fingerprint clients use to revalidate their cached listing
+        print(">>> 🔖  Reading tools://fingerprint")
+        contents = await client.read_resource("tools://fingerprint")
+        fingerprint = contents[0].text
+        assert fingerprint == tools_fingerprint(tools), "tools://fingerprint does not match the listed tools"
+        print(f"<<< ✅ Fingerprint: {fingerprint}")
 
 if __name__ == "__main__":
     asyncio.run(test_server())
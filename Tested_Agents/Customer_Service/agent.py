@@ -1,6 +1,6 @@
 from google.adk import Agent
 from .prompts import INSTRUCTION, GLOBAL_INSTRUCTION
-from .tools.tools import (
+from .tools.async_tools import (
     send_call_companion_link,
     approve_discount,
     sync_ask_for_approval,
@@ -9,13 +9,15 @@ from .tools.tools import (
     modify_cart,
     get_product_recommendations,
     check_product_availability,
+    check_product_availability_batch,
     schedule_planting_service,
     get_available_planting_times,
+    get_available_planting_times_range,
     send_care_instructions,
     generate_qr_code
 )
 
-from .shared_libraries.callbacks import before_tool, before_agent, rate_limit_callback, after_tool
+from .shared_libraries.callbacks import before_tool, before_agent, rate_limit_callback, record_token_usage, after_tool
 
 # Create a customer service agent
 root_agent = Agent(
@@ -32,14 +34,17 @@ root_agent = Agent(
         modify_cart,
         get_product_recommendations,
         check_product_availability,
+        check_product_availability_batch,
         schedule_planting_service,
         get_available_planting_times,
+        get_available_planting_times_range,
         send_care_instructions,
         generate_qr_code
     ],
     # TODO: add callbacks
     before_agent_callback=before_agent,
     before_model_callback=rate_limit_callback,
+    after_model_callback=record_token_usage,
     before_tool_callback=before_tool,
     after_tool_callback=after_tool
 )
@@ -0,0 +1,73 @@
+"""
+Microbenchmark: lowercasing the arguments of a large modify_cart call.
+
+Compares a recursive copy-based lowercasing of every string (what the old
+lowercase_value meant to do) with the in-place, schema-driven normalize_args, which
+only lowercases the product IDs. Each strategy runs on mixed-case payloads and on
+payloads that are already lowercase.
+
+Run from the repository root:
+    python -m Tested_Agents.Customer_Service.benchmarks.bench_arg_normalizer
+"""
+
+import copy
+import time
+
+from Tested_Agents.Customer_Service.shared_libraries.arg_normalizer import normalize_args
+
+ROUNDS = 2_000
+
+
+def copy_lowercase(value):
+    """Recursive, copying lowercasing of every string."""
+    if isinstance(value, dict):
+        return {key: copy_lowercase(val) for key, val in value.items()}
+    if isinstance(value, str):
+        return value.lower()
+    if isinstance(value, (list, set, tuple)):
+        return type(value)(copy_lowercase(val) for val in value)
+    return value
+
+
+def cart_args(items: int = 200) -> dict:
+    """modify_cart arguments with many items, each with a free-text note."""
+    return {
+        "customer_id": "CUST001",
+        "items_to_add": [
+            {"product_id": f"SOIL-{i:03d}", "quantity": 1 + i % 3, "note": "Gift Wrap, Happy Birthday Anna!"}
+            for i in range(items)
+        ],
+        "items_to_remove": [{"product_id": "FERT-111"}],
+    }
+
+
+def timed(fn, payloads) -> float:
+    start = time.perf_counter()
+    for payload in payloads:
+        fn(payload)
+    return (time.perf_counter() - start) / len(payloads) * 1e6
+
+
+def main():
+    mixed = cart_args()
+    lower = copy_lowercase(mixed)
+
+    results = {
+        "copy, mixed case": timed(copy_lowercase, [copy.deepcopy(mixed) for _ in range(ROUNDS)]),
+        "copy, already lowercase": timed(copy_lowercase, [copy.deepcopy(lower) for _ in range(ROUNDS)]),
+        "in place, mixed case": timed(
+            lambda a: normalize_args("modify_cart", a), [copy.deepcopy(mixed) for _ in range(ROUNDS)]),
+        "in place, already lowercase": timed(
+            lambda a: normalize_args("modify_cart", a), [copy.deepcopy(lower) for _ in range(ROUNDS)]),
+    }
+
+    normalized = normalize_args("modify_cart", copy.deepcopy(mixed))
+    for before, after in zip(mixed["items_to_add"], normalized["items_to_add"]):
+        assert after == {**before, "product_id": before["product_id"].lower()}, "only product IDs are lowercased"
+    print(f"{'strategy':<32}{'us/call':>10}")
+    for label, us in results.items():
+        print(f"{label:<32}{us:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Benchmark: async tools against the local stand-in backends.
+
+Starts the stub backends in-process with a simulated latency and runs the tool calls of
+many concurrent sessions. With the shared pool, the wall time should stay close to the
+latency of a single session rather than growing with the number of sessions.
+
+Before timing, checks that the async tools return the same results as the synchronous
+ones, both through the local fallback and through the backends.
+
+Run from the repository root:
+    python -m Tested_Agents.Customer_Service.benchmarks.bench_async_tools
+"""
+
+import asyncio
+import json
+import time
+
+import uvicorn
+
+from Tested_Agents.Customer_Service.shared_libraries.http_pool import BACKENDS, BackendConfig, backend_pool
+from Tested_Agents.Customer_Service.tools import async_tools, tools
+from Tested_Agents.Customer_Service.tools.stub_backends import create_stub_app
+
+PORT = 8091
+DELAY_SECS = 0.05
+SESSIONS = 200
+
+
+# Calls without side effects, as (tool name, arguments).
+PARITY_CALLS = [
+    ("send_call_companion_link", {"phone_number": "555-0123"}),
+    ("approve_discount", {"discount_type": "percentage", "value": 5, "reason": "loyal customer"}),
+    ("approve_discount", {"discount_type": "percentage", "value": 15, "reason": "loyal customer"}),
+    ("sync_ask_for_approval", {"discount_type": "percentage", "value": 15, "reason": "loyal customer"}),
+    ("update_salesforce_crm", {"customer_id": "CUST001", "details": {"services": "Planting"}}),
+    ("access_cart_information", {"customer_id": "CUST001"}),
+    ("get_product_recommendations", {"plant_type": "petunias", "customer_id": "CUST001"}),
+    ("check_product_availability", {"product_id": "soil-456", "store_id": "pickup"}),
+    ("check_product_availability_batch", {"product_ids": ["soil-456", "fert-111"], "store_ids": ["pickup"]}),
+    ("get_available_planting_times", {"date": "2030-07-29"}),
+    ("get_available_planting_times", {"date": "not a date"}),
+    ("get_available_planting_times_range", {"start_date": "2030-07-29", "end_date": "2030-07-31"}),
+    ("send_care_instructions", {"customer_id": "CUST001", "plant_type": "petunias", "delivery_method": "email"}),
+    ("generate_qr_code", {"customer_id": "CUST001", "discount_value": 5, "discount_type": "percentage",
+                          "expiration_date": "30"}),
+    ("generate_qr_code", {"customer_id": "CUST001", "discount_value": 50, "discount_type": "percentage",
+                          "expiration_date": "30"}),
+]
+
+
+async def check_parity(via: str) -> None:
+    """Fails if an async tool returns something else than its synchronous counterpart."""
+    for name, kwargs in PARITY_CALLS:
+        # Results from the backends went through JSON; compare in that form.
+        expected = json.loads(json.dumps(getattr(tools, name)(**kwargs)))
+        actual = json.loads(json.dumps(await getattr(async_tools, name)(**kwargs)))
+        assert actual == expected, f"{name}({kwargs}) via {via}: {actual!r} != {expected!r}"
+    print(f"Async tools match the sync tools via {via} ({len(PARITY_CALLS)} calls)")
+
+
+async def session_turn(customer_id: str):
+    """Tool calls an agent typically makes while handling one request."""
+    await async_tools.access_cart_information(customer_id)
+    await async_tools.check_product_availability("soil-456", "pickup")
+    await async_tools.get_product_recommendations("petunias", customer_id)
+
+
+async def main():
+    await check_parity("the local fallback")
+
+    backend_pool.backends.update(
+        {name: BackendConfig(f"http://localhost:{PORT}", max_concurrency=100) for name in BACKENDS}
+    )
+    server = uvicorn.Server(uvicorn.Config(create_stub_app(DELAY_SECS), port=PORT, log_level="warning"))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    try:
+        await check_parity("the stub backends")
+        await session_turn("CUST001")  # warm up the connection pool
+
+        start = time.perf_counter()
+        await session_turn("CUST001")
+        single = time.perf_counter() - start
+
+        start = time.perf_counter()
+        await asyncio.gather(*(session_turn("CUST001") for _ in range(SESSIONS)))
+        concurrent = time.perf_counter() - start
+
+        print(f"Simulated backend latency: {DELAY_SECS * 1000:.0f} ms, 3 tool calls per session")
+        print(f"1 session:          {single * 1000:8.1f} ms")
+        print(f"{SESSIONS} sessions:      {concurrent * 1000:8.1f} ms "
+              f"(serial would be ~{single * SESSIONS * 1000:.0f} ms)")
+    finally:
+        await backend_pool.aclose()
+        server.should_exit = True
+        await server_task
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,58 @@
+"""
+Benchmark: profile hydration latency when many sessions open at once.
+
+Loads a SQLite repository with synthetic customers and measures the per-session cost
+of ``get`` (cold and warm cache) and of ``get_many`` batch lookups.
+
+Run from the repository root:
+    python -m Tested_Agents.Customer_Service.benchmarks.bench_customer_repository
+"""
+
+import time
+
+from Tested_Agents.Customer_Service.entities.customer_repository import (
+    CachedCustomerRepository,
+    SQLiteCustomerRepository,
+    sample_customer,
+)
+
+CUSTOMERS = 5_000
+SESSIONS = 20_000
+
+
+def _per_call_us(elapsed: float, calls: int) -> float:
+    return elapsed / calls * 1e6
+
+
+def main():
+    ids = [f"CUST{i:06d}" for i in range(CUSTOMERS)]
+    template = sample_customer("CUST000000")
+    sqlite_repo = SQLiteCustomerRepository(":memory:")
+    sqlite_repo.put_many(template.model_copy(update={"customer_id": cid}) for cid in ids)
+
+    cached = CachedCustomerRepository(sqlite_repo, max_entries=CUSTOMERS)
+    session_ids = [ids[i % CUSTOMERS] for i in range(SESSIONS)]
+
+    start = time.perf_counter()
+    for cid in ids:
+        sqlite_repo.get(cid)
+    uncached = time.perf_counter() - start
+
+    start = time.perf_counter()
+    cached.get_many(ids)
+    batch = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for cid in session_ids:
+        cached.get(cid)
+    warm = time.perf_counter() - start
+
+    print(f"{'lookup':<36}{'us/session':>12}")
+    print(f"{'SQLite get (no cache)':<36}{_per_call_us(uncached, CUSTOMERS):>12.2f}")
+    print(f"{'SQLite get_many (cold cache)':<36}{_per_call_us(batch, CUSTOMERS):>12.2f}")
+    print(f"{'cached get (warm cache)':<36}{_per_call_us(warm, SESSIONS):>12.2f}")
+    print(f"Cache hits={cached.hits} misses={cached.misses}")
+
+
+if __name__ == "__main__":
+    main()
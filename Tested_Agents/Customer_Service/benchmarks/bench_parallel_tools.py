@@ -0,0 +1,146 @@
+"""
+Benchmark: sequential vs parallel dispatch of the tool calls of one model turn.
+
+Runs the customer service agent's real tools and callbacks through an ADK Runner, with a
+scripted model in place of Gemini and the stub backends answering with a fixed latency.
+The scripted model asks for three ``check_product_availability`` calls and one
+``get_product_recommendations`` call, either all in one response (ADK dispatches them
+concurrently, through the per-session SessionConcurrencyLimiter) or one per response.
+
+Checks that ``before_tool`` runs before ``after_tool`` for every call and that ADK
+returns the function responses in request order.
+
+Run from the repository root:
+    python -m Tested_Agents.Customer_Service.benchmarks.bench_parallel_tools
+"""
+
+import asyncio
+import time
+from typing import Any, AsyncGenerator, Dict, List, Tuple
+
+import uvicorn
+from google.adk import Agent
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from Tested_Agents.Customer_Service.agent import root_agent
+from Tested_Agents.Customer_Service.shared_libraries import callbacks
+from Tested_Agents.Customer_Service.shared_libraries.http_pool import BACKENDS, BackendConfig, backend_pool
+from Tested_Agents.Customer_Service.shared_libraries.tool_concurrency import SessionConcurrencyLimiter
+from Tested_Agents.Customer_Service.tools import async_tools
+from Tested_Agents.Customer_Service.tools.stub_backends import create_stub_app
+
+PORT = 8092
+BACKEND_DELAY_SECS = 0.08
+
+TURN: List[Tuple[str, Dict[str, Any]]] = [
+    ("check_product_availability", {"product_id": "soil-456", "store_id": "pickup"}),
+    ("check_product_availability", {"product_id": "fert-789", "store_id": "pickup"}),
+    ("check_product_availability", {"product_id": "pots-444", "store_id": "pickup"}),
+    ("get_product_recommendations", {"plant_type": "petunias", "customer_id": "CUST001"}),
+]
+
+
+class ScriptedModel(BaseLlm):
+    """
+    Stands in for Gemini: asks for the tool calls of ``batches``, one model response per
+    batch, then answers with text.
+    """
+
+    model: str = "scripted"
+    batches: List[List[Tuple[str, Dict[str, Any]]]] = []
+
+    async def generate_content_async(
+            self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        answered = sum(
+            1 for content in llm_request.contents
+            if content.role == "model" and any(part.function_call for part in content.parts or [])
+        )
+        if answered < len(self.batches):
+            offset = sum(len(batch) for batch in self.batches[:answered])
+            parts = [
+                types.Part(function_call=types.FunctionCall(id=f"call-{offset + i}", name=name, args=args))
+                for i, (name, args) in enumerate(self.batches[answered])
+            ]
+        else:
+            parts = [types.Part(text="Done.")]
+        yield LlmResponse(content=types.Content(role="model", parts=parts))
+
+
+def build_agent(batches, events: list) -> Agent:
+    """The customer service agent's tools and callbacks, with the scripted model."""
+
+    def before_tool(tool, args, tool_context):
+        events.append(("before_tool", tool_context.function_call_id))
+        return callbacks.before_tool(tool, args, tool_context)
+
+    def after_tool(tool, args, tool_context, tool_response):
+        events.append(("after_tool", tool_context.function_call_id))
+        return callbacks.after_tool(tool, args, tool_context, tool_response)
+
+    return Agent(
+        name="customer_service_agent",
+        model=ScriptedModel(batches=batches),
+        instruction="",
+        tools=root_agent.tools,
+        before_agent_callback=callbacks.before_agent,
+        before_tool_callback=before_tool,
+        after_tool_callback=after_tool,
+    )
+
+
+async def run_turn(batches) -> Tuple[float, list, list]:
+    """Runs one user turn; returns its latency, the callback events and the function response IDs."""
+    events: list = []
+    runner = InMemoryRunner(agent=build_agent(batches, events), app_name="bench_parallel_tools")
+    session = await runner.session_service.create_session(app_name=runner.app_name, user_id="bench")
+    message = types.Content(role="user", parts=[types.Part(text="What do I need for petunias?")])
+
+    response_ids = []
+    start = time.perf_counter()
+    async for event in runner.run_async(user_id="bench", session_id=session.id, new_message=message):
+        response_ids.extend(response.id for response in event.get_function_responses())
+    return time.perf_counter() - start, events, response_ids
+
+
+def check(events: list, response_ids: list) -> None:
+    call_ids = [f"call-{i}" for i in range(len(TURN))]
+    assert response_ids == call_ids, f"function responses are not in request order: {response_ids}"
+    for call_id in call_ids:
+        assert events.index(("before_tool", call_id)) < events.index(("after_tool", call_id)), \
+            "callback order violated"
+
+
+async def main():
+    backend_pool.backends.update(
+        {name: BackendConfig(f"http://localhost:{PORT}", max_concurrency=100) for name in BACKENDS}
+    )
+    server = uvicorn.Server(uvicorn.Config(create_stub_app(BACKEND_DELAY_SECS), port=PORT, log_level="warning"))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    try:
+        await run_turn([TURN])  # warm up the connection pool
+        print(f"Backend latency {BACKEND_DELAY_SECS * 1000:.0f} ms, {len(TURN)} tool calls in the turn")
+        print(f"{'dispatch':<28}{'turn latency (ms)':>18}")
+        for label, batches, max_in_flight in [
+            ("one call per response", [[call] for call in TURN], 4),
+            ("parallel, cap=4", [TURN], 4),
+            ("parallel, cap=2", [TURN], 2),
+            ("parallel, cap=1", [TURN], 1),
+        ]:
+            async_tools.tool_call_limiter = SessionConcurrencyLimiter(max_in_flight)
+            elapsed, events, response_ids = await run_turn(batches)
+            check(events, response_ids)
+            print(f"{label:<28}{elapsed * 1000:>18.1f}")
+    finally:
+        await backend_pool.aclose()
+        server.should_exit = True
+        await server_task
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,38 @@
+"""
+Benchmark: cost of reading the customer profile on each tool call.
+
+Compares parsing the indented profile JSON with pydantic on every call (the old
+behaviour of validate_customer_id) with the compact JSON served from the ProfileCache.
+
+Run from the repository root:
+    python -m Tested_Agents.Customer_Service.benchmarks.bench_profile_parse
+"""
+
+import timeit
+
+from Tested_Agents.Customer_Service.entities.customer import Customer
+from Tested_Agents.Customer_Service.shared_libraries.profile_cache import ProfileCache
+
+TOOL_CALLS = 10_000
+
+
+def main():
+    customer = Customer.get_customer("CUST001")
+    indented_json = customer.model_dump_json(indent=4)
+    compact_json = customer.to_json()
+    cache = ProfileCache()
+
+    before = timeit.timeit(lambda: Customer.model_validate_json(indented_json), number=TOOL_CALLS)
+    parse_compact = timeit.timeit(lambda: Customer.model_validate_json(compact_json), number=TOOL_CALLS)
+    after = timeit.timeit(lambda: cache.get(compact_json), number=TOOL_CALLS)
+
+    print(f"Profile size: indented={len(indented_json)} bytes, compact={len(compact_json)} bytes")
+    print(f"{'strategy':<32}{'us/tool call':>14}")
+    print(f"{'parse indented JSON (before)':<32}{before / TOOL_CALLS * 1e6:>14.2f}")
+    print(f"{'parse compact JSON':<32}{parse_compact / TOOL_CALLS * 1e6:>14.2f}")
+    print(f"{'cached compact JSON (after)':<32}{after / TOOL_CALLS * 1e6:>14.2f}")
+    print(f"Cache hits={cache.hits} misses={cache.misses}")
+
+
+if __name__ == "__main__":
+    main()
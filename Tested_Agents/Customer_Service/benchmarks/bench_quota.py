@@ -0,0 +1,81 @@
+"""
+Benchmark: shared quota enforcement across worker processes.
+
+Several processes (standing in for uvicorn workers) take quota from one SQLiteQuotaStore
+as fast as they can. Every granted request is logged with its timestamp; at the end, no
+sliding window may contain more requests than the quota allows, however many workers
+there are.
+
+Run from the repository root:
+    python -m Tested_Agents.Customer_Service.benchmarks.bench_quota
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from multiprocessing import Process, Queue
+
+from Tested_Agents.Customer_Service.shared_libraries.quota import SQLiteQuotaStore
+
+KEY = "gemini-2.5-flash"
+JITTER_SECS = 0.02
+
+
+def worker(path: str, rpm: int, tpm: int, window_secs: float, duration_secs: float, results: Queue):
+    store = SQLiteQuotaStore(path, rpm, tpm, window_secs)
+    granted, denied = [], 0
+    deadline = time.time() + duration_secs
+    while time.time() < deadline:
+        decision = store.try_acquire(KEY, tokens=100)
+        if decision.allowed:
+            granted.append(time.time())
+        else:
+            denied += 1
+            # Shed early: sleep only as long as the store says, capped so the test keeps moving.
+            time.sleep(min(decision.budget.retry_after_secs, 0.05))
+    results.put((granted, denied))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared quota benchmark.")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rpm", type=int, default=200, help="Requests allowed per window.")
+    parser.add_argument("--tpm", type=int, default=1_000_000, help="Tokens allowed per window.")
+    parser.add_argument("--window", type=float, default=1.0, help="Window length in seconds.")
+    parser.add_argument("--duration", type=float, default=5.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "quota.db")
+        results: Queue = Queue()
+        processes = [
+            Process(target=worker, args=(path, args.rpm, args.tpm, args.window, args.duration, results))
+            for _ in range(args.workers)
+        ]
+        for p in processes:
+            p.start()
+        outcomes = [results.get() for _ in processes]
+        for p in processes:
+            p.join()
+
+    granted = sorted(ts for times, _ in outcomes for ts in times)
+    denied = sum(d for _, d in outcomes)
+    # The largest number of grants within any window. Grants are timestamped by the worker
+    # just after the store's transaction, so the window is shortened by that jitter.
+    window = args.window - JITTER_SECS
+    peak, start = 0, 0
+    for end, ts in enumerate(granted):
+        while ts - granted[start] >= window:
+            start += 1
+        peak = max(peak, end - start + 1)
+
+    expected = args.rpm * args.duration / args.window
+    print(f"workers={args.workers} rpm={args.rpm}/{args.window}s duration={args.duration}s")
+    print(f"granted={len(granted)} (ideal ~{expected:.0f}) denied={denied} peak_per_window={peak}")
+    assert peak <= args.rpm, "The quota was exceeded"
+    print("No window exceeded the quota.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark: planting service booking throughput under contention.
+
+Many threads book slots at the same time, mostly on a handful of popular dates so
+that they contend for the same slots. At the end, no slot may be booked by more
+crews than it has.
+
+Run from the repository root:
+    python -m Tested_Agents.Customer_Service.benchmarks.bench_scheduling
+"""
+
+import random
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from Tested_Agents.Customer_Service.services.scheduling import SchedulingEngine, SlotUnavailable
+
+THREADS = 16
+REQUESTS = 200_000
+DATES = 365
+CREWS = 500
+HOT_DATES = 5
+
+
+def main():
+    engine = SchedulingEngine(crews=CREWS)
+    first = date.today() + timedelta(days=1)
+    days = [(first + timedelta(days=i)).isoformat() for i in range(DATES)]
+    rng = random.Random(42)
+    requests = [
+        (rng.choice(days[:HOT_DATES]) if rng.random() < 0.8 else rng.choice(days), rng.choice(["9-12", "13-16"]))
+        for _ in range(REQUESTS)
+    ]
+
+    def book(request):
+        day, time_range = request
+        try:
+            return engine.book("CUST001", day, time_range, "Planting").date, time_range
+        except SlotUnavailable:
+            return None
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(THREADS) as pool:
+        results = list(pool.map(book, requests, chunksize=256))
+    elapsed = time.perf_counter() - start
+
+    booked = Counter(r for r in results if r is not None)
+    assert max(booked.values()) <= CREWS, "slot overbooked"
+    rejected = results.count(None)
+    print(f"{REQUESTS:,} booking requests from {THREADS} threads in {elapsed:.2f}s "
+          f"({REQUESTS / elapsed:,.0f} requests/s)")
+    print(f"booked={REQUESTS - rejected:,} rejected (slot full)={rejected:,}; no slot overbooked")
+
+    start = time.perf_counter()
+    for _ in range(1000):
+        engine.available_times(days[0])
+    single = (time.perf_counter() - start) / 1000
+    start = time.perf_counter()
+    for _ in range(100):
+        engine.available_times_range(days[0], days[30])
+    ranged = (time.perf_counter() - start) / 100
+    print(f"available_times: {single * 1e6:.2f} us; 31-day range query: {ranged * 1e6:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
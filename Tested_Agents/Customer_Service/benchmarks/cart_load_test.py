@@ -0,0 +1,90 @@
+"""
+Load test: many concurrent sessions modifying carts.
+
+Drives CARTS carts with SESSIONS_PER_CART concurrent sessions each. Every session reads
+its cart and writes a change with ``expected_version``, retrying on version conflicts,
+so the test exercises optimistic versioning under contention. At the end every cart's
+incrementally maintained subtotal is checked against a full recomputation.
+
+Run from the repository root:
+    python -m Tested_Agents.Customer_Service.benchmarks.cart_load_test --backend memory
+    python -m Tested_Agents.Customer_Service.benchmarks.cart_load_test --backend sqlite --carts 1000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+from Tested_Agents.Customer_Service.services.cart import (
+    CartVersionConflict,
+    InMemoryCartStore,
+    PriceIndex,
+    SQLiteCartStore,
+)
+
+PRODUCTS = ["soil-123", "soil-456", "fert-456", "fert-789", "seeds-333", "pots-444"]
+
+
+async def session(store, customer_id: str, operations: int, stats: dict, run) -> None:
+    rng = random.Random(customer_id)
+    for _ in range(operations):
+        while True:
+            cart = await run(store.get, customer_id)
+            add = [{"product_id": rng.choice(PRODUCTS), "quantity": rng.randint(1, 3)}]
+            remove = [{"product_id": rng.choice(PRODUCTS), "quantity": 1}] if cart.items else []
+            try:
+                await run(store.modify, customer_id, add, remove, cart.version)
+                stats["commits"] += 1
+                break
+            except CartVersionConflict:
+                stats["conflicts"] += 1
+            await asyncio.sleep(0)
+
+
+async def main(backend: str, carts: int, sessions_per_cart: int, operations: int):
+    prices = PriceIndex.from_csv()
+    if backend == "sqlite":
+        db_path = os.path.join(tempfile.mkdtemp(), "carts.db")
+        store = SQLiteCartStore(prices, db_path)
+
+        async def run(fn, *args):
+            return await asyncio.to_thread(fn, *args)
+    else:
+        store = InMemoryCartStore(prices)
+
+        async def run(fn, *args):
+            await asyncio.sleep(0)  # yield so sessions of the same cart interleave
+            return fn(*args)
+
+    stats = {"commits": 0, "conflicts": 0}
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        session(store, f"CUST{c:05d}", operations, stats, run)
+        for c in range(carts)
+        for _ in range(sessions_per_cart)
+    ))
+    elapsed = time.perf_counter() - start
+
+    for c in range(carts):
+        cart = store.get(f"CUST{c:05d}")
+        expected = sum(item.quantity * item.unit_price_cents for item in cart.items.values())
+        assert cart.subtotal_cents == expected, f"subtotal drift in cart {cart.customer_id}"
+        assert cart.version == sessions_per_cart * operations, f"lost update in cart {cart.customer_id}"
+
+    print(f"backend={backend} carts={carts} sessions/cart={sessions_per_cart} ops/session={operations}")
+    print(f"commits={stats['commits']} conflicts={stats['conflicts']} "
+          f"elapsed={elapsed:.2f}s throughput={stats['commits'] / elapsed:,.0f} commits/s")
+    print("All subtotals match a full recomputation; no lost updates.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cart engine load test.")
+    parser.add_argument("--backend", choices=["memory", "sqlite"], default="memory")
+    parser.add_argument("--carts", type=int, default=10_000)
+    parser.add_argument("--sessions-per-cart", type=int, default=2)
+    parser.add_argument("--operations", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.backend, args.carts, args.sessions_per_cart, args.operations))
@@ -0,0 +1,355 @@
+"""
+Storage backends for customer profiles.
+
+``Customer.get_customer`` reads through the process-wide repository returned by
+``get_customer_repository``. By default that is an in-memory repository with the demo
+customers behind a bounded LRU/TTL cache. Set ``CUSTOMER_SERVICE_DB`` to the path of a
+SQLite database to serve profiles from SQLite instead; an empty database is seeded with
+the demo customers.
+"""
+
+import os
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .customer import (
+    Address,
+    CommunicationPreferences,
+    Customer,
+    GardenProfile,
+    Product,
+    Purchase,
+)
+
+SAMPLE_CUSTOMER_IDS = ["CUST001", "CUST002", "CUST003"]
+
+
+class CustomerRepository(ABC):
+    """
+    Interface for looking up customer profiles.
+
+    Returned Customer objects belong to the caller; changing them does not change the
+    stored profile (use ``put`` for that).
+    """
+
+    @abstractmethod
+    def get(self, customer_id: str) -> Optional[Customer]:
+        """
+        Returns the customer with the given ID, or None if there is no such customer.
+        """
+
+    @abstractmethod
+    def get_many(self, customer_ids: Iterable[str]) -> Dict[str, Customer]:
+        """
+        Looks up several customers at once.
+
+        :param customer_ids: The IDs of the customers to look up.
+        :return: A dictionary of the customers that were found, keyed by customer ID.
+        """
+
+    @abstractmethod
+    def put(self, customer: Customer) -> None:
+        """
+        Inserts or replaces a customer.
+        """
+
+    @abstractmethod
+    def iter_customers(self) -> Iterator[Customer]:
+        """
+        Iterates over all stored customers, e.g. to build offline indexes from them.
+        """
+
+
+class InMemoryCustomerRepository(CustomerRepository):
+    """
+    Customer repository backed by a dictionary.
+    """
+
+    def __init__(self, customers: Iterable[Customer] = ()):
+        self._customers: Dict[str, Customer] = {c.customer_id: c for c in customers}
+
+    def get(self, customer_id: str) -> Optional[Customer]:
+        customer = self._customers.get(customer_id)
+        return customer.model_copy(deep=True) if customer is not None else None
+
+    def get_many(self, customer_ids: Iterable[str]) -> Dict[str, Customer]:
+        customers = self._customers
+        return {cid: customers[cid].model_copy(deep=True) for cid in customer_ids if cid in customers}
+
+    def put(self, customer: Customer) -> None:
+        self._customers[customer.customer_id] = customer.model_copy(deep=True)
+
+    def iter_customers(self) -> Iterator[Customer]:
+        for customer in list(self._customers.values()):
+            yield customer.model_copy(deep=True)
+
+
+class SQLiteCustomerRepository(CustomerRepository):
+    """
+    Customer repository that stores each profile as compact JSON in a SQLite table.
+    """
+
+    # SQLite limits the number of host parameters in one statement.
+    BATCH_SIZE = 500
+
+    def __init__(self, path: str):
+        """
+        :param path: Path to the SQLite database file (":memory:" for a private in-memory database).
+        """
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = Lock()
+        with self._lock, self._conn:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS customers (customer_id TEXT PRIMARY KEY, profile TEXT NOT NULL)"
+            )
+
+    def get(self, customer_id: str) -> Optional[Customer]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT profile FROM customers WHERE customer_id = ?", (customer_id,)
+            ).fetchone()
+        return Customer.model_validate_json(row[0]) if row else None
+
+    def get_many(self, customer_ids: Iterable[str]) -> Dict[str, Customer]:
+        ids = list(dict.fromkeys(customer_ids))
+        rows: List[Tuple[str, str]] = []
+        with self._lock:
+            for i in range(0, len(ids), self.BATCH_SIZE):
+                batch = ids[i:i + self.BATCH_SIZE]
+                placeholders = ",".join("?" * len(batch))
+                rows.extend(self._conn.execute(
+                    f"SELECT customer_id, profile FROM customers WHERE customer_id IN ({placeholders})", batch
+                ))
+        return {cid: Customer.model_validate_json(profile) for cid, profile in rows}
+
+    def put(self, customer: Customer) -> None:
+        self.put_many([customer])
+
+    def iter_customers(self) -> Iterator[Customer]:
+        # Page by primary key, so the lock is only held for one page at a time.
+        last_id = ""
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT customer_id, profile FROM customers WHERE customer_id > ? ORDER BY customer_id LIMIT ?",
+                    (last_id, self.BATCH_SIZE),
+                ).fetchall()
+            for _, profile in rows:
+                yield Customer.model_validate_json(profile)
+            if len(rows) < self.BATCH_SIZE:
+                return
+            last_id = rows[-1][0]
+
+    def count(self) -> int:
+        """
+        Returns the number of stored customers.
+        """
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM customers").fetchone()[0]
+
+    def put_many(self, customers: Iterable[Customer]) -> None:
+        """
+        Inserts or replaces several customers in one transaction.
+        """
+        rows = [(c.customer_id, c.to_json()) for c in customers]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO customers (customer_id, profile) VALUES (?, ?)", rows
+            )
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class CachedCustomerRepository(CustomerRepository):
+    """
+    Bounded LRU cache with a time-to-live in front of another customer repository.
+
+    Misses in ``get_many`` are fetched from the backing repository in a single batch.
+    Unknown customer IDs are not cached. Callers get copies of the cached customers, so
+    that one session changing its Customer cannot affect another.
+    """
+
+    def __init__(self, backend: CustomerRepository, max_entries: int = 10_000, ttl_secs: float = 300.0):
+        """
+        :param backend: The repository to read through to on a cache miss.
+        :param max_entries: Maximum number of customers kept in the cache.
+        :param ttl_secs: Number of seconds a cached customer stays valid.
+        """
+        self.backend = backend
+        self.max_entries = max_entries
+        self.ttl_secs = ttl_secs
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, Tuple[float, Customer]] = OrderedDict()
+        self._lock = Lock()
+
+    def _lookup(self, customer_id: str, now: float) -> Optional[Customer]:
+        entry = self._entries.get(customer_id)
+        if entry is None:
+            return None
+        expires_at, customer = entry
+        if expires_at <= now:
+            del self._entries[customer_id]
+            return None
+        self._entries.move_to_end(customer_id)
+        return customer
+
+    def _store(self, customers: Dict[str, Customer], now: float) -> None:
+        expires_at = now + self.ttl_secs
+        for cid, customer in customers.items():
+            self._entries[cid] = (expires_at, customer)
+            self._entries.move_to_end(cid)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, customer_id: str) -> Optional[Customer]:
+        return self.get_many([customer_id]).get(customer_id)
+
+    def get_many(self, customer_ids: Iterable[str]) -> Dict[str, Customer]:
+        now = time.monotonic()
+        found: Dict[str, Customer] = {}
+        missing: List[str] = []
+        with self._lock:
+            for cid in customer_ids:
+                customer = self._lookup(cid, now)
+                if customer is None:
+                    missing.append(cid)
+                else:
+                    found[cid] = customer
+            self.hits += len(found)
+            self.misses += len(missing)
+
+        if missing:
+            fetched = self.backend.get_many(missing)
+            with self._lock:
+                self._store(fetched, now)
+            found.update(fetched)
+        return {cid: customer.model_copy(deep=True) for cid, customer in found.items()}
+
+    def put(self, customer: Customer) -> None:
+        self.backend.put(customer)
+        with self._lock:
+            self._store({customer.customer_id: customer.model_copy(deep=True)}, time.monotonic())
+
+    def iter_customers(self) -> Iterator[Customer]:
+        # A full scan would only evict the customers being served; read the backend directly.
+        return self.backend.iter_customers()
+
+    def invalidate(self, customer_id: Optional[str] = None) -> None:
+        """
+        Drops one customer from the cache, or all of them when no ID is given.
+        """
+        with self._lock:
+            if customer_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(customer_id, None)
+
+
+def sample_customer(customer_id: str) -> Customer:
+    """
+    Builds the demo customer profile used by the mock data for the given customer ID.
+    """
+    sample_address = Address(
+        street="123 Garden Lane",
+        city="Springfield",
+        state="IL",
+        zip="62701"
+    )
+
+    sample_purchase_1 = Purchase(
+        date="2023-03-05",
+        items=[
+            Product(product_id="fert-111", name="All-Purpose Fertilizer", quantity=1),
+            Product(product_id="trowel-222", name="Gardening Trowel", quantity=1),
+        ],
+        total_amount=35.98,
+    )
+    sample_purchase_2 = Purchase(
+        date="2023-07-12",
+        items=[
+            Product(product_id="seeds-333", name="Tomato Seeds (Variety Pack)", quantity=2),
+            Product(product_id="pots-444", name="Terracotta Pots (6-inch)", quantity=4),
+        ],
+        total_amount=42.5,
+    )
+    sample_purchase_3 = Purchase(
+        date="2024-01-20",
+        items=[
+            Product(product_id="gloves-555", name="Gardening Gloves (Leather)", quantity=1),
+            Product(product_id="pruner-666", name="Pruning Shears", quantity=1),
+        ],
+        total_amount=55.25,
+    )
+
+    sample_comm_prefs = CommunicationPreferences(
+        email=True,
+        sms=False,
+        push_notifications=True
+    )
+
+    sample_garden_profile = GardenProfile(
+        type="Vegetable Garden",
+        size="Medium",
+        sun_exposure="Full Sun",
+        soil_type="Loamy",
+        interests=["Organic Gardening", "Composting", "Herb Growing"]
+    )
+
+    return Customer(
+        account_number="ACC12345",
+        customer_id=customer_id,
+        customer_first_name="John",
+        customer_last_name="Smith",
+        email="john.smith@email.com",
+        phone_number="555-0123",
+        customer_start_date="2020-05-01",
+        years_as_customer=4,
+        billing_address=sample_address,
+        purchase_history=[sample_purchase_1, sample_purchase_2, sample_purchase_3],
+        loyalty_points=250,
+        preferred_store="Springfield Garden Center",
+        communication_preferences=sample_comm_prefs,
+        garden_profile=sample_garden_profile,
+        scheduled_appointments={}
+    )
+
+
+_repository: Optional[CustomerRepository] = None
+_repository_lock = Lock()
+
+
+def get_customer_repository() -> CustomerRepository:
+    """
+    Returns the process-wide customer repository, creating it on first use.
+    """
+    global _repository
+    if _repository is None:
+        with _repository_lock:
+            if _repository is None:
+                db_path = os.environ.get("CUSTOMER_SERVICE_DB")
+                if db_path:
+                    backend = SQLiteCustomerRepository(db_path)
+                    if backend.count() == 0:
+                        backend.put_many(sample_customer(cid) for cid in SAMPLE_CUSTOMER_IDS)
+                else:
+                    backend = InMemoryCustomerRepository(sample_customer(cid) for cid in SAMPLE_CUSTOMER_IDS)
+                _repository = CachedCustomerRepository(backend)
+    return _repository
+
+
+def set_customer_repository(repository: CustomerRepository) -> None:
+    """
+    Replaces the process-wide customer repository (e.g. with a SQLite or test repository).
+    """
+    global _repository
+    with _repository_lock:
+        _repository = repository
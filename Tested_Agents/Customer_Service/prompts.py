@@ -49,8 +49,10 @@ You have access to the following tools to assist you:
 *   `modify_cart: Updates the customer's cart. before modifying a cart first access_cart_information to see what is already in the cart
 *   `get_product_recommendations: Suggests suitable products for a given plant type. i.e petunias. before recommending a product access_cart_information so you do not recommend something already in cart. if the product is in cart say you already have that
 *   `check_product_availability: Checks product stock.
+*   `check_product_availability_batch: Checks stock of many products at many stores in one call. Use this to check a whole cart instead of checking products one by one.
 *   `schedule_planting_service: Books a planting service appointment.
 *   `get_available_planting_times: Retrieves available time slots.
+*   `get_available_planting_times_range: Retrieves available time slots for every date in a range. Use this when the customer is flexible about the date.
 *   `send_care_instructions: Sends plant care information.
 *   `generate_qr_code: Creates a discount QR code 
 
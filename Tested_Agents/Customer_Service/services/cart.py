@@ -0,0 +1,493 @@
+"""
+Shopping cart engine used by the cart tools.
+
+Carts are keyed by customer ID. Changes are applied as O(changes) updates: only the
+added or removed products are touched, and the subtotal is adjusted by the price of the
+changed quantities (looked up in a PriceIndex) instead of rescanning the cart. Amounts
+are kept in integer cents so the running subtotal never drifts.
+
+Every change increments the cart's version. Callers that read a cart and then modify it
+can pass ``expected_version`` to detect that another session changed it in between.
+"""
+
+import csv
+import os
+import sqlite3
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field, replace
+from threading import Lock
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_CATALOG_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "products.csv")
+
+# Demo cart contents for the sample customers (matches the old mock response).
+DEMO_CART_ITEMS = [
+    {"product_id": "soil-123", "quantity": 1},
+    {"product_id": "fert-456", "quantity": 1},
+]
+
+
+class CartVersionConflict(Exception):
+    """
+    Raised when a cart was modified by someone else since the caller read it.
+    """
+
+    def __init__(self, customer_id: str, expected_version: int, actual_version: int):
+        super().__init__(
+            f"Cart of customer {customer_id} is at version {actual_version}, expected {expected_version}"
+        )
+        self.customer_id = customer_id
+        self.expected_version = expected_version
+        self.actual_version = actual_version
+
+
+class InvalidCartItem(ValueError):
+    """
+    Raised when an item to add or remove is not a dict with a product_id, or has an invalid quantity.
+    """
+
+
+@dataclass
+class CatalogEntry:
+    """
+    Name and unit price (in cents) of a product.
+    """
+    product_id: str
+    name: str
+    price_cents: int
+
+
+class PriceIndex:
+    """
+    Product ID -> catalog entry lookup.
+    """
+
+    def __init__(self, entries: Iterable[CatalogEntry] = ()):
+        self._entries: Dict[str, CatalogEntry] = {e.product_id: e for e in entries}
+
+    @classmethod
+    def from_csv(cls, path: str = DEFAULT_CATALOG_PATH) -> "PriceIndex":
+        """
+        Loads the index from a catalog CSV with product_id, name and price columns.
+        """
+        with open(path, newline="") as f:
+            return cls(
+                CatalogEntry(row["product_id"], row["name"], round(float(row["price"]) * 100))
+                for row in csv.DictReader(f)
+            )
+
+    def get(self, product_id: str) -> Optional[CatalogEntry]:
+        return self._entries.get(product_id)
+
+    def set_price(self, product_id: str, name: str, price: float) -> None:
+        """
+        Adds a product or changes its price. Items already in carts keep the price they were added at.
+        """
+        self._entries[product_id] = CatalogEntry(product_id, name, round(price * 100))
+
+
+@dataclass
+class CartItem:
+    """
+    A product line in a cart, with the unit price it was added at.
+    """
+    product_id: str
+    name: str
+    quantity: int
+    unit_price_cents: int
+
+
+@dataclass
+class Cart:
+    """
+    A customer's cart.
+    """
+    customer_id: str
+    items: Dict[str, CartItem] = field(default_factory=dict)
+    subtotal_cents: int = 0
+    version: int = 0
+    discount_type: Optional[str] = None
+    discount_value: float = 0.0
+
+    @property
+    def discount_cents(self) -> int:
+        """
+        The discount applied to the subtotal: a percentage, or a flat amount in dollars.
+        """
+        if self.discount_type == "percentage":
+            return round(self.subtotal_cents * self.discount_value / 100)
+        if self.discount_type is not None:
+            return min(self.subtotal_cents, round(self.discount_value * 100))
+        return 0
+
+    def copy(self) -> "Cart":
+        return replace(self, items=dict(self.items))
+
+    def to_dict(self) -> dict:
+        """
+        Returns the cart in the format returned by the access_cart_information tool.
+        """
+        cart = {
+            "items": [
+                {"product_id": item.product_id, "name": item.name, "quantity": item.quantity}
+                for item in self.items.values()
+            ],
+            "subtotal": self.subtotal_cents / 100,
+            "version": self.version,
+        }
+        if self.discount_type is not None:
+            cart["discount"] = {"type": self.discount_type, "value": self.discount_value}
+            cart["total"] = (self.subtotal_cents - self.discount_cents) / 100
+        return cart
+
+
+@dataclass
+class CartChange:
+    """
+    The outcome of applying a set of additions and removals to a cart.
+    """
+    updated: Dict[str, Optional[CartItem]]  # product_id -> new item, or None if removed
+    subtotal_delta_cents: int
+    added: List[str]
+    removed: List[str]
+    unknown_products: List[str]
+
+
+def _checked_items(items: Iterable[dict]) -> List[dict]:
+    checked = list(items)
+    for item in checked:
+        if not isinstance(item, dict) or not item.get("product_id"):
+            raise InvalidCartItem(f"Invalid cart item {item!r}: missing product_id")
+    return checked
+
+
+def _quantity(item: dict, default: Optional[int]) -> Optional[int]:
+    value = item.get("quantity")
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise InvalidCartItem(
+            f"Invalid quantity {value!r} for product {item.get('product_id')}: quantities must be whole numbers"
+        ) from None
+
+
+def plan_change(
+        prices: PriceIndex,
+        items_to_add: Iterable[dict],
+        items_to_remove: Iterable[dict],
+        current: Callable[[str], Optional[CartItem]]
+) -> CartChange:
+    """
+    Works out the new cart lines and the subtotal change, touching only the products involved.
+
+    :param prices: The price index used for added products.
+    :param items_to_add: Items with 'product_id' and 'quantity' (default 1).
+    :param items_to_remove: Items with 'product_id' and optionally 'quantity' (default: all of it).
+    :param current: Returns the current cart line of a product, or None if it is not in the cart.
+    :return: The planned change.
+    :raises InvalidCartItem: If an item has no product_id or a quantity is not a number.
+
+    Items with a quantity of 0 or less are ignored.
+    """
+    updated: Dict[str, Optional[CartItem]] = {}
+    delta = 0
+    added: List[str] = []
+    removed: List[str] = []
+    unknown: List[str] = []
+    items_to_add = _checked_items(items_to_add)
+    items_to_remove = _checked_items(items_to_remove)
+
+    def line(product_id: str) -> Optional[CartItem]:
+        return updated[product_id] if product_id in updated else current(product_id)
+
+    for item in items_to_add:
+        product_id = item["product_id"]
+        quantity = _quantity(item, 1)
+        if quantity <= 0:
+            continue
+        existing = line(product_id)
+        if existing is not None:
+            new_item = CartItem(product_id, existing.name, existing.quantity + quantity, existing.unit_price_cents)
+        else:
+            entry = prices.get(product_id)
+            if entry is None:
+                unknown.append(product_id)
+                continue
+            new_item = CartItem(product_id, entry.name, quantity, entry.price_cents)
+        updated[product_id] = new_item
+        delta += quantity * new_item.unit_price_cents
+        added.append(product_id)
+
+    for item in items_to_remove:
+        product_id = item["product_id"]
+        quantity = _quantity(item, None)
+        existing = line(product_id)
+        if existing is None or (quantity is not None and quantity <= 0):
+            continue
+        quantity = existing.quantity if quantity is None else min(quantity, existing.quantity)
+        remaining = existing.quantity - quantity
+        updated[product_id] = (
+            CartItem(product_id, existing.name, remaining, existing.unit_price_cents) if remaining > 0 else None
+        )
+        delta -= quantity * existing.unit_price_cents
+        removed.append(product_id)
+
+    return CartChange(updated, delta, added, removed, unknown)
+
+
+class CartStore(ABC):
+    """
+    Interface of the cart storage backends.
+    """
+
+    def __init__(self, prices: PriceIndex):
+        self.prices = prices
+
+    @abstractmethod
+    def get(self, customer_id: str) -> Cart:
+        """
+        Returns the customer's cart (an empty cart at version 0 if there is none).
+        """
+
+    @abstractmethod
+    def modify(
+            self,
+            customer_id: str,
+            items_to_add: Iterable[dict],
+            items_to_remove: Iterable[dict],
+            expected_version: Optional[int] = None
+    ) -> Tuple[Cart, CartChange]:
+        """
+        Atomically applies additions and removals to the customer's cart.
+
+        :param customer_id: The ID of the customer.
+        :param items_to_add: Items with 'product_id' and 'quantity'.
+        :param items_to_remove: Items with 'product_id' and optionally 'quantity'.
+        :param expected_version: If given, the version the caller last read.
+        :return: The updated cart and the applied change.
+        :raises CartVersionConflict: If the cart is no longer at ``expected_version``.
+        :raises InvalidCartItem: If an item has no product_id or a quantity is not a number; the cart is left unchanged.
+        """
+
+    @abstractmethod
+    def set_discount(self, customer_id: str, discount_type: str, value: float) -> Cart:
+        """
+        Applies an approved discount to the customer's cart, replacing any previous discount.
+
+        :param customer_id: The ID of the customer.
+        :param discount_type: "percentage", or "flat"/"fixed" for an amount in dollars.
+        :param value: The discount value.
+        :return: The updated cart.
+        """
+
+
+class InMemoryCartStore(CartStore):
+    """
+    Cart store that keeps every cart in a dictionary.
+    """
+
+    def __init__(self, prices: PriceIndex):
+        super().__init__(prices)
+        self._carts: Dict[str, Cart] = {}
+        self._lock = Lock()
+
+    def get(self, customer_id: str) -> Cart:
+        with self._lock:
+            cart = self._carts.get(customer_id)
+            if cart is None:
+                return Cart(customer_id)
+            return cart.copy()
+
+    def modify(
+            self,
+            customer_id: str,
+            items_to_add: Iterable[dict],
+            items_to_remove: Iterable[dict],
+            expected_version: Optional[int] = None
+    ) -> Tuple[Cart, CartChange]:
+        with self._lock:
+            cart = self._carts.get(customer_id)
+            if cart is None:
+                cart = self._carts[customer_id] = Cart(customer_id)
+            if expected_version is not None and expected_version != cart.version:
+                raise CartVersionConflict(customer_id, expected_version, cart.version)
+
+            change = plan_change(self.prices, items_to_add, items_to_remove, cart.items.get)
+            for product_id, item in change.updated.items():
+                if item is None:
+                    cart.items.pop(product_id, None)
+                else:
+                    cart.items[product_id] = item
+            cart.subtotal_cents += change.subtotal_delta_cents
+            if change.updated:
+                cart.version += 1
+            return cart.copy(), change
+
+    def set_discount(self, customer_id: str, discount_type: str, value: float) -> Cart:
+        with self._lock:
+            cart = self._carts.get(customer_id)
+            if cart is None:
+                cart = self._carts[customer_id] = Cart(customer_id)
+            cart.discount_type = discount_type
+            cart.discount_value = value
+            cart.version += 1
+            return cart.copy()
+
+
+class SQLiteCartStore(CartStore):
+    """
+    Cart store backed by SQLite. Each modification runs in one write transaction and
+    reads only the cart lines it changes.
+    """
+
+    def __init__(self, prices: PriceIndex, path: str):
+        """
+        :param prices: The price index used for added products.
+        :param path: Path to the SQLite database file.
+        """
+        super().__init__(prices)
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = Lock()
+        with self._lock:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS carts (
+                    customer_id TEXT PRIMARY KEY,
+                    subtotal_cents INTEGER NOT NULL,
+                    version INTEGER NOT NULL,
+                    discount_type TEXT,
+                    discount_value REAL NOT NULL DEFAULT 0
+                );
+                CREATE TABLE IF NOT EXISTS cart_items (
+                    customer_id TEXT NOT NULL,
+                    product_id TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    quantity INTEGER NOT NULL,
+                    unit_price_cents INTEGER NOT NULL,
+                    PRIMARY KEY (customer_id, product_id)
+                );
+            """)
+
+    def get(self, customer_id: str) -> Cart:
+        with self._lock:
+            return self._read(customer_id)
+
+    def _read(self, customer_id: str) -> Cart:
+        row = self._conn.execute(
+            "SELECT subtotal_cents, version, discount_type, discount_value FROM carts WHERE customer_id = ?",
+            (customer_id,),
+        ).fetchone()
+        if row is None:
+            return Cart(customer_id)
+        items = {
+            product_id: CartItem(product_id, name, quantity, price)
+            for product_id, name, quantity, price in self._conn.execute(
+                "SELECT product_id, name, quantity, unit_price_cents FROM cart_items WHERE customer_id = ?",
+                (customer_id,),
+            )
+        }
+        return Cart(customer_id, items, *row)
+
+    def _line(self, customer_id: str, product_id: str) -> Optional[CartItem]:
+        row = self._conn.execute(
+            "SELECT name, quantity, unit_price_cents FROM cart_items WHERE customer_id = ? AND product_id = ?",
+            (customer_id, product_id),
+        ).fetchone()
+        return CartItem(product_id, *row) if row else None
+
+    def modify(
+            self,
+            customer_id: str,
+            items_to_add: Iterable[dict],
+            items_to_remove: Iterable[dict],
+            expected_version: Optional[int] = None
+    ) -> Tuple[Cart, CartChange]:
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT subtotal_cents, version FROM carts WHERE customer_id = ?", (customer_id,)
+                ).fetchone()
+                subtotal, version = row if row else (0, 0)
+                if expected_version is not None and expected_version != version:
+                    raise CartVersionConflict(customer_id, expected_version, version)
+
+                change = plan_change(
+                    self.prices, items_to_add, items_to_remove, lambda pid: self._line(customer_id, pid)
+                )
+                for product_id, item in change.updated.items():
+                    if item is None:
+                        conn.execute(
+                            "DELETE FROM cart_items WHERE customer_id = ? AND product_id = ?",
+                            (customer_id, product_id),
+                        )
+                    else:
+                        conn.execute(
+                            "INSERT OR REPLACE INTO cart_items VALUES (?, ?, ?, ?, ?)",
+                            (customer_id, product_id, item.name, item.quantity, item.unit_price_cents),
+                        )
+                if change.updated:
+                    subtotal += change.subtotal_delta_cents
+                    version += 1
+                    conn.execute(
+                        "INSERT INTO carts (customer_id, subtotal_cents, version) VALUES (?, ?, ?) "
+                        "ON CONFLICT (customer_id) DO UPDATE "
+                        "SET subtotal_cents = excluded.subtotal_cents, version = excluded.version",
+                        (customer_id, subtotal, version),
+                    )
+                # Read in the same transaction, so the result is this change and not a later one.
+                cart = self._read(customer_id)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return cart, change
+
+    def set_discount(self, customer_id: str, discount_type: str, value: float) -> Cart:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO carts (customer_id, subtotal_cents, version, discount_type, discount_value) "
+                "VALUES (?, 0, 1, ?, ?) "
+                "ON CONFLICT (customer_id) DO UPDATE "
+                "SET discount_type = excluded.discount_type, discount_value = excluded.discount_value, "
+                "version = version + 1",
+                (customer_id, discount_type, value),
+            )
+            return self._read(customer_id)
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+_store: Optional[CartStore] = None
+_store_lock = Lock()
+
+
+def get_cart_store() -> CartStore:
+    """
+    Returns the process-wide cart store, creating it on first use.
+
+    Uses SQLite when ``CUSTOMER_SERVICE_CART_DB`` is set, otherwise an in-memory store
+    seeded with the demo carts of the sample customers.
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                prices = PriceIndex.from_csv(os.environ.get("CUSTOMER_SERVICE_CATALOG_PATH", DEFAULT_CATALOG_PATH))
+                db_path = os.environ.get("CUSTOMER_SERVICE_CART_DB")
+                if db_path:
+                    store: CartStore = SQLiteCartStore(prices, db_path)
+                else:
+                    from ..entities.customer_repository import SAMPLE_CUSTOMER_IDS
+
+                    store = InMemoryCartStore(prices)
+                    for customer_id in SAMPLE_CUSTOMER_IDS:
+                        store.modify(customer_id, DEMO_CART_ITEMS, [])
+                _store = store
+    return _store
@@ -0,0 +1,149 @@
+"""
+In-memory inventory index used by the product availability tools.
+
+The index maps product -> store -> quantity, so a single availability check is two
+dictionary lookups and a whole cart can be checked against many stores in one call.
+It is bulk-loaded from CSV or Parquet and can be refreshed incrementally with
+``apply_updates`` while the agent is serving requests.
+"""
+
+import csv
+import os
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_INVENTORY_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "inventory.csv")
+
+StockRow = Tuple[str, str, int]
+
+
+class InventoryIndex:
+    """
+    Stock levels indexed by product ID and store ID.
+
+    Readers never take a lock: a full reload builds a new index and swaps it in with a
+    single assignment, and incremental updates only touch the affected entries.
+    """
+
+    def __init__(self, rows: Iterable[StockRow] = ()):
+        """
+        :param rows: Initial (product_id, store_id, quantity) rows.
+        """
+        self._stock: Dict[str, Dict[str, int]] = self._build(rows)
+        self._write_lock = Lock()
+
+    @staticmethod
+    def _build(rows: Iterable[StockRow]) -> Dict[str, Dict[str, int]]:
+        stock: Dict[str, Dict[str, int]] = {}
+        for product_id, store_id, quantity in rows:
+            stock.setdefault(product_id, {})[store_id] = int(quantity)
+        return stock
+
+    def quantity(self, product_id: str, store_id: str) -> int:
+        """
+        Returns the quantity of a product in stock at a store (0 if unknown).
+        """
+        return self._stock.get(product_id, {}).get(store_id, 0)
+
+    def availability(self, product_ids: List[str], store_ids: List[str]) -> Dict[str, Dict[str, int]]:
+        """
+        Returns the stock matrix for the given products and stores.
+
+        :param product_ids: The IDs of the products to check.
+        :param store_ids: The IDs of the stores to check.
+        :return: A dictionary of product ID -> store ID -> quantity.
+        """
+        stock = self._stock
+        empty: Dict[str, int] = {}
+        matrix = {}
+        for product_id in product_ids:
+            by_store = stock.get(product_id, empty)
+            matrix[product_id] = {store_id: by_store.get(store_id, 0) for store_id in store_ids}
+        return matrix
+
+    def bulk_load(self, rows: Iterable[StockRow]) -> None:
+        """
+        Replaces the whole index with the given (product_id, store_id, quantity) rows.
+        """
+        stock = self._build(rows)
+        with self._write_lock:
+            self._stock = stock
+
+    def apply_updates(self, rows: Iterable[StockRow]) -> int:
+        """
+        Applies incremental stock updates. A quantity of 0 removes the entry.
+
+        :param rows: (product_id, store_id, quantity) rows with the new absolute quantities.
+        :return: The number of rows applied.
+        """
+        count = 0
+        with self._write_lock:
+            stock = self._stock
+            for product_id, store_id, quantity in rows:
+                quantity = int(quantity)
+                if quantity > 0:
+                    stock.setdefault(product_id, {})[store_id] = quantity
+                else:
+                    by_store = stock.get(product_id)
+                    if by_store is not None:
+                        by_store.pop(store_id, None)
+                count += 1
+        return count
+
+    def load_file(self, path: str, incremental: bool = False) -> None:
+        """
+        Loads stock rows from a CSV or Parquet file with product_id, store_id and quantity columns.
+
+        :param path: Path to a .csv or .parquet file.
+        :param incremental: Apply the rows as updates instead of replacing the whole index.
+        """
+        rows = read_parquet(path) if path.endswith(".parquet") else read_csv(path)
+        if incremental:
+            self.apply_updates(rows)
+        else:
+            self.bulk_load(rows)
+
+    def __len__(self) -> int:
+        # Counting iterates the index, which apply_updates may be changing.
+        with self._write_lock:
+            return sum(len(by_store) for by_store in self._stock.values())
+
+
+def read_csv(path: str) -> List[StockRow]:
+    """
+    Reads (product_id, store_id, quantity) rows from a CSV file with a header row.
+    """
+    with open(path, newline="") as f:
+        return [(row["product_id"], row["store_id"], int(row["quantity"])) for row in csv.DictReader(f)]
+
+
+def read_parquet(path: str) -> List[StockRow]:
+    """
+    Reads (product_id, store_id, quantity) rows from a Parquet file. Requires pyarrow.
+    """
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Loading inventory from Parquet requires pyarrow: pip install pyarrow") from e
+
+    table = pq.read_table(path, columns=["product_id", "store_id", "quantity"]).to_pydict()
+    return list(zip(table["product_id"], table["store_id"], table["quantity"]))
+
+
+_index: Optional[InventoryIndex] = None
+_index_lock = Lock()
+
+
+def get_inventory_index() -> InventoryIndex:
+    """
+    Returns the process-wide inventory index, loading it on first use from
+    ``CUSTOMER_SERVICE_INVENTORY_PATH`` (or the bundled sample inventory).
+    """
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                index = InventoryIndex()
+                index.load_file(os.environ.get("CUSTOMER_SERVICE_INVENTORY_PATH", DEFAULT_INVENTORY_PATH))
+                _index = index
+    return _index
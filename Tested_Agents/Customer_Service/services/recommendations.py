@@ -0,0 +1,317 @@
+"""
+Precomputed product recommendations.
+
+The RecommendationIndex is built offline from the product catalog and the customers'
+purchase histories. It holds a plant type -> ranked products index and a co-purchase
+matrix, so serving a request is a dictionary lookup plus a small re-rank of a handful of
+candidates using the customer's GardenProfile and past purchases.
+
+Build an index file with:
+    python -m Tested_Agents.Customer_Service.services.recommendations --out recommendations.json
+
+and point ``CUSTOMER_SERVICE_RECOMMENDATION_INDEX`` at it. The running server picks up a
+rebuilt file on the next request after it is replaced; no restart is needed.
+"""
+
+import argparse
+import csv
+import json
+import logging
+import os
+import re
+import time
+from collections import Counter, defaultdict
+from dataclasses import asdict, dataclass
+from itertools import combinations
+from threading import Lock
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CATALOG_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "products.csv")
+
+# Products with this plant type are recommended when the plant type is unknown.
+ALL_PLANT_TYPES = "all"
+# Number of ranked candidates that are re-ranked per request.
+CANDIDATES = 8
+# Weight of one matching garden profile term relative to one co-purchase.
+PROFILE_WEIGHT = 2.0
+
+
+@dataclass
+class CatalogProduct:
+    """
+    A product that can be recommended.
+    """
+    product_id: str
+    name: str
+    description: str
+    plant_types: List[str]
+    tags: List[str]
+
+
+def _terms(text: str) -> set:
+    return set(re.findall(r"[a-z0-9]+", text.lower()))
+
+
+def read_catalog(path: str = DEFAULT_CATALOG_PATH) -> List[CatalogProduct]:
+    """
+    Reads the product catalog CSV (plant_types and tags are ';'-separated lists).
+    """
+    with open(path, newline="") as f:
+        return [
+            CatalogProduct(
+                product_id=row["product_id"],
+                name=row["name"],
+                description=row["description"],
+                plant_types=[t.strip().lower() for t in row["plant_types"].split(";") if t.strip()],
+                tags=[t.strip().lower() for t in row["tags"].split(";") if t.strip()],
+            )
+            for row in csv.DictReader(f)
+        ]
+
+
+class RecommendationIndex:
+    """
+    Immutable, precomputed recommendation data.
+    """
+
+    def __init__(
+            self,
+            products: Dict[str, CatalogProduct],
+            by_plant_type: Dict[str, List[str]],
+            co_purchases: Dict[str, Dict[str, int]]
+    ):
+        """
+        :param products: Catalog products keyed by product ID.
+        :param by_plant_type: Plant type -> product IDs, best first.
+        :param co_purchases: Product ID -> product ID -> number of purchases containing both.
+        """
+        self.products = products
+        self.by_plant_type = by_plant_type
+        self.co_purchases = co_purchases
+        self._tag_terms = {pid: _terms(" ".join(p.tags)) for pid, p in products.items()}
+
+    @classmethod
+    def build(cls, catalog: Iterable[CatalogProduct], baskets: Iterable[Iterable[str]]) -> "RecommendationIndex":
+        """
+        Builds the index.
+
+        :param catalog: The products that can be recommended, in catalog order.
+        :param baskets: The product IDs of each past purchase.
+        :return: The index.
+        """
+        catalog = list(catalog)
+        popularity: Counter = Counter()
+        co_purchases: Dict[str, Counter] = defaultdict(Counter)
+        for basket in baskets:
+            product_ids = sorted(set(basket))
+            popularity.update(product_ids)
+            for a, b in combinations(product_ids, 2):
+                co_purchases[a][b] += 1
+                co_purchases[b][a] += 1
+
+        position = {p.product_id: i for i, p in enumerate(catalog)}
+        by_plant_type: Dict[str, List[str]] = defaultdict(list)
+        for product in catalog:
+            for plant_type in product.plant_types:
+                by_plant_type[plant_type].append(product.product_id)
+        for product_ids in by_plant_type.values():
+            product_ids.sort(key=lambda pid: (-popularity[pid], position[pid]))
+
+        return cls(
+            {p.product_id: p for p in catalog},
+            dict(by_plant_type),
+            {pid: dict(counts) for pid, counts in co_purchases.items()},
+        )
+
+    def recommend(
+            self,
+            plant_type: str,
+            profile_terms: Iterable[str] = (),
+            purchased: Iterable[str] = (),
+            limit: int = 3
+    ) -> List[CatalogProduct]:
+        """
+        Returns the best products for a plant type, re-ranked for the customer.
+
+        :param plant_type: The type of plant (e.g. 'Petunias').
+        :param profile_terms: Lowercase words describing the customer's garden (type, soil, sun, interests).
+        :param purchased: Product IDs the customer bought before.
+        :param limit: Maximum number of products to return.
+        :return: The recommended products, best first.
+        """
+        candidates = self.by_plant_type.get(plant_type.strip().lower())
+        if not candidates:
+            candidates = self.by_plant_type.get(ALL_PLANT_TYPES, [])
+        candidates = candidates[:CANDIDATES]
+
+        profile_terms = set(profile_terms)
+        purchased = list(purchased)
+        scores = {}
+        for rank, pid in enumerate(candidates):
+            co_purchased = self.co_purchases.get(pid, {})
+            scores[pid] = (
+                PROFILE_WEIGHT * len(self._tag_terms[pid] & profile_terms)
+                + sum(co_purchased.get(other, 0) for other in purchased)
+                - rank / len(candidates)
+            )
+        ranked = sorted(candidates, key=scores.__getitem__, reverse=True)
+        return [self.products[pid] for pid in ranked[:limit]]
+
+    def save(self, path: str) -> None:
+        """
+        Writes the index to a JSON file atomically, so a running server never reads a partial file.
+        """
+        data = {
+            "products": [asdict(p) for p in self.products.values()],
+            "by_plant_type": self.by_plant_type,
+            "co_purchases": self.co_purchases,
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "RecommendationIndex":
+        """
+        Reads an index written by ``save``.
+        """
+        with open(path) as f:
+            data = json.load(f)
+        return cls(
+            {p["product_id"]: CatalogProduct(**p) for p in data["products"]},
+            data["by_plant_type"],
+            data["co_purchases"],
+        )
+
+
+class RecommendationEngine:
+    """
+    Serves recommendations from the current index and swaps in new indexes without downtime.
+    """
+
+    def __init__(self, index: RecommendationIndex, index_path: Optional[str] = None, check_interval_secs: float = 5.0):
+        """
+        :param index: The initial index.
+        :param index_path: Optional index file to watch; it is reloaded when its modification time changes.
+        :param check_interval_secs: Minimum time between two checks of the index file.
+        """
+        self.index = index
+        self.index_path = index_path
+        self.check_interval_secs = check_interval_secs
+        self._mtime = os.stat(index_path).st_mtime if index_path else None
+        self._next_check = time.monotonic() + check_interval_secs
+        self._reload_lock = Lock()
+
+    def swap(self, index: RecommendationIndex) -> None:
+        """
+        Replaces the index. Requests already being served keep using the old one.
+        """
+        self.index = index
+
+    def reload_if_changed(self) -> bool:
+        """
+        Reloads the index file if it changed since it was last loaded.
+
+        If the file is missing or cannot be loaded, the current index stays in use and the
+        error is logged; a later version of the file is picked up as usual.
+
+        :return: True if a new index was swapped in.
+        """
+        if not self.index_path or time.monotonic() < self._next_check:
+            return False
+        if not self._reload_lock.acquire(blocking=False):
+            return False
+        try:
+            self._next_check = time.monotonic() + self.check_interval_secs
+            try:
+                mtime = os.stat(self.index_path).st_mtime
+            except OSError as e:
+                logger.error(f"Cannot check recommendation index {self.index_path}, keeping the current one: {e}")
+                return False
+            if mtime == self._mtime:
+                return False
+            # Whether or not it loads, this version of the file is not tried again.
+            self._mtime = mtime
+            try:
+                index = RecommendationIndex.load(self.index_path)
+            except (OSError, ValueError, KeyError, TypeError):
+                logger.exception(f"Cannot load recommendation index {self.index_path}, keeping the current one")
+                return False
+            self.swap(index)
+            return True
+        finally:
+            self._reload_lock.release()
+
+    def recommend(self, plant_type: str, customer=None, limit: int = 3) -> List[CatalogProduct]:
+        """
+        Returns recommendations for a plant type, personalized for the customer if one is given.
+
+        :param plant_type: The type of plant.
+        :param customer: Optional Customer whose garden profile and purchase history are used for re-ranking.
+        :param limit: Maximum number of products to return.
+        """
+        self.reload_if_changed()
+        profile_terms: set = set()
+        purchased: List[str] = []
+        if customer is not None:
+            garden = customer.garden_profile
+            profile_terms = _terms(" ".join([garden.type, garden.soil_type, garden.sun_exposure, *garden.interests]))
+            purchased = [item.product_id for purchase in customer.purchase_history for item in purchase.items]
+        return self.index.recommend(plant_type, profile_terms, purchased, limit)
+
+
+def build_index_from_customers(catalog_path: str = DEFAULT_CATALOG_PATH) -> RecommendationIndex:
+    """
+    Builds an index from the catalog and the purchase histories in the customer repository.
+    """
+    from ..entities.customer_repository import get_customer_repository
+
+    customers = get_customer_repository().iter_customers()
+    baskets = (
+        [item.product_id for item in purchase.items]
+        for customer in customers
+        for purchase in customer.purchase_history
+    )
+    return RecommendationIndex.build(read_catalog(catalog_path), baskets)
+
+
+_engine: Optional[RecommendationEngine] = None
+_engine_lock = Lock()
+
+
+def get_recommendation_engine() -> RecommendationEngine:
+    """
+    Returns the process-wide recommendation engine.
+
+    Loads the index from ``CUSTOMER_SERVICE_RECOMMENDATION_INDEX`` (and watches it for
+    changes) if set, otherwise builds one from the bundled catalog and sample customers.
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                index_path = os.environ.get("CUSTOMER_SERVICE_RECOMMENDATION_INDEX")
+                if index_path:
+                    _engine = RecommendationEngine(RecommendationIndex.load(index_path), index_path)
+                else:
+                    _engine = RecommendationEngine(build_index_from_customers())
+    return _engine
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the product recommendation index.")
+    parser.add_argument("--catalog", default=DEFAULT_CATALOG_PATH, help="Product catalog CSV.")
+    parser.add_argument("--out", required=True, help="Path of the index file to write.")
+    args = parser.parse_args()
+
+    index = build_index_from_customers(args.catalog)
+    index.save(args.out)
+    print(f"Wrote recommendation index with {len(index.products)} products and "
+          f"{len(index.by_plant_type)} plant types to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
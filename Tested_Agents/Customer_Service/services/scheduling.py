@@ -0,0 +1,174 @@
+"""
+Planting service scheduling engine.
+
+Every date offers the same service slots (e.g. 9-12 and 13-16), each with a fixed
+number of crews. The engine only stores dates that have bookings: a sorted list of
+booked dates (for range queries via bisect) and, per date, the remaining crew capacity
+of each slot, indexed by slot start time. Dates without bookings are fully available.
+
+Bookings are atomic: the capacity check and the decrement happen under the lock of
+the date, so concurrent requests can never overbook a slot. Locks are striped by date so
+bookings for different dates rarely contend.
+
+The bookings live in the memory of one process. Under the pre-forking production
+server every worker would have its own engine and could book the same crew, so the
+Customer_Service agent must be served with ``--workers 1``.
+"""
+
+import uuid
+from bisect import bisect_left, bisect_right, insort
+from dataclasses import dataclass
+from datetime import date as Date, timedelta
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+# (start hour, end hour) of the service slots offered every day.
+DEFAULT_SLOTS: List[Tuple[int, int]] = [(9, 12), (13, 16)]
+DEFAULT_CREWS = 2
+# Longest date range a single range query may cover.
+MAX_RANGE_DAYS = 62
+
+
+class SlotUnavailable(Exception):
+    """
+    Raised when the requested slot does not exist or has no crew left.
+    """
+
+
+@dataclass
+class Appointment:
+    """
+    A booked planting service appointment.
+    """
+    appointment_id: str
+    customer_id: str
+    date: str
+    time_range: str
+    details: str
+
+
+def parse_time_range(time_range: str) -> Tuple[int, int]:
+    """
+    Parses a time range such as "9-12" into (start hour, end hour).
+    """
+    start, _, end = time_range.partition("-")
+    try:
+        return int(start.strip().split(":")[0]), int(end.strip().split(":")[0])
+    except ValueError:
+        raise ValueError(f"Invalid time range {time_range!r}; expected e.g. '9-12'") from None
+
+
+class SchedulingEngine:
+    """
+    Per-date index of crew capacity with atomic booking.
+
+    The index is per process; it is only correct while one process serves all bookings
+    (``--workers 1`` with production_server).
+    """
+
+    def __init__(self, slots: List[Tuple[int, int]] = DEFAULT_SLOTS, crews: int = DEFAULT_CREWS, lock_stripes: int = 64):
+        """
+        :param slots: The (start hour, end hour) slots offered every day.
+        :param crews: Number of crews available in each slot.
+        :param lock_stripes: Number of locks that dates are spread over.
+        """
+        self.slots = sorted(slots)
+        self.crews = crews
+        self._slot_starts = [start for start, _ in self.slots]
+        self._slot_labels = [f"{start}-{end}" for start, end in self.slots]
+        self._booked_dates: List[Date] = []
+        self._remaining: Dict[Date, List[int]] = {}
+        self._appointments: Dict[str, Appointment] = {}
+        self._index_lock = Lock()
+        self._locks = [Lock() for _ in range(lock_stripes)]
+
+    def _lock_for(self, day: Date) -> Lock:
+        return self._locks[day.toordinal() % len(self._locks)]
+
+    def _slot_index(self, time_range: str) -> int:
+        """
+        Finds the slot that contains the requested time range with a binary search over slot starts.
+        """
+        start, end = parse_time_range(time_range)
+        i = bisect_right(self._slot_starts, start) - 1
+        if i < 0 or end > self.slots[i][1] or end <= start:
+            raise SlotUnavailable(f"No planting service is offered at {time_range}. "
+                                  f"Available slots are {', '.join(self._slot_labels)}.")
+        return i
+
+    def _free_slots(self, remaining: Optional[List[int]]) -> List[str]:
+        if remaining is None:
+            return list(self._slot_labels)
+        return [label for label, left in zip(self._slot_labels, remaining) if left > 0]
+
+    def available_times(self, date: str) -> List[str]:
+        """
+        Returns the slots of a date (YYYY-MM-DD) that still have a free crew.
+        """
+        return self._free_slots(self._remaining.get(Date.fromisoformat(date)))
+
+    def available_times_range(self, start_date: str, end_date: str) -> Dict[str, List[str]]:
+        """
+        Returns the free slots of every date from start_date to end_date (inclusive).
+
+        :raises ValueError: If the dates are invalid or the range is longer than MAX_RANGE_DAYS.
+        """
+        start, end = Date.fromisoformat(start_date), Date.fromisoformat(end_date)
+        days = (end - start).days + 1
+        if days <= 0 or days > MAX_RANGE_DAYS:
+            raise ValueError(f"The date range must cover between 1 and {MAX_RANGE_DAYS} days")
+
+        booked = self._booked_dates
+        booked_in_range = set(booked[bisect_left(booked, start):bisect_right(booked, end)])
+        result = {}
+        for offset in range(days):
+            day = start + timedelta(days=offset)
+            remaining = self._remaining.get(day) if day in booked_in_range else None
+            result[day.isoformat()] = self._free_slots(remaining)
+        return result
+
+    def book(self, customer_id: str, date: str, time_range: str, details: str) -> Appointment:
+        """
+        Books a crew for the given date and slot.
+
+        :raises SlotUnavailable: If the slot does not exist or is fully booked.
+        :raises ValueError: If the date or time range is malformed, or the date is in the past.
+        """
+        day = Date.fromisoformat(date)
+        if day < Date.today():
+            raise ValueError(f"Cannot book {date}: the date is in the past")
+        i = self._slot_index(time_range)
+        with self._lock_for(day):
+            remaining = self._remaining.get(day)
+            if remaining is None:
+                remaining = [self.crews] * len(self.slots)
+                with self._index_lock:
+                    insort(self._booked_dates, day)
+                    self._remaining[day] = remaining
+            if remaining[i] <= 0:
+                raise SlotUnavailable(f"The {self._slot_labels[i]} slot on {date} is fully booked.")
+            remaining[i] -= 1
+
+        appointment = Appointment(str(uuid.uuid4()), customer_id, date, self._slot_labels[i], details)
+        self._appointments[appointment.appointment_id] = appointment
+        return appointment
+
+    def cancel(self, appointment_id: str) -> bool:
+        """
+        Cancels an appointment and frees its crew.
+
+        :return: True if the appointment existed.
+        """
+        appointment = self._appointments.pop(appointment_id, None)
+        if appointment is None:
+            return False
+        day = Date.fromisoformat(appointment.date)
+        with self._lock_for(day):
+            self._remaining[day][self._slot_labels.index(appointment.time_range)] += 1
+        return True
+
+    def appointment(self, appointment_id: str) -> Optional[Appointment]:
+        return self._appointments.get(appointment_id)
+
+
+scheduling_engine = SchedulingEngine()
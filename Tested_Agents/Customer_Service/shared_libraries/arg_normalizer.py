@@ -0,0 +1,89 @@
+"""
+Schema-driven lowercasing of tool arguments.
+
+The model is not consistent about letter case ("Percentage" vs "percentage",
+"SMS" vs "sms"), so before_tool lowercases the arguments that are matched
+case-sensitively by the tools. Only the string fields declared in TOOL_SCHEMAS are
+touched. Identifiers such as customer_id and free text such as a discount reason are
+left alone. Arguments are normalized in place in a single pass, and strings that are
+already lowercase are neither copied nor reassigned.
+"""
+
+from typing import Any, Dict, Union
+
+# Field spec marker.
+STRING = "string"  # the field is a string (or a list of strings)
+
+# A field spec is STRING, or a nested schema applied to a dict value or to every dict in
+# a list value.
+FieldSpec = Union[str, Dict[str, Any]]
+Schema = Dict[str, FieldSpec]
+
+_ITEM_SCHEMA: Schema = {"product_id": STRING}
+
+TOOL_SCHEMAS: Dict[str, Schema] = {
+    "approve_discount": {"discount_type": STRING},
+    "sync_ask_for_approval": {"discount_type": STRING},
+    "generate_qr_code": {"discount_type": STRING},
+    # Only the service name; the other CRM details are free text and stored as written.
+    "update_salesforce_crm": {"details": {"services": STRING}},
+    "modify_cart": {"items_to_add": _ITEM_SCHEMA, "items_to_remove": _ITEM_SCHEMA},
+    "get_product_recommendations": {"plant_type": STRING},
+    "check_product_availability": {"product_id": STRING, "store_id": STRING},
+    "check_product_availability_batch": {"product_ids": STRING, "store_ids": STRING},
+    "send_care_instructions": {"plant_type": STRING, "delivery_method": STRING},
+}
+
+
+def _lower(s: str) -> str:
+    """
+    Returns the lowercase string, or ``s`` itself if it has no uppercase characters.
+    """
+    if s.islower():
+        return s
+    lowered = s.lower()
+    return s if lowered == s else lowered
+
+
+def _apply(spec: FieldSpec, value: Any) -> Any:
+    if spec is STRING:
+        if isinstance(value, str):
+            return _lower(value)
+        if isinstance(value, list):
+            for i, item in enumerate(value):
+                if isinstance(item, str):
+                    lowered = _lower(item)
+                    if lowered is not item:
+                        value[i] = lowered
+        return value
+    if isinstance(value, dict):
+        _normalize(spec, value)
+    elif isinstance(value, list):
+        for item in value:
+            if isinstance(item, dict):
+                _normalize(spec, item)
+    return value
+
+
+def _normalize(schema: Schema, args: Dict[str, Any]) -> None:
+    for field, spec in schema.items():
+        value = args.get(field)
+        if value is None:
+            continue
+        normalized = _apply(spec, value)
+        if normalized is not value:
+            args[field] = normalized
+
+
+def normalize_args(tool_name: str, args: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Lowercases, in place, the string arguments that the tool's schema declares.
+
+    :param tool_name: The name of the tool being called.
+    :param args: The arguments the model sent to the tool.
+    :return: The same ``args`` dictionary.
+    """
+    schema = TOOL_SCHEMAS.get(tool_name)
+    if schema:
+        _normalize(schema, args)
+    return args
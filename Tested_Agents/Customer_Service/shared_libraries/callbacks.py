@@ -1,33 +1,29 @@
 from typing import Dict, Any, Tuple, Optional
-import time
 import logging
+import os
 
 from google.adk.agents import InvocationContext
 from google.adk.agents.callback_context import CallbackContext
-from google.adk.models import LlmRequest
+from google.adk.models import LlmRequest, LlmResponse
 from google.adk.sessions import State
 from google.adk.tools import BaseTool
 from pydantic import ValidationError
 from google.adk.tools.tool_context import ToolContext
-
-from Tested_Agents.Customer_Service.entities.customer import Customer
+from google.genai import types
+
+# Relative imports, so that the callbacks share the cart store, caches and repositories
+# with the tools however the agent package is imported (e.g. as Customer_Service.agent).
+from ..entities.customer import Customer
+from .arg_normalizer import normalize_args
+from .profile_cache import profile_cache
+from .quota import QuotaLimiter, SQLiteQuotaStore
+from .rate_limiter import RateLimiter, RateLimitExceeded, rate_limit_key
+from .tool_concurrency import assign_session_key
+from .tool_rules import tool_rules
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
 
-def lowercase_value(value):
-    """Make dictionary/list/set/tuple of strings or string lowercase"""
-    if isinstance(value, dict):
-        return (dict(key, lowercase_value(val)) for key, val in value.items())
-    elif isinstance(value, str):
-        return value.lower()
-    elif isinstance(value, (list, set, tuple)):
-        tp = type(value)
-        return tp(lowercase_value(val) for val in value)
-    else:
-        return value
-
-
 def validate_customer_id(customer_id: str, session_state: State) -> Tuple[bool, str]:
     """
     Validates the customer ID against the customer profit in the session state.
@@ -42,7 +38,7 @@ def validate_customer_id(customer_id: str, session_state: State) -> Tuple[bool,
         return False, "No customer profile selected. Please select a profile"
 
     try:
-        c = Customer.model_validate_json(session_state['customer_profile'])
+        c = profile_cache.get(session_state['customer_profile'])
         if c.customer_id == customer_id:
             return True, None
         else:
@@ -56,32 +52,16 @@ def before_tool(
         tool_context: CallbackContext
 ):
 
-    # Makesure all values that the agent is sending to tools are lowercase.
-    lowercase_value(args)
+    # Make sure the values the tools match case-sensitively are lowercase.
+    normalize_args(tool.name, args)
 
     if 'customer_id' in args:
         valid, err = validate_customer_id(args['customer_id'], tool_context.state)
         if not valid:
             return err
 
-    if tool.name == "sync_ask_for_approval":
-        amount = args.get("value", None)
-
-        if amount <= 10:
-            return {
-                "status": "approved",
-                "message": "You can approve this discount; no manager approval needed."
-            }
-
-
-    if tool.name == "modify_cart":
-        if (
-            args.get("items_added") is True and
-            args.get("items_removed") is True
-        ):
-            return {"result": "I have added and removed the requested items."}
-
-    return None
+    # Answer the calls the rules can decide (discount thresholds, guardrails, no-ops) without the tool.
+    return tool_rules.before_tool(tool.name, args, tool_context)
 
 def after_tool(
         tool: BaseTool,
@@ -89,60 +69,112 @@ def after_tool(
         tool_context: ToolContext,
         tool_response: Dict
 ) -> Optional[Dict]:
-    # After approvals, we can apply discount in the cart. Try to avoid AI calls where possible.
-    if tool.name == "sync_ask_for_approval":
-        if tool_response.get("status") == "approved":
-            logger.debug("Applying disocunt to the cart")
-            # TODO: Make changes to the cart for the discount udpate.
-
-    if tool.name == "approve_discount":
-        if tool_response.get("status") == "ok":
-            logger.debug("Applying disocunt to the cart")
-            # TODO: Make changes to the cart for the discount udpate.
+    # After approvals, apply the discount in the cart directly. Try to avoid AI calls where possible.
+    return tool_rules.after_tool(tool.name, args, tool_context, tool_response)
 
 
 def before_agent(callback_context: InvocationContext):
     # TODO: Once we implement authentication logic (Google/Microsoft SSO), get the corresponding
     # Customer profile based on login auth details.
+    assign_session_key(callback_context.state)
     if "customer_profile" not in callback_context.state:
-        callback_context.state["customer_profile"] = Customer.get_customer("CUST001").to_json()
+        customer = Customer.get_customer("CUST001")
+        if customer is None:
+            # The tools then ask for a profile to be selected instead of failing.
+            logger.warning("before_agent: customer CUST001 not found; no customer profile loaded")
+            return
+        callback_context.state["customer_profile"] = customer.to_json()
 
 
 RPM_QUOTA = 10
+TPM_QUOTA = int(os.environ.get("CUSTOMER_SERVICE_TPM_QUOTA", "250000"))
 RATE_LIMIT_SECS = 60
+# Model calls that would wait longer than this for the quota are answered with a "busy"
+# message instead. Unset means always wait.
+RATE_LIMIT_MAX_WAIT_SECS = (
+    float(os.environ["CUSTOMER_SERVICE_RATE_LIMIT_MAX_WAIT_SECS"])
+    if os.environ.get("CUSTOMER_SERVICE_RATE_LIMIT_MAX_WAIT_SECS") else None
+)
+# Rough prompt size estimate used for the TPM quota until the model reports the real usage.
+CHARS_PER_TOKEN = 4
+
+
+def get_model_rate_limiter():
+    """
+    Returns the rate limiter for model calls.
+
+    With ``CUSTOMER_SERVICE_QUOTA_DB`` set, the RPM/TPM quota is kept in that SQLite database
+    and shared by every worker process. Otherwise each process has its own token buckets,
+    which limit requests only: TPM_QUOTA is not enforced.
+    """
+    quota_db = os.environ.get("CUSTOMER_SERVICE_QUOTA_DB")
+    if quota_db:
+        return QuotaLimiter(SQLiteQuotaStore(quota_db, RPM_QUOTA, TPM_QUOTA, RATE_LIMIT_SECS))
+    if os.environ.get("CUSTOMER_SERVICE_TPM_QUOTA"):
+        logger.warning("CUSTOMER_SERVICE_TPM_QUOTA is ignored without CUSTOMER_SERVICE_QUOTA_DB; "
+                       "only the RPM quota is enforced")
+    return RateLimiter(RPM_QUOTA, RATE_LIMIT_SECS)
+
+
+# Shared by every session so the quota applies to the model/API key as a whole.
+model_rate_limiter = get_model_rate_limiter()
 
-def rate_limit_callback(
-        callback_context: InvocationContext,
+
+def estimate_tokens(llm_request: LlmRequest) -> int:
+    chars = 0
+    for content in llm_request.contents or []:
+        for part in content.parts or []:
+            if part.text:
+                chars += len(part.text)
+    return chars // CHARS_PER_TOKEN
+
+
+async def rate_limit_callback(
+        callback_context: CallbackContext,
         llm_request: LlmRequest
+) -> Optional[LlmResponse]:
+    """
+    Throttles model calls to RPM_QUOTA requests per RATE_LIMIT_SECS for each model/API key,
+    and to TPM_QUOTA tokens when the quota is kept in CUSTOMER_SERVICE_QUOTA_DB.
+
+    Waits asynchronously, so other sessions keep being served while this one is throttled.
+    If the wait would exceed RATE_LIMIT_MAX_WAIT_SECS, the model call is skipped and the
+    customer is asked to retry.
+    """
+
+    key = rate_limit_key(llm_request.model)
+    tokens = estimate_tokens(llm_request)
+    try:
+        waited = await model_rate_limiter.acquire(key, tokens, RATE_LIMIT_MAX_WAIT_SECS)
+    except RateLimitExceeded as e:
+        logger.warning(f"rate_limit_callback [key: {key}, shed, retry_after_secs: {e.retry_after_secs:.1f}]")
+        return LlmResponse(content=types.Content(role="model", parts=[types.Part(
+            text="We're handling a lot of requests right now. Please try again in a minute."
+        )]))
+
+    callback_context.state["temp:rate_limit_key"] = key
+    callback_context.state["temp:rate_limit_estimated_tokens"] = tokens
+    if waited > 0.001:
+        logger.debug(f"rate_limit_callback [key: {key}, waited_secs: {waited:.3f}]")
+
+    return None
+
+
+async def record_token_usage(
+        callback_context: CallbackContext,
+        llm_response: LlmResponse
 ) -> None:
+    """
+    Replaces the token estimate taken by rate_limit_callback with the usage the model reported.
 
-    now = time.time()
-    if "timer_start" not in callback_context.state:
-        # First request in the time window.
-        callback_context.state["timer_start"] = now
-        callback_context.state["request_count"] = 1
-        logger.debug(
-            f"rate_limit_callback [timestamp: {now}, request_count: 1, elapsed_secs: 0]"
-        )
-        return
-
-    # Increment the request count from second request onwards.
-    request_count = callback_context.state["request_count"] + 1
-    elapsed_secs = now - callback_context.state["timer_start"]
-    logger.debug(
-        f"rate_limit_callback [timestamp: {now}, request_count: {request_count}, elapsed_secs: {elapsed_secs}]"
-    )
-
-    if request_count > RPM_QUOTA:
-        delay = RATE_LIMIT_SECS - elapsed_secs + 1
-        if delay > 0:
-            logger.debug(f"Sleeping for {delay} seconds")
-            time.sleep(delay)
-
-        # Reset the timer and request count as the time window has elapsed.
-        callback_context.state["timer_start"] = now
-        callback_context.state["request_count"] = 1
-    else:
-        callback_context.state["request_count"] = request_count
-
-    return
+    The shared quota store writes to SQLite, so the usage is recorded without blocking the event loop.
+    """
+    usage = llm_response.usage_metadata
+    key = callback_context.state.get("temp:rate_limit_key")
+    if key is None or usage is None or not usage.total_token_count:
+        return None
+    recorded = callback_context.state.get("temp:rate_limit_estimated_tokens", 0)
+    # Streaming responses may report usage more than once; only the increase is recorded.
+    callback_context.state["temp:rate_limit_estimated_tokens"] = usage.total_token_count
+    await model_rate_limiter.record_tokens(key, usage.total_token_count - recorded)
+    return None
@@ -0,0 +1,135 @@
+"""
+Shared HTTP connection pool for the customer service backends.
+
+All async tools send their requests through one ``httpx.AsyncClient`` so connections
+are kept alive and reused across sessions. Each backend has its own concurrency limit
+and timeout, so a slow backend cannot take every connection in the pool.
+
+Backends are configured with environment variables named
+``CUSTOMER_SERVICE_<BACKEND>_URL`` (e.g. ``CUSTOMER_SERVICE_CART_URL``). A backend
+without a URL is not configured, and the tools fall back to their local implementation.
+"""
+
+import asyncio
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import httpx
+
+BACKENDS = ["cart", "crm", "discounts", "inventory", "notifications", "recommendations", "scheduling"]
+
+
+@dataclass
+class BackendConfig:
+    """
+    Connection settings for one backend service.
+    """
+    base_url: str
+    max_concurrency: int = 20
+    timeout_secs: float = 5.0
+
+
+class BackendPool:
+    """
+    One pooled ``httpx.AsyncClient`` shared by every backend, with per-backend concurrency limits.
+    """
+
+    def __init__(
+            self,
+            backends: Dict[str, BackendConfig],
+            max_connections: int = 100,
+            max_keepalive_connections: int = 20
+    ):
+        """
+        :param backends: Backend settings keyed by backend name.
+        :param max_connections: Maximum number of open connections across all backends.
+        :param max_keepalive_connections: Maximum number of idle connections kept alive.
+        """
+        self.backends = backends
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+        )
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    @classmethod
+    def from_env(cls) -> "BackendPool":
+        """
+        Builds the pool from the ``CUSTOMER_SERVICE_<BACKEND>_URL``,
+        ``CUSTOMER_SERVICE_<BACKEND>_MAX_CONCURRENCY`` and ``CUSTOMER_SERVICE_<BACKEND>_TIMEOUT``
+        environment variables.
+        """
+        backends = {}
+        for name in BACKENDS:
+            prefix = f"CUSTOMER_SERVICE_{name.upper()}"
+            url = os.environ.get(f"{prefix}_URL")
+            if url:
+                backends[name] = BackendConfig(
+                    base_url=url.rstrip("/"),
+                    max_concurrency=int(os.environ.get(f"{prefix}_MAX_CONCURRENCY", 20)),
+                    timeout_secs=float(os.environ.get(f"{prefix}_TIMEOUT", 5.0)),
+                )
+        return cls(backends)
+
+    def configured(self, backend: str) -> bool:
+        """
+        Returns True if a URL has been configured for the given backend.
+        """
+        return backend in self.backends
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(limits=self.limits)
+        return self._client
+
+    def _get_semaphore(self, backend: str) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(backend)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.backends[backend].max_concurrency)
+            self._semaphores[backend] = semaphore
+        return semaphore
+
+    async def request(
+            self,
+            backend: str,
+            method: str,
+            path: str,
+            *,
+            params: Optional[Dict[str, Any]] = None,
+            json: Any = None
+    ) -> Any:
+        """
+        Sends a request to a backend and returns the decoded JSON response.
+
+        :param backend: The name of the backend (e.g. "cart").
+        :param method: The HTTP method.
+        :param path: The path relative to the backend's base URL.
+        :param params: Query string parameters.
+        :param json: JSON request body.
+        :return: The decoded JSON response body.
+        :raises httpx.HTTPError: If the request fails, times out or returns an error status.
+        """
+        config = self.backends[backend]
+        async with self._get_semaphore(backend):
+            response = await self._get_client().request(
+                method,
+                f"{config.base_url}{path}",
+                params=params,
+                json=json,
+                timeout=config.timeout_secs,
+            )
+        response.raise_for_status()
+        return response.json()
+
+    async def aclose(self) -> None:
+        """
+        Closes all pooled connections.
+        """
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+backend_pool = BackendPool.from_env()
@@ -0,0 +1,82 @@
+"""
+Cache of parsed customer profiles.
+
+The session state keeps the customer profile as JSON (the format produced by
+``Customer.to_json``). Parsing it with pydantic on every tool call is wasteful, so the
+parsed ``Customer`` is cached under a digest of the JSON. A session whose
+``customer_profile`` changes gets a new digest, so stale entries are never returned and
+simply age out of the LRU.
+"""
+
+import hashlib
+from collections import OrderedDict
+from threading import Lock
+from typing import Optional
+
+from ..entities.customer import Customer
+
+
+class ProfileCache:
+    """
+    Bounded LRU cache mapping the digest of a profile JSON string to the parsed Customer.
+
+    The cached Customer objects are shared between callers and must be treated as read-only.
+    To change a profile, write the new JSON to the session state.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        """
+        :param max_entries: Maximum number of parsed profiles kept in memory.
+        """
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[bytes, Customer] = OrderedDict()
+        self._lock = Lock()
+
+    @staticmethod
+    def digest(profile_json: str) -> bytes:
+        """
+        Returns the content digest used as the cache key for a profile JSON string.
+        """
+        return hashlib.blake2b(profile_json.encode(), digest_size=16).digest()
+
+    def get(self, profile_json: str) -> Customer:
+        """
+        Returns the parsed Customer for the given profile JSON, parsing it only on a cache miss.
+
+        :param profile_json: The customer profile JSON stored in the session state.
+        :return: The parsed Customer.
+        :raises ValidationError: If the JSON is not a valid customer profile.
+        """
+        key = self.digest(profile_json)
+        with self._lock:
+            customer = self._entries.get(key)
+            if customer is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return customer
+
+        customer = Customer.model_validate_json(profile_json)
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = customer
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return customer
+
+    def invalidate(self, profile_json: Optional[str] = None) -> None:
+        """
+        Drops the entry for the given profile JSON, or every entry when no JSON is given.
+        """
+        with self._lock:
+            if profile_json is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(self.digest(profile_json), None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+profile_cache = ProfileCache()
@@ -0,0 +1,332 @@
+"""
+Quota accounting shared by every worker process.
+
+The token buckets in rate_limiter.py live in one process. With several uvicorn workers,
+each worker would grant the full quota on its own. A QuotaStore keeps a sliding window
+of the requests and tokens used per rate limit key instead:
+
+- LocalQuotaStore keeps the window in memory for a single process.
+- SQLiteQuotaStore keeps it in a SQLite database (WAL) that all workers on the host
+  open. The check and the insert run in one ``BEGIN IMMEDIATE`` transaction, so two
+  workers can never both take the last request of the window.
+
+Both enforce requests-per-minute (RPM) and tokens-per-minute (TPM) limits. They report
+the budget left and when the next request would be allowed, so callers can shed load
+early instead of sleeping.
+
+Set ``CUSTOMER_SERVICE_QUOTA_DB`` to the path of the database to share the quota across
+workers; ``get_model_rate_limiter`` in callbacks.py then uses a QuotaLimiter.
+"""
+
+import asyncio
+import os
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from dataclasses import dataclass
+from threading import Lock
+from typing import Deque, Dict, Iterable, Optional, Tuple
+
+from .rate_limiter import RateLimitExceeded
+
+DEFAULT_WINDOW_SECS = 60.0
+
+
+@dataclass
+class QuotaBudget:
+    """
+    What a rate limit key may still use in the current window.
+    """
+    requests: int
+    tokens: int
+    # Seconds until a request of the size asked for would be allowed (0 if allowed now).
+    retry_after_secs: float = 0.0
+
+
+@dataclass
+class QuotaDecision:
+    """
+    The outcome of an attempt to take quota.
+    """
+    allowed: bool
+    budget: QuotaBudget
+
+
+def _retry_after(
+        events: Iterable[Tuple[float, int, int]],
+        requests_over: int,
+        tokens_over: int,
+        window_secs: float,
+        now: float
+) -> float:
+    """
+    Returns when enough of the oldest events leave the window to free the missing requests and tokens.
+
+    :param events: (timestamp, requests, tokens) of the events in the window, oldest first.
+    :param requests_over: Requests that must expire first.
+    :param tokens_over: Tokens that must expire first.
+    """
+    for ts, requests, tokens in events:
+        if requests_over <= 0 and tokens_over <= 0:
+            break
+        requests_over -= requests
+        tokens_over -= tokens
+        if requests_over <= 0 and tokens_over <= 0:
+            return max(0.0, ts + window_secs - now)
+    return 0.0 if requests_over <= 0 and tokens_over <= 0 else window_secs
+
+
+class QuotaStore(ABC):
+    """
+    Sliding-window RPM/TPM accounting per rate limit key.
+    """
+
+    def __init__(self, requests_per_window: int, tokens_per_window: int, window_secs: float = DEFAULT_WINDOW_SECS):
+        """
+        :param requests_per_window: Requests allowed per key in each window (RPM for a 60s window).
+        :param tokens_per_window: Tokens allowed per key in each window (TPM for a 60s window).
+        :param window_secs: Length of the sliding window.
+        """
+        if requests_per_window <= 0 or tokens_per_window <= 0 or window_secs <= 0:
+            raise ValueError("quota limits and window must be positive")
+        self.requests_per_window = requests_per_window
+        self.tokens_per_window = tokens_per_window
+        self.window_secs = window_secs
+
+    def _decide(
+            self,
+            used_requests: int,
+            used_tokens: int,
+            tokens: int,
+            events: Iterable[Tuple[float, int, int]],
+            now: float
+    ) -> QuotaDecision:
+        # A request larger than the whole TPM budget is allowed once the window is empty,
+        # otherwise it could never run.
+        tokens_needed = min(tokens, self.tokens_per_window)
+        requests_over = used_requests + 1 - self.requests_per_window
+        tokens_over = used_tokens + tokens_needed - self.tokens_per_window
+        allowed = requests_over <= 0 and tokens_over <= 0
+        if allowed:
+            used_requests += 1
+            used_tokens += tokens
+        budget = QuotaBudget(
+            requests=max(0, self.requests_per_window - used_requests),
+            tokens=max(0, self.tokens_per_window - used_tokens),
+            retry_after_secs=0.0 if allowed else _retry_after(events, requests_over, tokens_over, self.window_secs, now),
+        )
+        return QuotaDecision(allowed, budget)
+
+    @abstractmethod
+    def try_acquire(self, key: str, tokens: int = 0) -> QuotaDecision:
+        """
+        Takes one request and ``tokens`` tokens of the quota of ``key`` if both are available.
+
+        Nothing is taken if the request is not allowed.
+        """
+
+    @abstractmethod
+    def record_tokens(self, key: str, tokens: int) -> None:
+        """
+        Adds (or, if negative, gives back) tokens without counting a request, e.g. to replace
+        the estimate taken by try_acquire with the usage the model reported.
+        """
+
+    @abstractmethod
+    def remaining(self, key: str, tokens: int = 0) -> QuotaBudget:
+        """
+        Returns the budget left for ``key`` without taking any of it.
+
+        :param tokens: Size of the next request, used to compute ``retry_after_secs``.
+        """
+
+
+class LocalQuotaStore(QuotaStore):
+    """
+    In-memory quota store for a single process.
+    """
+
+    def __init__(self, requests_per_window: int, tokens_per_window: int, window_secs: float = DEFAULT_WINDOW_SECS):
+        super().__init__(requests_per_window, tokens_per_window, window_secs)
+        self._events: Dict[str, Deque[Tuple[float, int, int]]] = {}
+        self._lock = Lock()
+
+    def _window(self, key: str, now: float) -> Tuple[Deque[Tuple[float, int, int]], int, int]:
+        events = self._events.setdefault(key, deque())
+        cutoff = now - self.window_secs
+        while events and events[0][0] <= cutoff:
+            events.popleft()
+        return events, sum(e[1] for e in events), sum(e[2] for e in events)
+
+    def try_acquire(self, key: str, tokens: int = 0) -> QuotaDecision:
+        with self._lock:
+            now = time.time()
+            events, used_requests, used_tokens = self._window(key, now)
+            decision = self._decide(used_requests, used_tokens, tokens, events, now)
+            if decision.allowed:
+                events.append((now, 1, tokens))
+            return decision
+
+    def record_tokens(self, key: str, tokens: int) -> None:
+        if tokens:
+            with self._lock:
+                self._events.setdefault(key, deque()).append((time.time(), 0, tokens))
+
+    def remaining(self, key: str, tokens: int = 0) -> QuotaBudget:
+        with self._lock:
+            now = time.time()
+            events, used_requests, used_tokens = self._window(key, now)
+            budget = self._decide(used_requests, used_tokens, tokens, events, now).budget
+            return QuotaBudget(
+                requests=max(0, self.requests_per_window - used_requests),
+                tokens=max(0, self.tokens_per_window - used_tokens),
+                retry_after_secs=budget.retry_after_secs,
+            )
+
+
+class SQLiteQuotaStore(QuotaStore):
+    """
+    Quota store in a SQLite database shared by the worker processes of a host.
+
+    Each process opens its own connection (a connection inherited across fork is reopened),
+    and every check-and-take runs in a ``BEGIN IMMEDIATE`` transaction, which serializes
+    writers across processes.
+    """
+
+    def __init__(
+            self,
+            path: str,
+            requests_per_window: int,
+            tokens_per_window: int,
+            window_secs: float = DEFAULT_WINDOW_SECS,
+            busy_timeout_secs: float = 5.0
+    ):
+        """
+        :param path: Path to the SQLite database file shared by the workers.
+        :param busy_timeout_secs: How long a worker waits for another worker's transaction.
+        """
+        super().__init__(requests_per_window, tokens_per_window, window_secs)
+        self.path = path
+        self.busy_timeout_secs = busy_timeout_secs
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._lock = Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(
+                self.path, timeout=self.busy_timeout_secs, check_same_thread=False, isolation_level=None
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS quota_events (
+                    key TEXT NOT NULL,
+                    ts REAL NOT NULL,
+                    requests INTEGER NOT NULL,
+                    tokens INTEGER NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS quota_events_key_ts ON quota_events (key, ts);
+            """)
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def _window(self, conn: sqlite3.Connection, key: str, now: float) -> Tuple[int, int]:
+        conn.execute("DELETE FROM quota_events WHERE key = ? AND ts <= ?", (key, now - self.window_secs))
+        used_requests, used_tokens = conn.execute(
+            "SELECT COALESCE(SUM(requests), 0), COALESCE(SUM(tokens), 0) FROM quota_events WHERE key = ?", (key,)
+        ).fetchone()
+        return used_requests, used_tokens
+
+    def _events(self, conn: sqlite3.Connection, key: str):
+        return conn.execute("SELECT ts, requests, tokens FROM quota_events WHERE key = ? ORDER BY ts", (key,))
+
+    def _check(self, key: str, tokens: int, take: bool) -> QuotaDecision:
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                used_requests, used_tokens = self._window(conn, key, now)
+                # The events are only read when the request has to wait.
+                decision = self._decide(used_requests, used_tokens, tokens, [], now)
+                if not decision.allowed:
+                    decision = self._decide(used_requests, used_tokens, tokens, self._events(conn, key), now)
+                elif take:
+                    conn.execute("INSERT INTO quota_events VALUES (?, ?, 1, ?)", (key, now, tokens))
+                else:
+                    decision.budget.requests += 1
+                    decision.budget.tokens += tokens
+                conn.execute("COMMIT")
+                return decision
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def try_acquire(self, key: str, tokens: int = 0) -> QuotaDecision:
+        return self._check(key, tokens, take=True)
+
+    def record_tokens(self, key: str, tokens: int) -> None:
+        if tokens:
+            with self._lock:
+                self._connection().execute("INSERT INTO quota_events VALUES (?, ?, 0, ?)", (key, time.time(), tokens))
+
+    def remaining(self, key: str, tokens: int = 0) -> QuotaBudget:
+        return self._check(key, tokens, take=False).budget
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+
+
+class QuotaLimiter:
+    """
+    Async front end for a QuotaStore, interchangeable with rate_limiter.RateLimiter.
+    """
+
+    def __init__(self, store: QuotaStore):
+        self.store = store
+
+    async def acquire(self, key: str, tokens: int = 0, max_wait_secs: Optional[float] = None) -> float:
+        """
+        Waits until the quota of ``key`` allows one more request of ``tokens`` tokens and takes it.
+
+        The store is called in a worker thread, so waiting for another worker's transaction
+        never blocks the event loop.
+
+        :param key: The rate limit key.
+        :param tokens: Estimated tokens of the request.
+        :param max_wait_secs: Raise RateLimitExceeded instead of waiting longer than this.
+        :return: The number of seconds the caller had to wait.
+        :raises RateLimitExceeded: If the quota would not allow the request within ``max_wait_secs``.
+        """
+        start = time.monotonic()
+        while True:
+            decision = await asyncio.to_thread(self.store.try_acquire, key, tokens)
+            if decision.allowed:
+                return time.monotonic() - start
+            retry_after = decision.budget.retry_after_secs
+            waited = time.monotonic() - start
+            if max_wait_secs is not None and waited + retry_after > max_wait_secs:
+                raise RateLimitExceeded(key, retry_after)
+            # Another worker may take the freed quota first, in which case the loop waits again.
+            await asyncio.sleep(max(retry_after, 0.01))
+
+    async def record_tokens(self, key: str, tokens: int) -> None:
+        """
+        Adds (or gives back) tokens for ``key`` in a worker thread; see QuotaStore.record_tokens.
+        """
+        if tokens:
+            await asyncio.to_thread(self.store.record_tokens, key, tokens)
+
+    async def remaining(self, key: str) -> Dict[str, int]:
+        """
+        Returns the requests and tokens ``key`` may still use in the current window.
+
+        The SQLite store reads the window in a write transaction, so this runs in a worker thread.
+        """
+        budget = await asyncio.to_thread(self.store.remaining, key)
+        return {"requests": budget.requests, "tokens": budget.tokens}
@@ -0,0 +1,202 @@
+"""
+Process-wide asynchronous rate limiting for model calls.
+
+The limiter is shared by every session served by the process, so a quota such as
+"10 requests per minute" is enforced for the model/API key as a whole rather than
+per conversation. Waiting is done with ``await asyncio.sleep`` so a throttled
+session never blocks the event loop that serves the other sessions.
+"""
+
+import asyncio
+import hashlib
+import os
+import time
+from dataclasses import dataclass, asdict
+from typing import Dict, Optional
+
+
+class RateLimitExceeded(Exception):
+    """
+    Raised instead of waiting when the wait for the quota would exceed the caller's limit.
+    """
+
+    def __init__(self, key: str, retry_after_secs: float):
+        super().__init__(f"Rate limit for {key} exceeded; retry in {retry_after_secs:.1f}s")
+        self.key = key
+        self.retry_after_secs = retry_after_secs
+
+
+@dataclass
+class RateLimiterMetrics:
+    """
+    Counters describing how a single token bucket has been used.
+    """
+    acquired: int = 0
+    throttled: int = 0
+    shed: int = 0
+    total_wait_secs: float = 0.0
+    max_wait_secs: float = 0.0
+    queue_depth: int = 0
+    max_queue_depth: int = 0
+
+    @property
+    def avg_wait_secs(self) -> float:
+        return self.total_wait_secs / self.acquired if self.acquired else 0.0
+
+
+class TokenBucket:
+    """
+    Token bucket that refills continuously and serves waiters in arrival order.
+
+    ``asyncio.Lock`` hands the lock to its waiters first-in first-out, so holding the
+    lock while waiting for the next token gives a fair queue for free.
+    """
+
+    def __init__(self, capacity: int, period_secs: float):
+        """
+        :param capacity: Maximum number of requests allowed in a burst (the quota per period).
+        :param period_secs: Length of the period over which ``capacity`` tokens are refilled.
+        """
+        if capacity <= 0 or period_secs <= 0:
+            raise ValueError("capacity and period_secs must be positive")
+
+        self.capacity = capacity
+        self.refill_rate = capacity / period_secs
+        self.metrics = RateLimiterMetrics()
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.refill_rate)
+        self._updated = now
+
+    def available(self) -> float:
+        """
+        Returns the number of tokens that could be consumed right now.
+        """
+        self._refill(time.monotonic())
+        return self._tokens
+
+    def estimated_wait(self) -> float:
+        """
+        Returns how long a new caller would wait, given the tokens left and the callers already queued.
+        """
+        missing = self.metrics.queue_depth + 1 - self.available()
+        return max(0.0, missing / self.refill_rate)
+
+    async def acquire(self, max_wait_secs: Optional[float] = None) -> float:
+        """
+        Waits until a token is available and consumes it.
+
+        :param max_wait_secs: Raise RateLimitExceeded instead of queueing if the wait would be longer.
+        :return: The number of seconds the caller had to wait.
+        """
+        metrics = self.metrics
+        if max_wait_secs is not None:
+            wait = self.estimated_wait()
+            if wait > max_wait_secs:
+                metrics.shed += 1
+                raise RateLimitExceeded("bucket", wait)
+
+        start = time.monotonic()
+        metrics.queue_depth += 1
+        metrics.max_queue_depth = max(metrics.max_queue_depth, metrics.queue_depth)
+        try:
+            async with self._lock:
+                self._refill(time.monotonic())
+                while self._tokens < 1:
+                    await asyncio.sleep((1 - self._tokens) / self.refill_rate)
+                    self._refill(time.monotonic())
+                self._tokens -= 1
+        finally:
+            metrics.queue_depth -= 1
+
+        waited = time.monotonic() - start
+        metrics.acquired += 1
+        metrics.total_wait_secs += waited
+        metrics.max_wait_secs = max(metrics.max_wait_secs, waited)
+        if waited > 0.001:
+            metrics.throttled += 1
+        return waited
+
+
+class RateLimiter:
+    """
+    A collection of token buckets, one per rate limit key (e.g. model and API key).
+
+    Only requests are limited: token counts are accepted for interface compatibility with
+    quota.QuotaLimiter but ignored, so there is no TPM limit in-process.
+    """
+
+    def __init__(self, requests_per_period: int, period_secs: float):
+        """
+        :param requests_per_period: Number of requests allowed per key in each period.
+        :param period_secs: Length of the period in seconds.
+        """
+        self.requests_per_period = requests_per_period
+        self.period_secs = period_secs
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    def bucket(self, key: str) -> TokenBucket:
+        """
+        Returns the bucket for the given key, creating it on first use.
+        """
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(self.requests_per_period, self.period_secs)
+        return bucket
+
+    async def acquire(self, key: str, tokens: int = 0, max_wait_secs: Optional[float] = None) -> float:
+        """
+        Waits for the rate limit of ``key`` to allow one more request.
+
+        :param key: The rate limit key.
+        :param tokens: Estimated tokens of the request. Only requests are limited in-process; see quota.QuotaLimiter for TPM limits.
+        :param max_wait_secs: Raise RateLimitExceeded instead of waiting longer than this.
+        :return: The number of seconds the caller had to wait.
+        """
+        try:
+            return await self.bucket(key).acquire(max_wait_secs)
+        except RateLimitExceeded as e:
+            raise RateLimitExceeded(key, e.retry_after_secs) from None
+
+    async def record_tokens(self, key: str, tokens: int) -> None:
+        """
+        Does nothing: token usage is not limited in-process; see quota.QuotaLimiter.
+        """
+
+    async def remaining(self, key: str) -> Dict[str, int]:
+        """
+        Returns the requests ``key`` may still make right now without waiting.
+        """
+        return {"requests": int(self.bucket(key).available())}
+
+    def snapshot(self) -> Dict[str, dict]:
+        """
+        Returns the queue depth and wait time metrics of every bucket, keyed by rate limit key.
+        """
+        snapshot = {}
+        for key, bucket in self._buckets.items():
+            stats = asdict(bucket.metrics)
+            stats["avg_wait_secs"] = bucket.metrics.avg_wait_secs
+            stats["available_tokens"] = bucket.available()
+            snapshot[key] = stats
+        return snapshot
+
+
+def rate_limit_key(model: Optional[str]) -> str:
+    """
+    Builds the rate limit key for a model call.
+
+    Quotas are granted per model and per API key, so the key combines both. Only a
+    fingerprint of the API key is used so the secret never ends up in logs or metrics.
+
+    :param model: The model name from the LLM request.
+    :return: The rate limit key.
+    """
+    model = model or "default"
+    api_key = os.environ.get("GOOGLE_API_KEY")
+    if not api_key:
+        return model
+    return f"{model}:{hashlib.sha256(api_key.encode()).hexdigest()[:12]}"
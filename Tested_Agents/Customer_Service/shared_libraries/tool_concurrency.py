@@ -0,0 +1,92 @@
+"""
+Per-session cap on concurrently running tool calls.
+
+When the model asks for several tools in one turn, ADK runs the async tools of that turn
+concurrently. The limiter keeps one session from flooding the backends with an unbounded
+number of calls: extra calls wait for a free slot and then run in arrival order.
+"""
+
+import asyncio
+import os
+import uuid
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional
+
+from google.adk.sessions import State
+from google.adk.tools.tool_context import ToolContext
+
+# Session state key holding the ID the limiter groups a session's tool calls by.
+SESSION_KEY = "tool_concurrency_key"
+
+
+class SessionConcurrencyLimiter:
+    """
+    Caps the number of tool calls in flight for each session.
+    """
+
+    def __init__(self, max_in_flight: int):
+        """
+        :param max_in_flight: Maximum number of tool calls a single session may run at once.
+        """
+        if max_in_flight <= 0:
+            raise ValueError("max_in_flight must be positive")
+        self.max_in_flight = max_in_flight
+        # session id -> [semaphore, number of calls holding or waiting for a slot]
+        self._sessions: Dict[str, List] = {}
+
+    @asynccontextmanager
+    async def slot(self, session_id: Optional[str]) -> AsyncIterator[None]:
+        """
+        Waits for a free slot of the session and holds it for the duration of the block.
+
+        :param session_id: The session making the tool call. None disables the cap.
+        """
+        if session_id is None:
+            yield
+            return
+
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            entry = self._sessions[session_id] = [asyncio.Semaphore(self.max_in_flight), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._sessions[session_id]
+
+    def in_flight(self, session_id: str) -> int:
+        """
+        Returns the number of tool calls of the session that are running or waiting for a slot.
+        """
+        entry = self._sessions.get(session_id)
+        return entry[1] if entry else 0
+
+
+def assign_session_key(state: State) -> None:
+    """
+    Stores the limiter key in the session state, unless the session has one already.
+
+    Called from before_agent: tool calls of one turn run concurrently, so they cannot
+    agree on a key they would each create themselves.
+    """
+    if SESSION_KEY not in state:
+        state[SESSION_KEY] = uuid.uuid4().hex
+
+
+def session_id_of(tool_context: Optional[ToolContext]) -> Optional[str]:
+    """
+    Returns the key of the session a tool is called from, or None outside of an agent run.
+
+    Sessions without a key (assign_session_key was not called) are limited per invocation.
+    """
+    if tool_context is None:
+        return None
+    return tool_context.state.get(SESSION_KEY) or tool_context.invocation_id
+
+
+tool_call_limiter = SessionConcurrencyLimiter(
+    int(os.environ.get("CUSTOMER_SERVICE_MAX_TOOL_CALLS_PER_SESSION", 4))
+)
@@ -0,0 +1,293 @@
+"""
+Declarative rules that answer or post-process tool calls without the model.
+
+A ToolRule matches a call by tool name and a set of conditions on its arguments (and,
+for "after" rules, on the tool response). When it matches, its response replaces the
+tool call ("before" rules) or the tool response ("after" rules), and its side effect is
+applied directly, e.g. an approved discount is written to the cart instead of leaving it
+to another model turn.
+
+Rules are compiled once into a dispatch table keyed by (phase, tool name), so a tool call
+only evaluates the rules of its own tool. Every rule counts its hits, which
+RuleEngine.stats() reports together with the tool calls the "before" rules saved.
+"""
+
+import logging
+import operator
+from collections import defaultdict
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from ..services.cart import get_cart_store
+from .profile_cache import profile_cache
+
+logger = logging.getLogger(__name__)
+
+BEFORE = "before"
+AFTER = "after"
+
+# Condition operators: a condition is {field: (op, operand)}.
+_OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "in": lambda value, operand: value in operand,
+    "empty": lambda value, operand: (not value) is operand,
+}
+
+Conditions = Dict[str, Tuple[str, Any]]
+Predicate = Callable[[Dict[str, Any]], bool]
+
+
+@dataclass
+class ToolCall:
+    """
+    The tool call a rule is evaluated against.
+    """
+    tool_name: str
+    args: Dict[str, Any]
+    tool_context: Any
+    tool_response: Optional[Dict] = None
+
+
+@dataclass
+class ToolRule:
+    """
+    A declarative rule for a single tool.
+
+    ``when`` holds the conditions on the tool arguments and ``when_response`` those on the
+    tool response ("after" rules only). All conditions must hold for the rule to match.
+    ``respond`` is either a fixed response or a callable receiving the ToolCall; returning
+    None from the callable lets the call through unchanged. ``side_effect`` runs before
+    the response is built.
+    """
+    name: str
+    tool: str
+    phase: str = BEFORE
+    when: Conditions = field(default_factory=dict)
+    when_response: Conditions = field(default_factory=dict)
+    respond: Any = None
+    side_effect: Optional[Callable[[ToolCall], None]] = None
+    skip_summarization: bool = False
+
+
+def _compile_conditions(conditions: Conditions) -> List[Predicate]:
+    predicates = []
+    for field_name, (op, operand) in conditions.items():
+        if op not in _OPERATORS:
+            raise ValueError(f"Unknown rule operator {op!r} for field {field_name!r}")
+        compare = _OPERATORS[op]
+
+        def predicate(values: Dict[str, Any], _field=field_name, _compare=compare, _operand=operand) -> bool:
+            try:
+                return bool(_compare(values.get(_field), _operand))
+            except TypeError:
+                # e.g. the model omitted a numeric argument: the rule does not apply.
+                return False
+
+        predicates.append(predicate)
+    return predicates
+
+
+@dataclass
+class _CompiledRule:
+    rule: ToolRule
+    arg_predicates: List[Predicate]
+    response_predicates: List[Predicate]
+    hits: int = 0
+
+    def matches(self, call: ToolCall) -> bool:
+        if not all(p(call.args) for p in self.arg_predicates):
+            return False
+        response = call.tool_response if isinstance(call.tool_response, dict) else {}
+        return all(p(response) for p in self.response_predicates)
+
+
+class RuleEngine:
+    """
+    Evaluates ToolRules from a dispatch table keyed by phase and tool name.
+    """
+
+    def __init__(self, rules: Iterable[ToolRule] = ()):
+        self._table: Dict[Tuple[str, str], List[_CompiledRule]] = defaultdict(list)
+        self._rules: Dict[str, _CompiledRule] = {}
+        self._lock = Lock()
+        for rule in rules:
+            self.add(rule)
+
+    def add(self, rule: ToolRule) -> None:
+        """
+        Compiles a rule and adds it to the dispatch table. Rules of a tool are tried in the order they were added.
+        """
+        if rule.phase not in (BEFORE, AFTER):
+            raise ValueError(f"Rule {rule.name!r} has unknown phase {rule.phase!r}")
+        if rule.when_response and rule.phase != AFTER:
+            raise ValueError(f"Rule {rule.name!r} has response conditions but is not an 'after' rule")
+        if rule.name in self._rules:
+            raise ValueError(f"Duplicate rule name {rule.name!r}")
+        compiled = _CompiledRule(rule, _compile_conditions(rule.when), _compile_conditions(rule.when_response))
+        self._rules[rule.name] = compiled
+        self._table[(rule.phase, rule.tool)].append(compiled)
+
+    def _dispatch(self, phase: str, call: ToolCall) -> Optional[Dict]:
+        for compiled in self._table.get((phase, call.tool_name), ()):
+            if not compiled.matches(call):
+                continue
+            rule = compiled.rule
+            if rule.side_effect is not None:
+                rule.side_effect(call)
+            response = rule.respond(call) if callable(rule.respond) else rule.respond
+            if response is None:
+                continue
+            with self._lock:
+                compiled.hits += 1
+            if rule.skip_summarization and call.tool_context is not None:
+                call.tool_context.actions.skip_summarization = True
+            logger.debug(f"Tool rule {rule.name} answered {phase} {call.tool_name}")
+            return dict(response)
+        return None
+
+    def before_tool(self, tool_name: str, args: Dict[str, Any], tool_context=None) -> Optional[Dict]:
+        """
+        Returns the response of the first matching "before" rule, which replaces the tool call, or None.
+        """
+        return self._dispatch(BEFORE, ToolCall(tool_name, args, tool_context))
+
+    def after_tool(self, tool_name: str, args: Dict[str, Any], tool_context, tool_response: Dict) -> Optional[Dict]:
+        """
+        Returns the response of the first matching "after" rule, which replaces the tool response, or None.
+        """
+        return self._dispatch(AFTER, ToolCall(tool_name, args, tool_context, tool_response))
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Returns the hits of every rule with the tool calls they saved.
+        """
+        with self._lock:
+            return {
+                name: {
+                    "hits": c.hits,
+                    "tool_calls_saved": c.hits if c.rule.phase == BEFORE else 0,
+                }
+                for name, c in self._rules.items()
+            }
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            for compiled in self._rules.values():
+                compiled.hits = 0
+
+
+def _session_customer_id(call: ToolCall) -> Optional[str]:
+    """
+    Returns the customer ID of the session's profile, or None if there is none or it can't be parsed.
+    """
+    state = getattr(call.tool_context, "state", None)
+    if state is None or "customer_profile" not in state:
+        return None
+    try:
+        return profile_cache.get(state["customer_profile"]).customer_id
+    except ValidationError as e:
+        logger.warning(f"Skipping the rule: the customer profile couldn't be parsed: {e}")
+        return None
+
+
+def _apply_discount(call: ToolCall) -> Optional[Dict]:
+    """
+    Writes an approved discount to the session customer's cart and returns the response with the updated cart.
+    """
+    customer_id = _session_customer_id(call)
+    response = dict(call.tool_response or {})
+    if customer_id is None:
+        return None
+    discount_type, value = call.args.get("discount_type"), call.args.get("value")
+    if discount_type is None or value is None:
+        return None
+
+    store = get_cart_store()
+    cart = store.get(customer_id)
+    if cart.discount_type != discount_type or cart.discount_value != value:
+        logger.debug(f"Applying {discount_type} discount of {value} to the cart of {customer_id}")
+        cart = store.set_discount(customer_id, discount_type, value)
+    response["cart"] = cart.to_dict()
+    return response
+
+
+def _approve_small_discount(call: ToolCall) -> Optional[Dict]:
+    call.tool_response = {
+        "status": "approved",
+        "message": "You can approve this discount; no manager approval needed.",
+    }
+    return _apply_discount(call) or call.tool_response
+
+
+def _unchanged_cart(call: ToolCall) -> Dict:
+    cart = get_cart_store().get(call.args.get("customer_id"))
+    return {
+        "status": "success",
+        "message": "No items to add or remove; the cart is unchanged.",
+        "items_added": False,
+        "items_removed": False,
+        "subtotal": cart.subtotal_cents / 100,
+        "version": cart.version,
+    }
+
+
+DEFAULT_RULES: List[ToolRule] = [
+    # Discount thresholds. Small discounts need no manager; large ones are always denied.
+    ToolRule(
+        name="auto_approve_small_discount",
+        tool="sync_ask_for_approval",
+        when={"value": ("<=", 10)},
+        respond=_approve_small_discount,
+    ),
+    ToolRule(
+        name="reject_large_discount",
+        tool="approve_discount",
+        when={"value": (">", 10)},
+        respond={"status": "rejected", "message": "Discount too large. Must be 10 or less."},
+    ),
+    # generate_qr_code guardrails.
+    ToolRule(
+        name="qr_percentage_too_high",
+        tool="generate_qr_code",
+        when={"discount_type": ("==", "percentage"), "discount_value": (">", 10)},
+        respond={"status": "error", "error_message": "Discount percentage is too high. It must be 10% or less."},
+    ),
+    ToolRule(
+        name="qr_fixed_too_high",
+        tool="generate_qr_code",
+        when={"discount_type": ("==", "fixed"), "discount_value": (">", 20)},
+        respond={"status": "error", "error_message": "Discount value is too high. It must be 20 or less."},
+    ),
+    # Cart no-ops.
+    ToolRule(
+        name="cart_noop",
+        tool="modify_cart",
+        when={"items_to_add": ("empty", True), "items_to_remove": ("empty", True)},
+        respond=_unchanged_cart,
+    ),
+    # Approved discounts go straight into the cart.
+    ToolRule(
+        name="apply_manager_approved_discount",
+        tool="sync_ask_for_approval",
+        phase=AFTER,
+        when_response={"status": ("==", "approved")},
+        respond=_apply_discount,
+    ),
+    ToolRule(
+        name="apply_approved_discount",
+        tool="approve_discount",
+        phase=AFTER,
+        when_response={"status": ("==", "ok")},
+        respond=_apply_discount,
+    ),
+]
+
+tool_rules = RuleEngine(DEFAULT_RULES)
@@ -0,0 +1,276 @@
+"""
+Async variants of the customer service tools.
+
+Each tool sends its request to the backend service configured in the shared
+``backend_pool``, so tool calls from many sessions overlap on the event loop instead of
+blocking it. When a backend is not configured, the tool falls back to the local
+implementation in ``tools.py``, run in a worker thread since it may do SQLite or
+lock-guarded work.
+
+The tools keep the names, parameters and docstrings of their synchronous counterparts,
+so the model sees exactly the same function declarations. ADK injects ``tool_context``,
+which is used to cap the number of concurrent tool calls per session; it is not part of
+the declaration the model sees.
+"""
+
+import asyncio
+import logging
+from typing import Any, Callable, Dict, List, Optional, Union
+from urllib.parse import quote
+
+import httpx
+from google.adk.tools.tool_context import ToolContext
+
+from . import tools
+from ..shared_libraries.http_pool import backend_pool
+from ..shared_libraries.tool_concurrency import session_id_of, tool_call_limiter
+
+
+def _same_docs(sync_tool: Callable) -> Callable[[Callable], Callable]:
+    """
+    Copies the docstring of the synchronous tool, which is what the model reads.
+    """
+    def decorator(async_tool: Callable) -> Callable:
+        async_tool.__doc__ = sync_tool.__doc__
+        return async_tool
+    return decorator
+
+
+def _path_segment(value: str) -> str:
+    """
+    Escapes a value for use as one URL path segment, so "/", "?" or "#" in it can't change the endpoint.
+    """
+    return quote(value, safe="")
+
+
+async def _call(
+        backend: str,
+        method: str,
+        path: str,
+        fallback: Callable[[], Any],
+        tool_context: Optional[ToolContext],
+        *,
+        params: Optional[Dict[str, Any]] = None,
+        json: Any = None
+) -> Any:
+    """
+    Sends the request to the backend, or runs the local fallback if the backend is not configured.
+
+    Holds one of the session's tool call slots while the call runs.
+    """
+    async with tool_call_limiter.slot(session_id_of(tool_context)):
+        if not backend_pool.configured(backend):
+            return await asyncio.to_thread(fallback)
+
+        try:
+            return await backend_pool.request(backend, method, path, params=params, json=json)
+        except httpx.HTTPError as e:
+            logging.warning(f"Request to {backend} backend {method} {path} failed: {e!r}")
+            return {"status": "error", "error_message": f"The {backend} service is unavailable. Please try again later."}
+
+
+@_same_docs(tools.send_call_companion_link)
+async def send_call_companion_link(
+        phone_number: str,
+        tool_context: Optional[ToolContext] = None
+) -> dict:
+    return await _call(
+        "notifications", "POST", "/call-companion-link",
+        lambda: tools.send_call_companion_link(phone_number),
+        tool_context,
+        json={"phone_number": phone_number},
+    )
+
+
+@_same_docs(tools.approve_discount)
+async def approve_discount(
+        discount_type: str,
+        value: float,
+        reason: str,
+        tool_context: Optional[ToolContext] = None
+) -> dict:
+    return await _call(
+        "discounts", "POST", "/discounts/approve",
+        lambda: tools.approve_discount(discount_type, value, reason),
+        tool_context,
+        json={"discount_type": discount_type, "value": value, "reason": reason},
+    )
+
+
+@_same_docs(tools.sync_ask_for_approval)
+async def sync_ask_for_approval(
+        discount_type: str,
+        value: float,
+        reason: str,
+        tool_context: Optional[ToolContext] = None
+) -> dict:
+    return await _call(
+        "discounts", "POST", "/discounts/manager-approval",
+        lambda: tools.sync_ask_for_approval(discount_type, value, reason),
+        tool_context,
+        json={"discount_type": discount_type, "value": value, "reason": reason},
+    )
+
+
+@_same_docs(tools.update_salesforce_crm)
+async def update_salesforce_crm(
+        customer_id: str,
+        details: dict,
+        tool_context: Optional[ToolContext] = None
+) -> dict:
+    return await _call(
+        "crm", "POST", f"/customers/{_path_segment(customer_id)}",
+        lambda: tools.update_salesforce_crm(customer_id, details),
+        tool_context,
+        json={"details": details},
+    )
+
+
+@_same_docs(tools.access_cart_information)
+async def access_cart_information(
+        customer_id: str,
+        tool_context: Optional[ToolContext] = None
+) -> dict:
+    return await _call(
+        "cart", "GET", f"/carts/{_path_segment(customer_id)}",
+        lambda: tools.access_cart_information(customer_id),
+        tool_context,
+    )
+
+
+@_same_docs(tools.modify_cart)
+async def modify_cart(
+        customer_id: str,
+        items_to_add: List[dict],
+        items_to_remove: List[dict],
+        expected_version: Optional[int] = None,
+        tool_context: Optional[ToolContext] = None
+) -> dict:
+    return await _call(
+        "cart", "POST", f"/carts/{_path_segment(customer_id)}/modify",
+        lambda: tools.modify_cart(customer_id, items_to_add, items_to_remove, expected_version),
+        tool_context,
+        json={"items_to_add": items_to_add, "items_to_remove": items_to_remove, "expected_version": expected_version},
+    )
+
+
+@_same_docs(tools.get_product_recommendations)
+async def get_product_recommendations(
+        plant_type: str,
+        customer_id: str,
+        tool_context: Optional[ToolContext] = None
+) -> dict:
+    return await _call(
+        "recommendations", "GET", "/recommendations",
+        lambda: tools.get_product_recommendations(plant_type, customer_id),
+        tool_context,
+        params={"plant_type": plant_type, "customer_id": customer_id},
+    )
+
+
+@_same_docs(tools.check_product_availability)
+async def check_product_availability(
+        product_id: str,
+        store_id: str,
+        tool_context: Optional[ToolContext] = None
+) -> dict:
+    return await _call(
+        "inventory", "GET", "/availability",
+        lambda: tools.check_product_availability(product_id, store_id),
+        tool_context,
+        params={"product_id": product_id, "store_id": store_id},
+    )
+
+
+@_same_docs(tools.check_product_availability_batch)
+async def check_product_availability_batch(
+        product_ids: List[str],
+        store_ids: List[str],
+        tool_context: Optional[ToolContext] = None
+) -> dict:
+    return await _call(
+        "inventory", "POST", "/availability/batch",
+        lambda: tools.check_product_availability_batch(product_ids, store_ids),
+        tool_context,
+        json={"product_ids": product_ids, "store_ids": store_ids},
+    )
+
+
+@_same_docs(tools.schedule_planting_service)
+async def schedule_planting_service(
+        customer_id: str,
+        date: str,
+        time_range: str,
+        details: str,
+        tool_context: Optional[ToolContext] = None
+) -> dict:
+    return await _call(
+        "scheduling", "POST", "/appointments",
+        lambda: tools.schedule_planting_service(customer_id, date, time_range, details),
+        tool_context,
+        json={"customer_id": customer_id, "date": date, "time_range": time_range, "details": details},
+    )
+
+
+@_same_docs(tools.get_available_planting_times)
+async def get_available_planting_times(
+        date: str,
+        tool_context: Optional[ToolContext] = None
+) -> Union[list, dict]:
+    # A list of time slots, or an error dict when the scheduling backend is unavailable.
+    return await _call(
+        "scheduling", "GET", "/slots",
+        lambda: tools.get_available_planting_times(date),
+        tool_context,
+        params={"date": date},
+    )
+
+
+@_same_docs(tools.get_available_planting_times_range)
+async def get_available_planting_times_range(
+        start_date: str,
+        end_date: str,
+        tool_context: Optional[ToolContext] = None
+) -> dict:
+    return await _call(
+        "scheduling", "GET", "/slots/range",
+        lambda: tools.get_available_planting_times_range(start_date, end_date),
+        tool_context,
+        params={"start_date": start_date, "end_date": end_date},
+    )
+
+
+@_same_docs(tools.send_care_instructions)
+async def send_care_instructions(
+        customer_id: str,
+        plant_type: str,
+        delivery_method: str,
+        tool_context: Optional[ToolContext] = None
+) -> dict:
+    return await _call(
+        "notifications", "POST", "/care-instructions",
+        lambda: tools.send_care_instructions(customer_id, plant_type, delivery_method),
+        tool_context,
+        json={"customer_id": customer_id, "plant_type": plant_type, "delivery_method": delivery_method},
+    )
+
+
+@_same_docs(tools.generate_qr_code)
+async def generate_qr_code(
+        customer_id: str,
+        discount_value: float,
+        discount_type: str,
+        expiration_date: str,
+        tool_context: Optional[ToolContext] = None
+):
+    return await _call(
+        "discounts", "POST", "/qr-codes",
+        lambda: tools.generate_qr_code(customer_id, discount_value, discount_type, expiration_date),
+        tool_context,
+        json={
+            "customer_id": customer_id,
+            "discount_value": discount_value,
+            "discount_type": discount_type,
+            "expiration_date": expiration_date,
+        },
+    )
@@ -0,0 +1,90 @@
+"""
+Local stand-in HTTP server for the customer service backends.
+
+Serves every backend used by the async tools from one Starlette app, answering with the
+local tool implementations after an optional artificial delay. Point the tools at it with:
+
+    python -m Tested_Agents.Customer_Service.tools.stub_backends --port 8090 --delay 0.05
+    export CUSTOMER_SERVICE_CART_URL=http://localhost:8090   # and the other backends
+"""
+
+import argparse
+import asyncio
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from . import tools
+from ..shared_libraries.http_pool import BACKENDS
+
+
+def create_stub_app(delay_secs: float = 0.0) -> Starlette:
+    """
+    Creates the stand-in backend app.
+
+    :param delay_secs: Simulated backend latency added to every response.
+    :return: The Starlette app.
+    """
+
+    def endpoint(handler):
+        async def wrapper(request: Request) -> JSONResponse:
+            body = await request.json() if request.method == "POST" else {}
+            if delay_secs:
+                await asyncio.sleep(delay_secs)
+            return JSONResponse(handler(request, body))
+        return wrapper
+
+    routes = [
+        Route("/call-companion-link", endpoint(
+            lambda r, b: tools.send_call_companion_link(b["phone_number"])), methods=["POST"]),
+        Route("/discounts/approve", endpoint(
+            lambda r, b: tools.approve_discount(b["discount_type"], b["value"], b["reason"])), methods=["POST"]),
+        Route("/discounts/manager-approval", endpoint(
+            lambda r, b: tools.sync_ask_for_approval(b["discount_type"], b["value"], b["reason"])), methods=["POST"]),
+        Route("/qr-codes", endpoint(
+            lambda r, b: tools.generate_qr_code(**b)), methods=["POST"]),
+        Route("/customers/{customer_id}", endpoint(
+            lambda r, b: tools.update_salesforce_crm(r.path_params["customer_id"], b["details"])), methods=["POST"]),
+        Route("/carts/{customer_id}", endpoint(
+            lambda r, b: tools.access_cart_information(r.path_params["customer_id"])), methods=["GET"]),
+        Route("/carts/{customer_id}/modify", endpoint(
+            lambda r, b: tools.modify_cart(
+                r.path_params["customer_id"], b["items_to_add"], b["items_to_remove"], b.get("expected_version"))),
+            methods=["POST"]),
+        Route("/recommendations", endpoint(
+            lambda r, b: tools.get_product_recommendations(
+                r.query_params["plant_type"], r.query_params["customer_id"])), methods=["GET"]),
+        Route("/availability", endpoint(
+            lambda r, b: tools.check_product_availability(
+                r.query_params["product_id"], r.query_params["store_id"])), methods=["GET"]),
+        Route("/availability/batch", endpoint(
+            lambda r, b: tools.check_product_availability_batch(b["product_ids"], b["store_ids"])), methods=["POST"]),
+        Route("/appointments", endpoint(
+            lambda r, b: tools.schedule_planting_service(**b)), methods=["POST"]),
+        Route("/slots", endpoint(
+            lambda r, b: tools.get_available_planting_times(r.query_params["date"])), methods=["GET"]),
+        Route("/slots/range", endpoint(
+            lambda r, b: tools.get_available_planting_times_range(
+                r.query_params["start_date"], r.query_params["end_date"])), methods=["GET"]),
+        Route("/care-instructions", endpoint(
+            lambda r, b: tools.send_care_instructions(**b)), methods=["POST"]),
+    ]
+    return Starlette(routes=routes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run stand-in customer service backends.")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--delay", type=float, default=0.0, help="Simulated latency per request in seconds.")
+    args = parser.parse_args()
+
+    for backend in BACKENDS:
+        print(f"export CUSTOMER_SERVICE_{backend.upper()}_URL=http://localhost:{args.port}")
+    uvicorn.run(create_stub_app(args.delay), host="localhost", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
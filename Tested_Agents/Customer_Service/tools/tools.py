@@ -1,8 +1,13 @@
 from datetime import datetime, timedelta
-import uuid
-from typing import Dict, List
+from typing import Dict, List, Optional
 import logging
 
+from ..entities.customer import Customer
+from ..services.cart import CartVersionConflict, InvalidCartItem, get_cart_store
+from ..services.inventory import get_inventory_index
+from ..services.recommendations import get_recommendation_engine
+from ..services.scheduling import SlotUnavailable, scheduling_engine
+
 def send_call_companion_link(phone_number: str) -> dict:
     """
     Sends a link to the user's phone number to start a video session.
@@ -79,56 +84,58 @@ def access_cart_information(customer_id: str) -> dict:
 
     Example:
         >>> access_cart_information(customer_id='123')
-        {'items': [{'product_id': 'soil-123', 'name': 'Standard Potting Soil', 'quantity': 1}, {'product_id': 'fert-456', 'name': 'General Purpose Fertilizer', 'quantity': 1}], 'subtotal': 25.98}
+        {'items': [{'product_id': 'soil-123', 'name': 'Standard Potting Soil', 'quantity': 1}, {'product_id': 'fert-456', 'name': 'General Purpose Fertilizer', 'quantity': 1}], 'subtotal': 25.98, 'version': 1}
     """
 
     logging.info(f"Accessing cart information for customer ID: {customer_id}")
 
-    # MOCK API Response: Replacing the actual API call with hard-coded data for now.
-    mock_cart = {
-        "items": [
-            {
-                "product_id": "soil-123",
-                "name": "Standard Potting Soil",
-                "quantity": 1
-            },
-            {
-                "product_id": "fert-456",
-                "name": "General Purpose Fertilizer",
-                "quantity": 1
-            }
-        ],
-        "subtotal": 25.98
-    }
-
-    return mock_cart
+    return get_cart_store().get(customer_id).to_dict()
 
 
 def modify_cart(
         customer_id: str,
         items_to_add: List[dict],
-        items_to_remove: List[dict]
+        items_to_remove: List[dict],
+        expected_version: Optional[int] = None
 ) -> dict:
     """
     Modifies the user's shopping card by adding and/or removing items.
 
     :param customer_id: The ID of the customer.
     :param items_to_add:  A list of dictionaries representing the items to add to the cart. Each item will have 'product_id' and 'quantity'.
-    :param items_to_remove: A list of dictionaries representing the items to remove from the cart. Each item will have 'product_id'.
+    :param items_to_remove: A list of dictionaries representing the items to remove from the cart. Each item will have 'product_id' and optionally the 'quantity' to remove (default: all of it).
+    :param expected_version: The cart 'version' from access_cart_information. If given and the cart changed since, nothing is modified and the cart must be read again.
     :return: A dictionary indicating the status of the card modification.
 
     Example:
         >>> modify_cart(customer_id='123', items_to_add=[{'product_id': 'soil-456', 'quantity': 1}, {'product_id': 'fert-789', 'quantity': 1}], items_to_remove=[{'product_id': 'fert-112'}])
-        {'status': 'success', 'message': 'Cart updated successfully.', 'items_added': True, 'items_removed': True}
+        {'status': 'success', 'message': 'Cart updated successfully.', 'items_added': True, 'items_removed': False, 'subtotal': 30.48}
     """
-    # MOCK API Response: Replacing the actual API call with hard-coded data for now.
+    logging.info(f"Modifying cart for customer ID: {customer_id}, adding: {items_to_add}, removing: {items_to_remove}")
 
-    return {
+    try:
+        cart, change = get_cart_store().modify(customer_id, items_to_add, items_to_remove, expected_version)
+    except CartVersionConflict as e:
+        return {
+            "status": "error",
+            "error_message": "The cart was changed in the meantime. Please read the cart again and retry.",
+            "version": e.actual_version,
+        }
+    except InvalidCartItem as e:
+        return {"status": "error", "error_message": f"{e}."}
+
+    result = {
         "status": "success",
         "message": "Cart updated successfully.",
-        "items_added": True,
-        "items_removed": True
+        "items_added": bool(change.added),
+        "items_removed": bool(change.removed),
+        "subtotal": cart.subtotal_cents / 100,
+        "version": cart.version,
     }
+    if change.unknown_products:
+        result["status"] = "partial" if change.updated else "error"
+        result["message"] = f"Unknown product IDs were not added: {', '.join(change.unknown_products)}."
+    return result
 
 
 def get_product_recommendations(plant_type: str, customer_id: str) -> dict:
@@ -146,39 +153,13 @@ def get_product_recommendations(plant_type: str, customer_id: str) -> dict:
 
     logging.info(f"Getting product recommendations for plant type: {plant_type} for customer ID: {customer_id}")
 
-    # MOCK API Response: Replacing the actual API call with hard-coded data for now.
-
-    if plant_type.lower() == "petunias":
-        recommendations = {
-            "recommendations": [
-                {
-                    "product_id": "soil-456",
-                    "name": "Bloom Booster Potting Mix",
-                    "description": "Provides extra nutrients that Petunias love.",
-                },
-                {
-                    "product_id": "fert-789",
-                    "name": "Flower Power Fertilizer",
-                    "description": "Specifically formulated for flowering annuals.",
-                },
-            ]
-        }
-    else:
-        recommendations = {
-            "recommendations": [
-                {
-                    "product_id": "soil-123",
-                    "name": "Standard Potting Soil",
-                    "description": "A good all-purpose potting soil.",
-                },
-                {
-                    "product_id": "fert-456",
-                    "name": "General Purpose Fertilizer",
-                    "description": "Suitable for a wide variety of plants.",
-                },
-            ]
-        }
-    return recommendations
+    products = get_recommendation_engine().recommend(plant_type, Customer.get_customer(customer_id))
+    return {
+        "recommendations": [
+            {"product_id": p.product_id, "name": p.name, "description": p.description}
+            for p in products
+        ]
+    }
 
 
 def check_product_availability(product_id: str, store_id: str) -> dict:
@@ -197,9 +178,38 @@ def check_product_availability(product_id: str, store_id: str) -> dict:
 
     logging.info(f"Checking availability of product ID: {product_id} at store ID: {store_id}")
 
-    # MOCK API Response: Replacing the actual API call with hard-coded data for now.
+    quantity = get_inventory_index().quantity(product_id, store_id)
+    return {"available": quantity > 0, "quantity": quantity, "store": store_id}
 
-    return {"available": True, "quantity": 10, "store": store_id}
+
+def check_product_availability_batch(product_ids: List[str], store_ids: List[str]) -> dict:
+    """
+    Checks the availability of several products at several stores (or for pickup) in one call.
+    Use this instead of calling check_product_availability once per product, e.g. to check a whole cart.
+
+    :param product_ids: The IDs of the products to check.
+    :param store_ids: The IDs of the stores to check (use 'pickup' for pickup availability).
+    :return: A dictionary with the quantity of every product at every store, and the stores where
+        all of the products are available. Example:
+        {'availability': {'soil-456': {'pickup': 10, 'springfield': 6}, 'fert-789': {'pickup': 7, 'springfield': 0}},
+         'all_available_at': ['pickup']}
+
+    Example:
+        >>> check_product_availability_batch(product_ids=['soil-456', 'fert-789'], store_ids=['pickup', 'springfield'])
+        {'availability': {'soil-456': {'pickup': 10, 'springfield': 6}, 'fert-789': {'pickup': 7, 'springfield': 3}}, 'all_available_at': ['pickup', 'springfield']}
+    """
+
+    logging.info(f"Checking availability of product IDs: {product_ids} at store IDs: {store_ids}")
+
+    if not product_ids:
+        return {"status": "error", "error_message": "No product IDs given. Please specify the products to check."}
+
+    matrix = get_inventory_index().availability(product_ids, store_ids)
+    all_available_at = [
+        store_id for store_id in store_ids
+        if all(by_store[store_id] > 0 for by_store in matrix.values())
+    ]
+    return {"availability": matrix, "all_available_at": all_available_at}
 
 
 def schedule_planting_service(
@@ -220,17 +230,20 @@ def schedule_planting_service(
 
     logging.info(f"Scheduling planting service for customer ID: {customer_id} on date: {date}, time range: {time_range}, details: {details}")
 
-    # MOCK API Response: Replacing the actual API call with hard-coded data for now.
+    try:
+        appointment = scheduling_engine.book(customer_id, date, time_range, details)
+    except (SlotUnavailable, ValueError) as e:
+        return {"status": "error", "error_message": str(e)}
 
-    start_time_str = time_range.split("-")[0].strip()
+    start_time_str = appointment.time_range.split("-")[0].strip()
 
     confirmation_time_str = (f"{date} {start_time_str}:00")
 
     return {
         "status": "success",
-        "appointment_id": str(uuid.uuid4()),
+        "appointment_id": appointment.appointment_id,
         "date": date,
-        "time": time_range,
+        "time": appointment.time_range,
         "confirmation_time": confirmation_time_str
     }
 
@@ -249,9 +262,33 @@ def get_available_planting_times(date: str) -> list:
 
     logging.info(f"Getting available planting times for date: {date}")
 
-    # MOCK API Response: Replacing the actual API call with hard-coded data for now.
-    # Generate some mock time slots, ensuring they're in the correct format:
-    return ['9-12', '13-16']
+    try:
+        return scheduling_engine.available_times(date)
+    except ValueError:
+        logging.warning(f"Invalid date for planting times: {date}")
+        return []
+
+
+def get_available_planting_times_range(start_date: str, end_date: str) -> dict:
+    """
+    Retrieves available planting service time slots for every date in a date range, in one call.
+    Use this instead of calling get_available_planting_times once per date.
+
+    :param start_date: The first date to check (YYYY-MM-DD).
+    :param end_date: The last date to check (YYYY-MM-DD), at most 62 days after start_date.
+    :return: A dictionary mapping each date to its list of available time slots.
+
+    Example:
+        >>> get_available_planting_times_range(start_date='2024-07-29', end_date='2024-07-30')
+        {'status': 'success', 'available_times': {'2024-07-29': ['9-12', '13-16'], '2024-07-30': ['13-16']}}
+    """
+
+    logging.info(f"Getting available planting times from {start_date} to {end_date}")
+
+    try:
+        return {"status": "success", "available_times": scheduling_engine.available_times_range(start_date, end_date)}
+    except ValueError as e:
+        return {"status": "error", "error_message": str(e)}
 
 
 def send_care_instructions(
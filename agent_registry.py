@@ -0,0 +1,291 @@
+"""
+Lazy agent registry for an ADK agents directory.
+
+Agents are discovered by parsing the source of each package's ``__init__.py`` and
+``agent.py`` with ``ast``; nothing is imported. A package is an agent if it defines or
+re-exports ``root_agent``. Its name, model and description are read from the literal
+arguments of the ``Agent(...)`` call when present.
+
+An agent is imported the first time a request for it arrives (``/apps/<name>/...``),
+and its import time is recorded. ``install`` wires the registry into the ADK FastAPI app:
+/list-apps returns only the discovered agents, and /agent-registry reports the metadata
+and the import times.
+
+Find out what an agent spends its import time on with:
+    python agent_registry.py --profile-startup [--agents-dir DIR]
+
+This runs ``python -X importtime`` for every agent in a fresh interpreter and prints the
+slowest modules.
+"""
+
+import argparse
+import ast
+import asyncio
+import importlib
+import logging
+import os
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger("agent_registry")
+
+AGENT_METADATA_FIELDS = ("name", "model", "description")
+
+
+@dataclass
+class AgentInfo:
+    """
+    An agent package found under the agents directory.
+    """
+    app_name: str
+    path: str
+    # The module whose ``root_agent`` attribute is the agent.
+    module: str
+    metadata: Dict[str, str] = field(default_factory=dict)
+    import_secs: Optional[float] = None
+    import_error: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        return {
+            "app_name": self.app_name,
+            "module": self.module,
+            "metadata": self.metadata,
+            "loaded": self.import_secs is not None,
+            "import_secs": self.import_secs,
+            "import_error": self.import_error,
+        }
+
+
+def _parse(path: str) -> Optional[ast.Module]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return ast.parse(f.read(), filename=path)
+    except (OSError, SyntaxError, ValueError):
+        return None
+
+
+def _root_agent_call(tree: ast.Module) -> Tuple[bool, Optional[ast.Call]]:
+    """
+    Returns whether the module defines or imports ``root_agent``, and the call it is assigned from.
+    """
+    for node in tree.body:
+        if isinstance(node, ast.Assign):
+            if any(isinstance(t, ast.Name) and t.id == "root_agent" for t in node.targets):
+                return True, node.value if isinstance(node.value, ast.Call) else None
+        elif isinstance(node, ast.AnnAssign):
+            if isinstance(node.target, ast.Name) and node.target.id == "root_agent":
+                return True, node.value if isinstance(node.value, ast.Call) else None
+        elif isinstance(node, ast.ImportFrom):
+            if any((alias.asname or alias.name) == "root_agent" for alias in node.names):
+                return True, None
+    return False, None
+
+
+def _literal_metadata(call: Optional[ast.Call]) -> Dict[str, str]:
+    if call is None:
+        return {}
+    metadata = {}
+    for keyword in call.keywords:
+        if keyword.arg in AGENT_METADATA_FIELDS:
+            try:
+                value = ast.literal_eval(keyword.value)
+            except ValueError:
+                continue
+            if isinstance(value, str):
+                metadata[keyword.arg] = " ".join(value.split())
+    return metadata
+
+
+def inspect_package(agents_dir: str, app_name: str) -> Optional[AgentInfo]:
+    """
+    Returns the agent defined by a package, or None if it defines none. Only parses the source.
+    """
+    path = os.path.join(agents_dir, app_name)
+    init_tree = _parse(os.path.join(path, "__init__.py"))
+    agent_tree = _parse(os.path.join(path, "agent.py"))
+
+    in_agent, call = _root_agent_call(agent_tree) if agent_tree else (False, None)
+    in_init, init_call = _root_agent_call(init_tree) if init_tree else (False, None)
+    if in_init:
+        return AgentInfo(app_name, path, app_name, _literal_metadata(init_call or call))
+    if in_agent:
+        return AgentInfo(app_name, path, f"{app_name}.agent", _literal_metadata(call))
+    return None
+
+
+class AgentRegistry:
+    """
+    The agents of an agents directory, imported on first use.
+    """
+
+    def __init__(self, agents_dir: str):
+        self.agents_dir = os.path.abspath(agents_dir)
+        self.agents: Dict[str, AgentInfo] = {}
+        self._locks: Dict[str, Lock] = {}
+        self.discover()
+
+    def discover(self) -> List[str]:
+        """
+        (Re)scans the agents directory without importing anything.
+
+        :return: The names of the agents found.
+        """
+        agents = {}
+        for app_name in sorted(os.listdir(self.agents_dir)):
+            if app_name.startswith((".", "_")) or not os.path.isdir(os.path.join(self.agents_dir, app_name)):
+                continue
+            info = inspect_package(self.agents_dir, app_name)
+            if info is not None:
+                previous = self.agents.get(app_name)
+                if previous is not None:
+                    info.import_secs, info.import_error = previous.import_secs, previous.import_error
+                agents[app_name] = info
+                self._locks.setdefault(app_name, Lock())
+        self.agents = agents
+        return list(agents)
+
+    def names(self) -> List[str]:
+        return list(self.agents)
+
+    def load(self, app_name: str):
+        """
+        Imports an agent if it was not imported yet and returns its root agent.
+
+        :raises KeyError: If there is no such agent.
+        """
+        info = self.agents[app_name]
+        with self._locks[app_name]:
+            if self.agents_dir not in sys.path:
+                sys.path.insert(0, self.agents_dir)
+            start = time.perf_counter()
+            try:
+                module = importlib.import_module(info.module)
+            except Exception as e:
+                info.import_error = repr(e)
+                raise
+            if info.import_secs is None:
+                info.import_secs = time.perf_counter() - start
+                info.import_error = None
+                logger.info(f"Imported agent {app_name} in {info.import_secs:.3f}s")
+            return module.root_agent
+
+    def load_all(self) -> Dict[str, float]:
+        """
+        Imports every agent, skipping (and logging) those that fail.
+
+        :return: Import time in seconds per agent that was imported.
+        """
+        timings = {}
+        for app_name in self.agents:
+            try:
+                self.load(app_name)
+            except Exception as e:
+                logger.warning(f"Could not import agent {app_name}: {e!r}")
+                continue
+            timings[app_name] = self.agents[app_name].import_secs
+        return timings
+
+    def import_times(self) -> Dict[str, Optional[float]]:
+        return {name: info.import_secs for name, info in self.agents.items()}
+
+
+def install(app, registry: AgentRegistry) -> None:
+    """
+    Wires the registry into an app built by ``get_fast_api_app``.
+
+    Requests under /apps/<name>/ import that agent first, in a worker thread so a slow import
+    does not stall other requests. /list-apps returns only the discovered agents and
+    /agent-registry returns their metadata and import times.
+    """
+    @app.middleware("http")
+    async def import_agent_on_first_request(request, call_next):
+        parts = request.url.path.split("/", 3)
+        if len(parts) > 2 and parts[1] == "apps":
+            info = registry.agents.get(parts[2])
+            if info is not None and info.import_secs is None:
+                try:
+                    await asyncio.to_thread(registry.load, parts[2])
+                except Exception:
+                    # ADK reports the import error when it loads the agent itself.
+                    logger.exception(f"Could not import agent {parts[2]}")
+        return await call_next(request)
+
+    app.router.routes = [route for route in app.router.routes if getattr(route, "path", None) != "/list-apps"]
+
+    @app.get("/list-apps")
+    def list_apps() -> List[str]:
+        return registry.names()
+
+    @app.get("/agent-registry")
+    def agent_registry() -> List[dict]:
+        return [info.to_dict() for info in registry.agents.values()]
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """
+    Parses ``python -X importtime`` output.
+
+    :return: (module, self microseconds, cumulative microseconds) per imported module. The module
+        name keeps its indentation, which shows how deeply nested the import was.
+    """
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|", 2)
+        modules.append((module[1:].rstrip(), int(self_us), int(cumulative_us)))
+    return modules
+
+
+def profile_startup(registry: AgentRegistry, top: int = 10) -> None:
+    """
+    Imports every agent in a fresh interpreter with ``-X importtime`` and prints where the time goes.
+
+    Modules the interpreter imports at startup anyway are left out.
+    """
+    def importtime(code: str) -> subprocess.CompletedProcess:
+        return subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            cwd=registry.agents_dir,
+            capture_output=True,
+            text=True,
+        )
+
+    baseline = {module for module, _, _ in parse_importtime(importtime("pass").stderr)}
+    for info in registry.agents.values():
+        result = importtime(f"import {info.module}")
+        modules = [m for m in parse_importtime(result.stderr) if m[0] not in baseline]
+        # Top-level imports are not indented; their cumulative times add up to the agent's import time.
+        total_us = sum(cumulative for module, _, cumulative in modules if module == module.lstrip())
+        status = "ok" if result.returncode == 0 else "FAILED"
+        print(f"\n{info.app_name} ({info.module}): {total_us / 1e6:.3f}s, {len(modules)} modules, import {status}")
+        if result.returncode != 0:
+            print("    " + (result.stderr.strip().splitlines() or ["?"])[-1])
+        print(f"    {'self_ms':>9} {'cumulative_ms':>14}  module")
+        for module, self_us, cumulative_us in sorted(modules, key=lambda m: m[1], reverse=True)[:top]:
+            print(f"    {self_us / 1000:>9.1f} {cumulative_us / 1000:>14.1f}  {module.strip()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List the agents of an agents directory without importing them.")
+    parser.add_argument("--agents-dir", default=os.path.dirname(os.path.abspath(__file__)))
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Print an -X importtime breakdown of every agent.")
+    parser.add_argument("--top", type=int, default=10, help="Modules to show per agent with --profile-startup.")
+    args = parser.parse_args()
+
+    registry = AgentRegistry(args.agents_dir)
+    if args.profile_startup:
+        profile_startup(registry, args.top)
+        return
+    for info in registry.agents.values():
+        details = ", ".join(f"{k}={v!r}" for k, v in info.metadata.items())
+        print(f"{info.app_name} ({info.module}) {details}")
+
+
+if __name__ == "__main__":
+    main()
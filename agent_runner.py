@@ -1,21 +1,67 @@
+import logging
+import argparse
 import uvicorn
 from google.adk.cli.fast_api import get_fast_api_app
 import os
 
+from agent_registry import AgentRegistry, install, profile_startup
+
 if __name__ == "__main__":
-    agents_dir = os.path.dirname(os.path.abspath(__file__))
-    app = get_fast_api_app(
-        agents_dir=agents_dir,
-        web=True,
-        host="0.0.0.0",
-        port=8010,
-        reload_agents=True
-    )
+    parser = argparse.ArgumentParser(description="Serve the agents in this directory.")
+    parser.add_argument("--agents-dir", default=os.path.dirname(os.path.abspath(__file__)))
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8010)
+    parser.add_argument("--production", action="store_true",
+                        help="Pre-fork workers with the agents imported once in the master.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Number of worker processes (production mode).")
+    parser.add_argument("--watch", action="store_true",
+                        help="Reload gracefully when source files change (production mode).")
+    parser.add_argument("--no-preload", action="store_true",
+                        help="Import the agents in every worker instead of once before fork (production mode).")
+    parser.add_argument("--graceful-timeout", type=float, default=30.0,
+                        help="Seconds old workers get to finish in-flight requests on reload or shutdown.")
+    parser.add_argument("--session-service-uri", default=None,
+                        help="Session store shared by the workers, e.g. sqlite:///sessions.db.")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Print an -X importtime breakdown of every agent and exit.")
+    args = parser.parse_args()
+
+    agents_dir = os.path.abspath(args.agents_dir)
+
+    if args.profile_startup:
+        profile_startup(AgentRegistry(agents_dir))
+    elif args.production:
+        from production_server import PreforkServer, ServerOptions
+
+        logging.basicConfig(level=logging.INFO)
+
+        PreforkServer(ServerOptions(
+            agents_dir=agents_dir,
+            host=args.host,
+            port=args.port,
+            workers=args.workers,
+            preload=not args.no_preload,
+            watch=args.watch,
+            graceful_timeout_secs=args.graceful_timeout,
+            session_service_uri=args.session_service_uri,
+        )).serve()
+    else:
+        app = get_fast_api_app(
+            agents_dir=agents_dir,
+            session_service_uri=args.session_service_uri,
+            web=True,
+            host=args.host,
+            port=args.port,
+            reload_agents=True
+        )
+        # Agents are imported on their first request; /list-apps only lists real agents.
+        install(app, AgentRegistry(agents_dir))
 
-    print(f"Server is listening on http://0.0.0.0:8010")
-    uvicorn.run(
-        app,
-        host="0.0.0.0",
-        port=8010,
-        log_level="info",
-    )
+        print(f"Server is listening on http://{args.host}:{args.port}")
+        uvicorn.run(
+            app,
+            host=args.host,
+            port=args.port,
+            log_level="info",
+        )
@@ -1,10 +1,22 @@
+import os
+
 from google.adk.agents import Agent
-from google.adk.tools.mcp_tool import MCPToolset, StreamableHTTPConnectionParams
 
-calc_mcp_server = MCPToolset(
-        connection_params = StreamableHTTPConnectionParams(
-            url = "https://mcp-server-762595014021.us-central1.run.app/mcp"
-        )
+from .mcp_pool import PooledMCPToolset
+from .mcp_tool_cache import get_tool_cache
+
+# Point at a local server (python MCP/030-mcp-on-cloudrun/server.py) with
+# CALC_MCP_SERVER_URL=http://localhost:8080/mcp
+calc_mcp_server_url = os.getenv("CALC_MCP_SERVER_URL", "https://mcp-server-762595014021.us-central1.run.app/mcp")
+
+# Load the cached tool listing now so the first message does not wait for list_tools.
+get_tool_cache().prewarm([calc_mcp_server_url])
+
+calc_mcp_server = PooledMCPToolset(
+        url = calc_mcp_server_url,
+        size = int(os.getenv("CALC_MCP_POOL_SIZE", "4")),
+        # add/subtract are idempotent, so a call can be retried on another session.
+        retry_on_disconnect = True
     )
 
 agent_instruction = """
@@ -0,0 +1,446 @@
+"""Pooled, long-lived MCP client sessions.
+
+MCPSessionPool keeps N initialized streamable-HTTP sessions to one MCP server warm and
+spreads concurrent requests over them. Each session is opened and closed by its own
+background task, because the MCP client contexts must be exited by the task that entered
+them. Any task can send requests over an open session; requests are multiplexed by id,
+so one session carries many concurrent tool calls. The pool sends each call to the
+healthy session with the fewest calls in flight.
+
+A health-check loop pings every session. A session whose ping or request fails at the
+transport level is marked broken, and its task reconnects in the background with
+exponential backoff while the other sessions keep serving.
+
+PooledMCPToolset exposes the pool to ADK agents in place of MCPToolset.
+
+Try it against the Cloud Run demo server running locally:
+    python MCP/030-mcp-on-cloudrun/server.py
+    python -m calcagent.mcp_pool --url http://localhost:8080/mcp --calls 1000 --concurrency 50 --compare
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar
+
+from google.adk.tools import BaseTool
+from google.adk.tools.base_toolset import BaseToolset
+from google.adk.tools.mcp_tool import McpTool
+from google.adk.tools.mcp_tool.mcp_session_manager import MCPSessionManager, StreamableHTTPConnectionParams
+from mcp import ClientSession
+from mcp.client.streamable_http import streamablehttp_client
+from mcp.shared.exceptions import McpError
+
+from .mcp_tool_cache import ToolListingCache, get_tool_cache, read_fingerprint
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass
+class PoolMetrics:
+    """Counters describing how the pool has been used."""
+    calls: int = 0
+    errors: int = 0
+    retries: int = 0
+    connects: int = 0
+    reconnects: int = 0
+    connect_failures: int = 0
+    health_checks: int = 0
+    health_failures: int = 0
+    total_latency_secs: float = 0.0
+    max_latency_secs: float = 0.0
+    max_wait_for_session_secs: float = 0.0
+
+
+class _PooledSession:
+    """One pool slot: a session kept open by its own task and reopened when it breaks."""
+
+    def __init__(self, pool: "MCPSessionPool", index: int):
+        self.pool = pool
+        self.index = index
+        self.session: Optional[ClientSession] = None
+        self.in_flight = 0
+        self._broken = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def healthy(self) -> bool:
+        return self.session is not None and not self._broken.is_set()
+
+    def start(self):
+        self._task = asyncio.create_task(self._run(), name=f"mcp-pool-session-{self.index}")
+
+    def mark_broken(self, reason: str):
+        """Closes the session; its task reconnects in the background."""
+        if self.healthy:
+            logger.warning(f"MCP session {self.index} to {self.pool.url} is broken: {reason}")
+            self._broken.set()
+
+    async def _run(self):
+        pool = self.pool
+        failures = 0
+        while not pool._closing.is_set():
+            try:
+                async with streamablehttp_client(
+                    pool.url, headers=pool.headers, timeout=pool.connect_timeout_secs
+                ) as (read_stream, write_stream, _):
+                    async with ClientSession(read_stream, write_stream) as session:
+                        await asyncio.wait_for(session.initialize(), pool.connect_timeout_secs)
+                        pool.metrics.connects += 1
+                        if failures or self._broken.is_set():
+                            pool.metrics.reconnects += 1
+                        failures = 0
+                        self._broken.clear()
+                        self.session = session
+                        await pool._notify()
+                        await _wait_any(pool._closing, self._broken)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                failures += 1
+                pool.metrics.connect_failures += 1
+                logger.warning(f"MCP session {self.index} could not connect to {pool.url}: {e!r}")
+            finally:
+                self.session = None
+
+            if pool._closing.is_set():
+                break
+            if failures:
+                delay = min(pool.max_reconnect_backoff_secs, pool.reconnect_backoff_secs * 2 ** (failures - 1))
+                # Jitter keeps the sessions from reconnecting in lockstep after an outage.
+                await _wait_any(pool._closing, timeout=delay * random.uniform(0.5, 1.0))
+
+    async def close(self):
+        if self._task is not None:
+            await asyncio.gather(self._task, return_exceptions=True)
+
+
+async def _wait_any(*events: asyncio.Event, timeout: Optional[float] = None):
+    waiters = [asyncio.create_task(e.wait()) for e in events]
+    try:
+        await asyncio.wait(waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for waiter in waiters:
+            waiter.cancel()
+
+
+class MCPSessionPool:
+    """A pool of warm streamable-HTTP sessions to one MCP server."""
+
+    def __init__(
+        self,
+        url: str,
+        size: int = 4,
+        headers: Optional[Dict[str, str]] = None,
+        max_in_flight_per_session: int = 32,
+        call_timeout_secs: float = 30.0,
+        connect_timeout_secs: float = 10.0,
+        health_check_interval_secs: float = 15.0,
+        reconnect_backoff_secs: float = 0.5,
+        max_reconnect_backoff_secs: float = 30.0,
+        retry_on_disconnect: bool = False,
+    ):
+        """Creates the pool. No connection is made until start().
+
+        Args:
+            url: Streamable-HTTP endpoint of the MCP server, e.g. http://localhost:8080/mcp.
+            size: Number of sessions kept open.
+            headers: HTTP headers sent on every session, e.g. Authorization.
+            max_in_flight_per_session: Calls a session carries at once before callers wait.
+            call_timeout_secs: Timeout of a single request.
+            connect_timeout_secs: Timeout for opening and initializing a session.
+            health_check_interval_secs: How often every session is pinged.
+            reconnect_backoff_secs: First delay before reconnecting a failed session.
+            max_reconnect_backoff_secs: Longest delay between reconnect attempts.
+            retry_on_disconnect: Retry a call once on another session when its session
+                breaks mid-call. Only safe when the server's tools are idempotent.
+        """
+        self.url = url
+        self.size = size
+        self.headers = headers
+        self.max_in_flight_per_session = max_in_flight_per_session
+        self.call_timeout_secs = call_timeout_secs
+        self.connect_timeout_secs = connect_timeout_secs
+        self.health_check_interval_secs = health_check_interval_secs
+        self.reconnect_backoff_secs = reconnect_backoff_secs
+        self.max_reconnect_backoff_secs = max_reconnect_backoff_secs
+        self.retry_on_disconnect = retry_on_disconnect
+        self.metrics = PoolMetrics()
+        self._sessions: List[_PooledSession] = []
+        self._closing: Optional[asyncio.Event] = None
+        self._changed: Optional[asyncio.Condition] = None
+        self._health_task: Optional[asyncio.Task] = None
+
+    @property
+    def started(self) -> bool:
+        return self._closing is not None and not self._closing.is_set()
+
+    async def start(self, wait_secs: Optional[float] = None):
+        """Opens the sessions in the background. Safe to call more than once.
+
+        Args:
+            wait_secs: Wait up to this long for the first session to be ready
+                (defaults to connect_timeout_secs).
+        """
+        if not self.started:
+            self._closing = asyncio.Event()
+            self._changed = asyncio.Condition()
+            self._sessions = [_PooledSession(self, i) for i in range(self.size)]
+            for pooled in self._sessions:
+                pooled.start()
+            self._health_task = asyncio.create_task(self._health_loop(), name="mcp-pool-health")
+        try:
+            await self._acquire(wait_secs if wait_secs is not None else self.connect_timeout_secs, reserve=False)
+        except asyncio.TimeoutError:
+            logger.warning(f"No MCP session to {self.url} is ready yet; connecting in the background")
+
+    async def _notify(self):
+        async with self._changed:
+            self._changed.notify_all()
+
+    def _pick(self) -> Optional[_PooledSession]:
+        best = None
+        for pooled in self._sessions:
+            if pooled.healthy and pooled.in_flight < self.max_in_flight_per_session:
+                if best is None or pooled.in_flight < best.in_flight:
+                    best = pooled
+        return best
+
+    async def _acquire(self, timeout_secs: float, reserve: bool = True) -> _PooledSession:
+        pooled = self._pick()
+        if pooled is None:
+            start = time.monotonic()
+
+            async def wait_for_session():
+                async with self._changed:
+                    await self._changed.wait_for(lambda: self._pick() is not None)
+
+            await asyncio.wait_for(wait_for_session(), timeout_secs)
+            pooled = self._pick()
+            waited = time.monotonic() - start
+            self.metrics.max_wait_for_session_secs = max(self.metrics.max_wait_for_session_secs, waited)
+        if reserve:
+            pooled.in_flight += 1
+        return pooled
+
+    async def _request(self, fn: Callable[[ClientSession], Awaitable[T]], retry: bool) -> T:
+        if not self.started:
+            await self.start()
+        attempts = 2 if retry else 1
+        for attempt in range(attempts):
+            pooled = await self._acquire(self.call_timeout_secs)
+            self.metrics.calls += 1
+            start = time.monotonic()
+            try:
+                result = await asyncio.wait_for(fn(pooled.session), self.call_timeout_secs)
+            except (McpError, asyncio.TimeoutError):
+                # The server answered with an error, or is just slow: the session itself is fine.
+                self.metrics.errors += 1
+                raise
+            except Exception as e:
+                self.metrics.errors += 1
+                pooled.mark_broken(repr(e))
+                if attempt + 1 < attempts:
+                    self.metrics.retries += 1
+                    continue
+                raise
+            finally:
+                pooled.in_flight -= 1
+                await self._notify()
+            latency = time.monotonic() - start
+            self.metrics.total_latency_secs += latency
+            self.metrics.max_latency_secs = max(self.metrics.max_latency_secs, latency)
+            return result
+
+    async def call_tool(self, name: str, arguments: Optional[Dict[str, Any]] = None):
+        """Calls a tool on the least busy healthy session.
+
+        Args:
+            name: Name of the tool.
+            arguments: Tool arguments.
+
+        Returns:
+            The MCP CallToolResult.
+        """
+        return await self._request(lambda s: s.call_tool(name, arguments or {}), self.retry_on_disconnect)
+
+    async def list_tools(self):
+        """Returns the MCP ListToolsResult of the server."""
+        return await self._request(lambda s: s.list_tools(), retry=True)
+
+    async def read_resource(self, uri):
+        """Returns the MCP ReadResourceResult of a resource."""
+        return await self._request(lambda s: s.read_resource(uri), retry=True)
+
+    async def _health_loop(self):
+        while not self._closing.is_set():
+            await _wait_any(self._closing, timeout=self.health_check_interval_secs)
+            for pooled in self._sessions:
+                if not pooled.healthy or self._closing.is_set():
+                    continue
+                self.metrics.health_checks += 1
+                try:
+                    await asyncio.wait_for(pooled.session.send_ping(), self.connect_timeout_secs)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self.metrics.health_failures += 1
+                    pooled.mark_broken(f"health check failed: {e!r}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Returns the pool metrics and the state of every session."""
+        stats = asdict(self.metrics)
+        completed = self.metrics.calls - self.metrics.errors
+        stats["avg_latency_secs"] = self.metrics.total_latency_secs / completed if completed else 0.0
+        stats["sessions"] = [
+            {"index": p.index, "healthy": p.healthy, "in_flight": p.in_flight} for p in self._sessions
+        ]
+        stats["healthy_sessions"] = sum(p.healthy for p in self._sessions)
+        return stats
+
+    async def close(self):
+        """Closes every session and stops the health checks."""
+        if not self.started:
+            return
+        self._closing.set()
+        await asyncio.gather(self._health_task, return_exceptions=True)
+        await asyncio.gather(*(p.close() for p in self._sessions))
+
+    async def __aenter__(self) -> "MCPSessionPool":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
+class PooledMCPTool(McpTool):
+    """An MCP tool whose calls go through an MCPSessionPool.
+
+    The function declaration is built by McpTool from the tool's input schema; only the
+    call is routed through the pool instead of McpTool's session manager.
+    """
+
+    def __init__(self, pool: MCPSessionPool, mcp_tool, session_manager: MCPSessionManager):
+        super().__init__(mcp_tool=mcp_tool, mcp_session_manager=session_manager)
+        self._pool = pool
+
+    async def run_async(self, *, args: Dict[str, Any], tool_context) -> Any:
+        result = await self._pool.call_tool(self.name, args)
+        return result.model_dump(exclude_none=True, mode="json")
+
+
+class PooledMCPToolset(BaseToolset):
+    """Drop-in replacement for MCPToolset that serves tool calls from a session pool.
+
+    Tool listings come from the on-disk tool cache (calcagent.mcp_tool_cache), so get_tools() does not
+    wait for a list_tools round trip once the server has been seen.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        size: int = 4,
+        tool_filter=None,
+        tool_cache: Optional[ToolListingCache] = None,
+        **pool_options,
+    ):
+        """Creates the toolset. The pool connects on the first call that needs the server.
+
+        Args:
+            url: Streamable-HTTP endpoint of the MCP server.
+            size: Number of sessions kept open.
+            tool_filter: Optional tool names or predicate, as for MCPToolset.
+            tool_cache: Tool listing cache (defaults to the process-wide cache).
+            **pool_options: Further MCPSessionPool options.
+        """
+        super().__init__(tool_filter=tool_filter)
+        self.pool = MCPSessionPool(url, size, **pool_options)
+        self.tool_cache = tool_cache or get_tool_cache()
+        # McpTool requires a session manager. It connects lazily, and the pooled tools never use it.
+        self._session_manager = MCPSessionManager(
+            StreamableHTTPConnectionParams(url=url, headers=self.pool.headers)
+        )
+
+    async def _list_tools(self):
+        return (await self.pool.list_tools()).tools
+
+    async def get_tools(self, readonly_context=None) -> List[BaseTool]:
+        mcp_tools = await self.tool_cache.get(self.pool.url, self._list_tools, lambda: read_fingerprint(self.pool))
+        tools = [PooledMCPTool(self.pool, tool, self._session_manager) for tool in mcp_tools]
+        return [tool for tool in tools if self._is_tool_selected(tool, readonly_context)]
+
+    async def close(self):
+        await self.pool.close()
+
+
+async def _fresh_session_call(url: str, name: str, arguments: Dict[str, Any]):
+    async with streamablehttp_client(url) as (read_stream, write_stream, _):
+        async with ClientSession(read_stream, write_stream) as session:
+            await session.initialize()
+            return await session.call_tool(name, arguments)
+
+
+async def _load_test(
+    label: str, call: Callable[[int], Awaitable[Any]], calls: int, concurrency: int
+) -> None:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    failures = 0
+
+    async def one(i: int):
+        nonlocal failures
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await call(i)
+            except Exception:
+                failures += 1
+                return
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(calls)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+
+    def pct(p: float) -> float:
+        return latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000 if latencies else 0.0
+
+    print(f"{label}: {calls} calls in {elapsed:.2f}s ({calls / elapsed:,.0f}/s), "
+          f"p50={pct(0.50):.1f}ms p99={pct(0.99):.1f}ms failures={failures}")
+
+
+async def _main(args):
+    async with MCPSessionPool(args.url, args.size, retry_on_disconnect=True) as pool:
+        await _load_test(
+            f"pool(size={args.size})", lambda i: pool.call_tool("add", {"a": i, "b": 1}), args.calls, args.concurrency
+        )
+        print(pool.snapshot())
+    if args.compare:
+        await _load_test(
+            "new session per call",
+            lambda i: _fresh_session_call(args.url, "add", {"a": i, "b": 1}),
+            args.calls,
+            args.concurrency,
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test an MCP server through the session pool.")
+    parser.add_argument("--url", default="http://localhost:8080/mcp")
+    parser.add_argument("--size", type=int, default=4, help="Sessions in the pool.")
+    parser.add_argument("--calls", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--compare", action="store_true", help="Also run the calls with a new session each.")
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+../mcp_tool_cache.py
\ No newline at end of file
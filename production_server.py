@@ -0,0 +1,509 @@
+"""
+Pre-forking production server for the agents in this repository.
+
+The master process imports every agent (found by agent_registry without importing
+anything else under the agents directory) and builds the ADK FastAPI app once,
+then forks the workers. The workers share the imported modules copy-on-write instead
+of each importing them again, so they start in milliseconds and use far less memory.
+All workers accept connections on one listening socket created by the master.
+
+Reloading (on SIGHUP, or on a source change with --watch) first starts the new code in a
+child process that only imports the agents and builds the app. If that fails, the master
+logs the error and keeps serving with the current workers. Otherwise it re-executes itself
+with the listening socket inherited, so no connection is refused. The new master imports the
+new code and forks new workers. Then it sends SIGTERM to the old workers, which stop
+accepting connections and drain their in-flight requests, including SSE streams, for
+up to ``graceful_timeout_secs``. If none of the new workers starts, the old workers are
+kept instead.
+
+The file watcher collects the files to watch once at startup and then only stats them,
+so a poll never rescans the tree; only a directory whose modification time changed is
+listed again, to tell new or deleted source files from unrelated ones.
+
+Workers share nothing but the listening socket and the configured session store. Agents
+that keep other state in process memory, such as the Customer_Service scheduling engine,
+must be served with ``--workers 1``.
+
+Started from agent_runner.py:
+    python agent_runner.py --production --workers 4 [--watch]
+"""
+
+import asyncio
+import logging
+import os
+import select
+import signal
+import socket
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Optional
+
+from agent_registry import AgentRegistry, install
+
+logger = logging.getLogger("production_server")
+
+# Set by a reloading master for the master that replaces it.
+ENV_LISTEN_FD = "ADK_SERVER_LISTEN_FD"
+ENV_OLD_WORKERS = "ADK_SERVER_OLD_WORKERS"
+# Set for the child process that checks the new code before a reload.
+ENV_CHECK_ONLY = "ADK_SERVER_CHECK_ONLY"
+
+WATCHED_SUFFIXES = (".py", ".env")
+SKIP_DIRS = {"__pycache__", ".git", ".venv", "venv", "node_modules", ".pytest_cache"}
+SMAPS_FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty")
+
+
+@dataclass
+class ServerOptions:
+    """
+    Options of the production server.
+    """
+    agents_dir: str
+    host: str = "0.0.0.0"
+    port: int = 8010
+    workers: int = 2
+    web: bool = True
+    # Import the agents in the master before forking. Disable to compare startup and memory.
+    preload: bool = True
+    watch: bool = False
+    poll_interval_secs: float = 1.0
+    graceful_timeout_secs: float = 30.0
+    # With more than one worker, sessions must live in a shared store (e.g. "sqlite:///sessions.db").
+    session_service_uri: Optional[str] = None
+    log_level: str = "info"
+
+
+def build_app(options: ServerOptions, registry: AgentRegistry):
+    from google.adk.cli.fast_api import get_fast_api_app
+
+    app = get_fast_api_app(
+        agents_dir=options.agents_dir,
+        session_service_uri=options.session_service_uri,
+        web=options.web,
+        host=options.host,
+        port=options.port,
+        reload_agents=False,
+    )
+    install(app, registry)
+    return app
+
+
+class FileWatcher:
+    """
+    Detects changed, added and deleted source files by polling modification times.
+
+    The files and directories are collected once. A poll only stats them. When a
+    directory's modification time changes, the directory is listed again, and it counts
+    as changed only if its watched files or subdirectories differ, so editor swap files
+    and bytecode caches do not trigger a reload.
+    """
+
+    def __init__(self, root: str):
+        self.paths: List[str] = []
+        self._entries: Dict[str, FrozenSet[str]] = {}
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = [d for d in dirnames if self._watched_dir(d)]
+            self.paths.append(dirpath)
+            self.paths.extend(os.path.join(dirpath, f) for f in filenames if f.endswith(WATCHED_SUFFIXES))
+            self._entries[dirpath] = frozenset(dirnames).union(f for f in filenames if f.endswith(WATCHED_SUFFIXES))
+        self._mtimes = self._snapshot()
+
+    @staticmethod
+    def _watched_dir(name: str) -> bool:
+        return name not in SKIP_DIRS and not name.startswith(".")
+
+    @classmethod
+    def _list_entries(cls, dirpath: str) -> Optional[FrozenSet[str]]:
+        try:
+            with os.scandir(dirpath) as it:
+                return frozenset(
+                    entry.name for entry in it
+                    if (entry.is_dir() and cls._watched_dir(entry.name)) or entry.name.endswith(WATCHED_SUFFIXES)
+                )
+        except FileNotFoundError:
+            return None
+
+    def _snapshot(self) -> Dict[str, Optional[float]]:
+        mtimes = {}
+        for path in self.paths:
+            try:
+                mtimes[path] = os.stat(path).st_mtime_ns
+            except FileNotFoundError:
+                mtimes[path] = None
+        return mtimes
+
+    def changed(self) -> List[str]:
+        """
+        Returns the paths that changed since the watcher was created.
+        """
+        current = self._snapshot()
+        changed = []
+        for path, mtime in current.items():
+            if mtime == self._mtimes[path]:
+                continue
+            if path in self._entries and mtime is not None:
+                if self._list_entries(path) == self._entries[path]:
+                    # Only unwatched entries were added or removed; don't list it again next poll.
+                    self._mtimes[path] = mtime
+                    continue
+            changed.append(path)
+        return changed
+
+
+def memory_usage(pid: int) -> Dict[str, int]:
+    """
+    Returns the memory usage of a process in kB from /proc/<pid>/smaps_rollup (Linux only).
+
+    PSS divides shared pages among the processes sharing them, so summing PSS over the
+    workers gives their real combined footprint; RSS counts shared pages in every worker.
+    """
+    usage = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                if name in SMAPS_FIELDS:
+                    usage[name] = int(value.split()[0])
+    except OSError:
+        pass
+    return usage
+
+
+@dataclass
+class Worker:
+    pid: int
+    forked_at: float
+    # Closed (None) once the worker reported that it is ready, or exited.
+    ready_fd: Optional[int]
+    startup_secs: Optional[float] = None
+
+
+@dataclass
+class _Draining:
+    pid: int
+    deadline: float
+
+
+class PreforkServer:
+    """
+    Master process that preloads the agents, forks the workers and supervises them.
+    """
+
+    def __init__(self, options: ServerOptions):
+        self.options = options
+        self.registry = AgentRegistry(options.agents_dir)
+        self.app = None
+        self.preload_secs: Dict[str, float] = {}
+        self.sock: Optional[socket.socket] = None
+        self.workers: Dict[int, Worker] = {}
+        self.draining: Dict[int, _Draining] = {}
+        self._stopping = False
+        self._reload_requested = False
+        self._reload_check: Optional[subprocess.Popen] = None
+
+    def _listen_socket(self) -> socket.socket:
+        fd = os.environ.pop(ENV_LISTEN_FD, None)
+        if fd is not None:
+            return socket.socket(fileno=int(fd))
+        sock = socket.socket(socket.AF_INET6 if ":" in self.options.host else socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.options.host, self.options.port))
+        sock.listen(2048)
+        return sock
+
+    def _spawn(self) -> Worker:
+        read_fd, write_fd = os.pipe()
+        forked_at = time.monotonic()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+                signal.signal(sig, signal.SIG_DFL)
+            code = 0
+            try:
+                self._run_worker(write_fd, forked_at)
+            except BaseException:
+                logger.exception("Worker failed")
+                code = 1
+            finally:
+                os._exit(code)
+        os.close(write_fd)
+        worker = self.workers[pid] = Worker(pid, forked_at, read_fd)
+        return worker
+
+    def _run_worker(self, ready_fd: int, forked_at: float) -> None:
+        import uvicorn
+
+        app = self.app
+        if app is None:
+            self.registry.load_all()
+            app = build_app(self.options, self.registry)
+        config = uvicorn.Config(
+            app,
+            log_level=self.options.log_level,
+            timeout_graceful_shutdown=int(self.options.graceful_timeout_secs),
+        )
+        server = uvicorn.Server(config)
+
+        async def serve():
+            serving = asyncio.ensure_future(server.serve(sockets=[self.sock]))
+            while not server.started and not serving.done():
+                await asyncio.sleep(0.01)
+            os.write(ready_fd, repr(time.monotonic() - forked_at).encode())
+            os.close(ready_fd)
+            await serving
+
+        asyncio.run(serve())
+
+    @staticmethod
+    def _read_ready(worker: Worker) -> None:
+        data = os.read(worker.ready_fd, 64)
+        os.close(worker.ready_fd)
+        worker.ready_fd = None
+        if data:
+            worker.startup_secs = float(data)
+
+    def _wait_ready(self, workers: List[Worker], timeout_secs: float = 120.0) -> None:
+        """
+        Blocks until the given workers are ready or have exited, for up to ``timeout_secs``.
+        """
+        pending = {w.ready_fd: w for w in workers if w.ready_fd is not None}
+        deadline = time.monotonic() + timeout_secs
+        while pending and time.monotonic() < deadline:
+            readable, _, _ = select.select(list(pending), [], [], max(0.0, deadline - time.monotonic()))
+            for fd in readable:
+                self._read_ready(pending.pop(fd))
+
+    def _poll_ready(self, timeout_secs: float) -> None:
+        """
+        Waits up to ``timeout_secs`` for workers started while supervising to report that they
+        are ready, so a slow worker never stalls the supervision loop.
+        """
+        pending = {w.ready_fd: w for w in self.workers.values() if w.ready_fd is not None}
+        if not pending:
+            time.sleep(timeout_secs)
+            return
+        readable, _, _ = select.select(list(pending), [], [], timeout_secs)
+        for fd in readable:
+            self._read_ready(pending[fd])
+
+    def report(self) -> str:
+        """
+        Returns a table with the startup time and memory usage of every worker.
+        """
+        lines = []
+        if self.preload_secs:
+            total = sum(self.preload_secs.values())
+            per_agent = ", ".join(f"{name} {secs:.2f}s" for name, secs in self.preload_secs.items())
+            lines.append(f"Preloaded agents in {total:.2f}s before fork ({per_agent})")
+        lines.append(f"{'pid':>8} {'startup':>9} {'rss_mb':>8} {'pss_mb':>8} {'shared_mb':>10} {'private_mb':>11}")
+        total_rss = total_pss = 0
+        for worker in self.workers.values():
+            usage = memory_usage(worker.pid)
+            rss, pss = usage.get("Rss", 0), usage.get("Pss", 0)
+            shared = usage.get("Shared_Clean", 0) + usage.get("Shared_Dirty", 0)
+            private = usage.get("Private_Clean", 0) + usage.get("Private_Dirty", 0)
+            total_rss += rss
+            total_pss += pss
+            startup = f"{worker.startup_secs:.3f}s" if worker.startup_secs is not None else "n/a"
+            lines.append(f"{worker.pid:>8} {startup:>9} {rss / 1024:>8.1f} {pss / 1024:>8.1f} "
+                         f"{shared / 1024:>10.1f} {private / 1024:>11.1f}")
+        lines.append(f"{'total':>8} {'':>9} {total_rss / 1024:>8.1f} {total_pss / 1024:>8.1f}")
+        return "\n".join(lines)
+
+    def _adopt_old_workers(self) -> None:
+        old = os.environ.pop(ENV_OLD_WORKERS, "")
+        deadline = time.monotonic() + self.options.graceful_timeout_secs + 5
+        for pid in filter(None, old.split(",")):
+            self.draining[int(pid)] = _Draining(int(pid), deadline)
+
+    def _keep_old_workers(self, failed: List[Worker]) -> None:
+        """
+        Supervises the workers of the previous master instead of the new workers, which failed
+        to start and are drained in their place.
+        """
+        now = time.monotonic()
+        old = list(self.draining.values())
+        self.draining.clear()
+        for worker in failed:
+            del self.workers[worker.pid]
+            if worker.ready_fd is not None:
+                os.close(worker.ready_fd)
+            self.draining[worker.pid] = _Draining(worker.pid, now + self.options.graceful_timeout_secs + 5)
+        for draining in old:
+            self.workers[draining.pid] = Worker(draining.pid, now, None)
+
+    def _drain_old_workers(self) -> None:
+        for pid in self.draining:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def _reap(self) -> None:
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            if self.draining.pop(pid, None) is not None:
+                logger.info(f"Old worker {pid} drained")
+            elif pid in self.workers:
+                worker = self.workers.pop(pid)
+                if worker.ready_fd is not None:
+                    os.close(worker.ready_fd)
+                if not self._stopping:
+                    logger.warning(f"Worker {pid} exited with status {status}; starting a new one")
+                    # Its readiness is picked up by _poll_ready.
+                    self._spawn()
+
+    def _kill_overdue(self) -> None:
+        """
+        Kills old workers that are still running past their drain deadline.
+        """
+        now = time.monotonic()
+        for draining in list(self.draining.values()):
+            if now > draining.deadline:
+                logger.warning(f"Old worker {draining.pid} did not drain in time; killing it")
+                try:
+                    os.kill(draining.pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    self.draining.pop(draining.pid, None)
+
+    def _start_reload_check(self) -> None:
+        """
+        Starts a child process that imports the current code and builds the app without serving.
+        """
+        if self._reload_check is not None:
+            return
+        logger.info("Reloading: checking the current code")
+        env = dict(os.environ)
+        env[ENV_CHECK_ONLY] = "1"
+        self._reload_check = subprocess.Popen([sys.executable, *sys.argv], env=env)
+
+    def _finish_reload_check(self) -> bool:
+        """
+        Returns True once the reload check has passed. A failed check is logged and forgotten,
+        so the current workers keep serving until the next reload.
+        """
+        if self._reload_check is None or self._reload_check.poll() is None:
+            return False
+        returncode = self._reload_check.returncode
+        self._reload_check = None
+        if returncode != 0:
+            logger.error(f"Not reloading: the new code failed to load (exit status {returncode}); "
+                         f"the current workers keep serving")
+            return False
+        return True
+
+    def _reexec(self) -> None:
+        """
+        Replaces the master with a fresh one running the current code. The new master
+        inherits the listening socket and the current workers, which it drains.
+        """
+        logger.info("Reloading: starting a new master with the current code")
+        os.set_inheritable(self.sock.fileno(), True)
+        env = dict(os.environ)
+        env[ENV_LISTEN_FD] = str(self.sock.fileno())
+        env[ENV_OLD_WORKERS] = ",".join(str(pid) for pid in [*self.workers, *self.draining])
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.execve(sys.executable, [sys.executable, *sys.argv], env)
+
+    def _on_signal(self, signum, frame) -> None:
+        if signum == signal.SIGHUP:
+            self._reload_requested = True
+        else:
+            self._stopping = True
+
+    def serve(self) -> None:
+        """
+        Starts the workers and supervises them until SIGTERM or SIGINT.
+        """
+        options = self.options
+        if os.environ.get(ENV_CHECK_ONLY):
+            # A reloading master checks that the new code loads before replacing itself.
+            self.registry.load_all()
+            build_app(options, self.registry)
+            return
+
+        if options.workers > 1 and not options.session_service_uri:
+            logger.warning("Sessions are kept in memory per worker; pass a shared session service URI "
+                           "(e.g. sqlite:///sessions.db) so a conversation can hit any worker")
+        if options.workers > 1:
+            logger.warning("Agents that keep state in process memory (e.g. Customer_Service appointment "
+                           "bookings) are not shared between workers; serve them with --workers 1")
+
+        if options.preload:
+            self.preload_secs = self.registry.load_all()
+            self.app = build_app(options, self.registry)
+        self.sock = self._listen_socket()
+        self._adopt_old_workers()
+        watcher = FileWatcher(options.agents_dir) if options.watch else None
+
+        for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+            signal.signal(sig, self._on_signal)
+
+        new_workers = [self._spawn() for _ in range(options.workers)]
+        self._wait_ready(new_workers)
+        if self.draining and all(w.startup_secs is None for w in new_workers):
+            logger.error("None of the new workers started; the workers of the previous master keep serving")
+            self._keep_old_workers(new_workers)
+        # The new workers accept connections now, so the workers of the previous master can drain.
+        self._drain_old_workers()
+        print(f"Server is listening on http://{options.host}:{options.port} with {options.workers} workers")
+        print(self.report())
+
+        while not self._stopping:
+            self._poll_ready(options.poll_interval_secs)
+            self._reap()
+            self._kill_overdue()
+            if self._reload_requested:
+                self._reload_requested = False
+                self._start_reload_check()
+            if watcher is not None:
+                changed = watcher.changed()
+                if changed:
+                    logger.info(f"Detected changes in {', '.join(changed[:5])}")
+                    # Compare against the current files from now on, so a failed check is not repeated.
+                    watcher = FileWatcher(options.agents_dir)
+                    self._start_reload_check()
+            if self._finish_reload_check():
+                self._reexec()
+
+        self.shutdown()
+
+    def shutdown(self) -> None:
+        """
+        Stops all workers gracefully: they finish in-flight requests for up to graceful_timeout_secs.
+        """
+        if self._reload_check is not None:
+            self._reload_check.kill()
+        pids = [*self.workers, *self.draining]
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        deadline = time.monotonic() + self.options.graceful_timeout_secs + 5
+        for pid in pids:
+            while time.monotonic() < deadline:
+                try:
+                    done, _ = os.waitpid(pid, os.WNOHANG)
+                except ChildProcessError:
+                    break
+                if done:
+                    break
+                time.sleep(0.1)
+            else:
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+        self.workers.clear()
+        self.draining.clear()
+        self.sock.close()